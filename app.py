@@ -4,12 +4,25 @@ from datetime import datetime
 from utils.data_loader import (
     parse_tickers,
     load_intraday_volume_data,
+    load_live_intraday_data,
+    load_live_indicators,
     load_price_history,
     load_macro_universe,
+    load_etf_flows,
+    load_precomputed,
+    load_backtest_history,
 )
+from utils.analytics_cache import analytics_cache
+from utils.bulk import bulk_downloader
+from utils.instrumentation import current_run, finish_run, recorder, stage, start_run
+from utils.refresh import get_poller
+from utils.regimes import get_rules
+from utils.scanner import signal_params
+from utils.shared_store import shared_store
 from utils.theming import set_page_config_and_theme
+from utils.universe import get_universe
 
-from tabs import intraday, comparison, macro, heatmaps, flows, signals, playbook
+from tabs import intraday, comparison, macro, heatmaps, flows, signals, precomputed, playbook
 
 # ---------------------------------------------------------
 # PAGE CONFIG / THEME
@@ -77,8 +90,16 @@ momentum_window = st.sidebar.slider(
 )
 
 auto_refresh = st.sidebar.checkbox("Enable auto-refresh", value=False)
+refresh_seconds = 30
 if auto_refresh:
-    st.experimental_set_query_params(ts=str(datetime.now().timestamp()))
+    refresh_seconds = st.sidebar.slider(
+        "Refresh every (seconds):",
+        min_value=5,
+        max_value=300,
+        value=30,
+        step=5,
+        help="Intraday bars are polled in the background; the page reruns only when new bars arrive.",
+    )
 
 tickers = parse_tickers(tickers_input)
 if not tickers:
@@ -86,95 +107,220 @@ if not tickers:
     st.stop()
 
 # ---------------------------------------------------------
-# GLOBAL DATA LOADS (SHARED ACROSS TABS)
+# DATASETS (LOADED ON DEMAND, SHARED ACROSS TABS)
 # ---------------------------------------------------------
-avg_vol, intraday_df = load_intraday_volume_data(
-    tickers=tickers,
-    history_days=history_days,
-    interval=intraday_interval,
-)
+# Each tab module lists the datasets it needs in DATASETS; only those are
+# loaded, and only for the tabs that are actually rendered on this run.
+
+# Multiselects choosing which macro groups a tab shows.
+MACRO_GROUP_KEYS = ("macro_groups", "heatmap_groups")
+
+
+def macro_groups():
+    """Macro groups to load: the tabs' current picks (their defaults until first shown)
+    plus the groups holding the regime rules' assets."""
+    universe = get_universe()
+    picked = {g for key in MACRO_GROUP_KEYS for g in st.session_state.get(key, universe.default_groups)}
+    picked.update(universe.groups_of(get_rules().assets))
+    return tuple(g for g in universe.groups if g in picked)
+
+
+DATASET_LOADERS = {
+    "intraday": lambda: load_live_intraday_data(
+        tickers=tickers,
+        history_days=history_days,
+        interval=intraday_interval,
+        refresh_seconds=refresh_seconds,
+    ) if auto_refresh else load_intraday_volume_data(
+        tickers=tickers,
+        history_days=history_days,
+        interval=intraday_interval,
+    ),
+    "live_indicators": lambda: load_live_indicators(
+        tickers=tickers,
+        interval=intraday_interval,
+        refresh_seconds=refresh_seconds,
+    ) if auto_refresh else None,
+    "price_history": lambda: load_price_history(
+        tickers=tickers,
+        period=period,
+        interval=chart_interval,
+    ),
+    "macro": lambda: load_macro_universe(groups=macro_groups()),
+    "etf_flows": load_etf_flows,
+    "precomputed": load_precomputed,
+}
+
+_loaded = {}
 
-price_history = load_price_history(
-    tickers=tickers,
-    period=period,
-    interval=chart_interval,
-)
 
-macro_assets, macro_prices = load_macro_universe()
+def load_dataset(name):
+    # A tab's fragment rerun can change the macro group picks, so they are part of the key.
+    key = (name, macro_groups()) if name == "macro" else name
+    if key not in _loaded:
+        _loaded[key] = DATASET_LOADERS[name]()
+    return _loaded[key]
+
+
+# Signal parameters adopted from a backtest live in this session only and apply
+# only to bars of the interval they were tested on.
+scanner_params = signal_params(st.session_state.get(intraday.ADOPTED_PARAMS_KEY), intraday_interval)
 
 # ---------------------------------------------------------
 # TABS
 # ---------------------------------------------------------
-tab_labels = [
-    "📊 Intraday Scanner",
-    "📈 Comparison & Technicals",
-    "🌍 Macro Capital Flow",
-    "🔥 Heatmaps & Rotation",
-    "💰 ETF Flows",
-    "🧭 Smart Money Signals",
-    "📘 Capital Flow Playbook",
-]
-
-(
-    tab_intraday,
-    tab_comparison,
-    tab_macro,
-    tab_heatmaps,
-    tab_flows,
-    tab_signals,
-    tab_playbook,
-) = st.tabs(tab_labels)
-
-with tab_intraday:
-    intraday.render(
+TABS = {
+    "📊 Intraday Scanner": (intraday, lambda d: dict(
         tickers=tickers,
-        avg_vol=avg_vol,
-        intraday_df=intraday_df,
-        price_history=price_history,
+        avg_vol=d["intraday"][0],
+        intraday_panel=d["intraday"][1],
+        price_history=d["price_history"],
+        live_indicators=d["live_indicators"],
         timeframe_label=timeframe_label,
-    )
-
-with tab_comparison:
-    comparison.render(
+        interval=intraday_interval,
+        signal_params=scanner_params,
+        fetch_backtest_history=lambda: load_backtest_history(tickers, intraday_interval),
+    )),
+    "📈 Comparison & Technicals": (comparison, lambda d: dict(
         tickers=tickers,
-        price_history=price_history,
+        price_history=d["price_history"],
         timeframe_label=timeframe_label,
-    )
-
-with tab_macro:
-    macro.render(
-        assets=macro_assets,
-        prices=macro_prices,
+        fetch_prices=lambda extra: load_price_history(
+            tickers=extra,
+            period=period,
+            interval=chart_interval,
+        ),
+    )),
+    "🌍 Macro Capital Flow": (macro, lambda d: dict(
+        assets=d["macro"][0],
+        prices=d["macro"][1],
         momentum_window=momentum_window,
-    )
+    )),
+    "🔥 Heatmaps & Rotation": (heatmaps, lambda d: dict(
+        assets=d["macro"][0],
+        prices=d["macro"][1],
+    )),
+    "💰 ETF Flows": (flows, lambda d: dict(
+        flows=d["etf_flows"],
+    )),
+    "🧭 Smart Money Signals": (signals, lambda d: dict(
+        tickers=tickers,
+        intraday_panel=d["intraday"][1],
+        macro_prices=d["macro"][1],
+        signal_params=scanner_params,
+    )),
+    "📦 Precomputed": (precomputed, lambda d: dict(
+        results=d["precomputed"],
+    )),
+    "📘 Capital Flow Playbook": (playbook, lambda d: dict()),
+}
 
-with tab_heatmaps:
-    heatmaps.render(
-        assets=macro_assets,
-        prices=macro_prices,
-    )
+# Fragments let a widget inside one tab rerun just that tab.
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
 
-with tab_flows:
-    flows.render()
 
-with tab_signals:
-    signals.render(
-        tickers=tickers,
-        price_history=price_history,
-        intraday_df=intraday_df,
-        macro_prices=macro_prices,
-    )
+def tab_name(label):
+    return TABS[label][0].__name__.rsplit(".", 1)[-1]
+
 
-with tab_playbook:
-    playbook.render()
+def render_tab(label):
+    module, build_kwargs = TABS[label]
+    # A widget inside the tab reruns only this fragment, outside the script's run:
+    # trace that as a run of its own.
+    run = start_run() if current_run() is None else None
+    try:
+        with stage(f"tab.{tab_name(label)}"):
+            data = {name: load_dataset(name) for name in module.DATASETS}
+            module.render(**build_kwargs(data))
+    finally:
+        if run is not None:
+            finish_run(run, tab_name(label))
 
-with st.sidebar:
-    if st.button("Clear Cache"):
-        st.cache_data.clear()
-        st.cache_resource.clear()
-        st.experimental_rerun()
 
+if fragment is not None:
+    render_tab = fragment(render_tab)
 
+lazy_tabs = st.sidebar.checkbox(
+    "Load only the visible tab",
+    value=True,
+    help="Loads data and builds figures for the selected tab only.",
+)
+
+# Every stage timed from here on (loaders, tab renders, figures) lands on this
+# run. It is closed in ``finally`` so reruns cut short by st.rerun()/st.stop()
+# (buttons, the live watcher) are recorded too.
+run = start_run()
+tab = "all"
+try:
+    if lazy_tabs:
+        active_tab = st.radio(
+            "View:",
+            list(TABS.keys()),
+            horizontal=True,
+            label_visibility="collapsed",
+            key="active_tab",
+        )
+        tab = tab_name(active_tab)
+        render_tab(active_tab)
+    else:
+        for label, container in zip(TABS, st.tabs(list(TABS.keys()))):
+            with container:
+                render_tab(label)
+
+    # ---------------------------------------------------------
+    # AUTO-REFRESH
+    # ---------------------------------------------------------
+    # The poller thread fetches new bars; this watcher only checks its version and
+    # reruns the app when something changed, so idle ticks cost nothing. Each tick
+    # goes through get_poller, which keeps the poller from idling out while the page
+    # is open and restarts it if it stopped anyway.
+    if auto_refresh and fragment is not None:
+        def live_version():
+            # A restarted poller counts versions from zero again, so it is part of the key.
+            poller = get_poller(tickers, intraday_interval, refresh_seconds)
+            return poller, (id(poller), poller.version)
+
+        st.session_state.setdefault("live_version", live_version()[1])
+
+        @fragment(run_every=refresh_seconds)
+        def watch_live_data():
+            poller, version = live_version()
+            if version != st.session_state["live_version"]:
+                st.session_state["live_version"] = version
+                st.rerun()
+            st.caption(f"Live: {poller.ring.size} bars, {poller.polls} polls")
 
+        with st.sidebar:
+            watch_live_data()
+
+    with st.sidebar:
+        if st.button("Clear Cache"):
+            st.cache_data.clear()
+            st.cache_resource.clear()
+            shared_store.clear()
+            st.rerun()
+finally:
+    finish_run(run, tab)
+
+# ---------------------------------------------------------
+# DEBUG: STAGE TIMINGS
+# ---------------------------------------------------------
+if st.sidebar.checkbox("Show stage timings", value=False, key="debug_timings",
+                       help="Wall time, rows/tickers and cache outcome of every loader, tab and figure."):
+    with st.sidebar.expander("⏱ Stage timings", expanded=True):
+        st.caption(f"This rerun: {run.seconds:.2f}s over {len(run.records)} stages")
+        st.dataframe(run.table(), hide_index=True, use_container_width=True)
+        st.caption("Since start (p50/p95 over the last calls):")
+        st.dataframe(recorder.summary(), hide_index=True, use_container_width=True)
+        st.caption("Caches")
+        st.json({
+            "shared_store": shared_store.stats(),
+            "analytics_cache": analytics_cache.stats(),
+            "bulk_downloader": bulk_downloader.stats(),
+        }, expanded=False)
+        st.download_button("Export JSON lines", recorder.jsonl(), file_name="stage_timings.jsonl",
+                           mime="application/x-ndjson", key="export_timings_jsonl")
+        st.download_button("Export Prometheus", recorder.prometheus_text(), file_name="stage_timings.prom",
+                           mime="text/plain", key="export_timings_prom")
 
 st.caption(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -0,0 +1,329 @@
+"""Hot-path benchmarks on synthetic data, gated against a saved baseline.
+
+Times the functions the dashboard spends its time in (download parsing, RSI,
+the volume/price signal, the scanner table, heatmap return matrices, per-ticker
+series lookups) at sizes from a handful of tickers to 10,000 and from one
+session of minute bars to 20 years of daily bars:
+
+    python -m bench.hotpaths                  # quick suite, compared with bench/baseline.json
+    python -m bench.hotpaths --suite full     # adds the 10,000-ticker and 20-year sizes
+    python -m bench.hotpaths --filter scan    # only cases whose name contains "scan"
+    python -m bench.hotpaths --save-baseline  # record this machine's timings as the baseline
+    python -m bench.hotpaths --output results.json
+
+Exits with status 1 when a case is more than ``--tolerance`` slower than its
+baseline (and slower by more than ``--floor`` seconds, to ignore timer noise).
+The gate compares best-of-samples times, which other load on the machine can
+only inflate, never deflate; medians are reported alongside. Before each case a
+fixed NumPy/pandas/Python workload is timed too, and the baseline is scaled by
+how much slower or faster that calibration ran, so a throttled or busier host
+does not read as a code regression. Baselines are still best recorded on the
+host that runs the gate.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from bench.synthetic import make_closes, make_download
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = ROOT / "bench" / "baseline.json"
+
+DEFAULT_TOLERANCE = 0.30
+# Sub-10 ms cases swing by a few ms between runs on a shared host; smaller
+# slowdowns than this never fail the gate.
+DEFAULT_FLOOR = 0.005
+# A sample repeats a fast call until it has run at least this long.
+MIN_SAMPLE_SECONDS = 0.05
+
+
+# -----------------------------
+# Cases
+# -----------------------------
+# Each case is (name, group, setup); setup builds the inputs (untimed) and returns
+# the zero-argument call to time.
+
+def _panel(n_tickers, days, interval):
+    from utils.panel import PricePanel
+
+    data = make_download(n_tickers, days, interval)
+    return PricePanel.from_frame(data, list(data.columns.get_level_values(-1).unique()))
+
+
+def loader_from_frame(n_tickers, days, interval):
+    def setup():
+        from utils.panel import PricePanel
+
+        data = make_download(n_tickers, days, interval)
+        tickers = list(data.columns.get_level_values(-1).unique())
+        return lambda: PricePanel.from_frame(data, tickers)
+    return setup
+
+
+def loader_split_assemble(n_tickers, days, interval):
+    def setup():
+        from utils.frames import assemble, split_by_ticker
+
+        data = make_download(n_tickers, days, interval)
+        tickers = list(data.columns.get_level_values(-1).unique())
+        return lambda: assemble(split_by_ticker(data, tickers, interval), tickers, interval)
+    return setup
+
+
+def rsi_series(days, interval):
+    def setup():
+        from utils.indicators import compute_rsi
+
+        series = make_download(1, days, interval, crypto_share=1.0)["Close"].iloc[:, 0]
+        return lambda: compute_rsi(series, window=14)
+    return setup
+
+
+def rsi_panel(n_tickers, days, interval):
+    def setup():
+        from utils.indicators import rsi_panel
+
+        close = _panel(n_tickers, days, interval).fields["Close"]
+        return lambda: rsi_panel(close, window=14)
+    return setup
+
+
+def signal_per_ticker(n_tickers, days, interval):
+    def setup():
+        from utils.indicators import volume_price_signal
+
+        panel = _panel(n_tickers, days, interval)
+        pairs = [(panel.series("Close", t), panel.series("Volume", t)) for t in panel.tickers]
+        return lambda: [volume_price_signal(p, v, window=20) for p, v in pairs]
+    return setup
+
+
+def scanner_table(n_tickers, days, interval):
+    def setup():
+        from tabs.intraday import _build_volume_scanner_table
+        from utils.analytics_cache import analytics_cache
+        from utils.scanner import DEFAULT_SIGNAL_PARAMS
+
+        panel = _panel(n_tickers, days, interval)
+        avg_vol = pd.Series(np.nanmean(panel.fields["Volume"], axis=0) * 78, index=panel.tickers)
+
+        def run():
+            analytics_cache.clear()  # time the computation, not the memo
+            return _build_volume_scanner_table(panel.tickers, avg_vol, panel, DEFAULT_SIGNAL_PARAMS)
+        return run
+    return setup
+
+
+def return_matrix(n_assets, days, calendar):
+    def setup():
+        from utils.returns import return_matrix
+
+        prices = make_closes(n_assets, days)
+        return lambda: return_matrix(prices, calendar=calendar)
+    return setup
+
+
+def price_series_lookup(n_tickers, days, interval, lookups=100):
+    def setup():
+        from tabs.comparison import _get_price_series
+
+        panel = _panel(n_tickers, days, interval)
+        names = panel.tickers[:lookups]
+        return lambda: [_get_price_series(panel, t) for t in names]
+    return setup
+
+
+QUICK = [
+    ("loader/from_frame[100x1y@1d]", "loader", loader_from_frame(100, 365, "1d")),
+    ("loader/from_frame[1000x1y@1d]", "loader", loader_from_frame(1000, 365, "1d")),
+    ("loader/from_frame[1000x1d@1m]", "loader", loader_from_frame(1000, 1, "1m")),
+    ("loader/split_assemble[100x1y@1d]", "loader", loader_split_assemble(100, 365, "1d")),
+    ("indicators/compute_rsi[1x20y@1d]", "indicators", rsi_series(20 * 365, "1d")),
+    ("indicators/rsi_panel[1000x1y@1d]", "indicators", rsi_panel(1000, 365, "1d")),
+    ("indicators/volume_price_signal[100x1d@1m]", "indicators", signal_per_ticker(100, 1, "1m")),
+    ("scan/scanner_table[10x1d@1m]", "scan", scanner_table(10, 1, "1m")),
+    ("scan/scanner_table[1000x1d@1m]", "scan", scanner_table(1000, 1, "1m")),
+    ("heatmap/return_matrix[200x1y]", "heatmap", return_matrix(200, 365, calendar=False)),
+    ("heatmap/return_matrix[200x20y]", "heatmap", return_matrix(200, 20 * 365, calendar=False)),
+    ("heatmap/return_matrix_calendar[200x20y]", "heatmap", return_matrix(200, 20 * 365, calendar=True)),
+    ("comparison/get_price_series[1000x1y@1d]", "comparison", price_series_lookup(1000, 365, "1d")),
+]
+
+FULL = QUICK + [
+    ("loader/from_frame[10000x1d@5m]", "loader", loader_from_frame(10_000, 1, "5m")),
+    ("loader/from_frame[1000x20y@1d]", "loader", loader_from_frame(1000, 20 * 365, "1d")),
+    ("indicators/volume_price_signal[1000x1d@1m]", "indicators", signal_per_ticker(1000, 1, "1m")),
+    ("scan/scanner_table[10000x1d@5m]", "scan", scanner_table(10_000, 1, "5m")),
+    ("heatmap/return_matrix[1000x20y]", "heatmap", return_matrix(1000, 20 * 365, calendar=False)),
+    ("heatmap/return_matrix_calendar[1000x20y]", "heatmap", return_matrix(1000, 20 * 365, calendar=True)),
+    ("comparison/get_price_series[10000x1y@1d]", "comparison", price_series_lookup(10_000, 365, "1d", lookups=1000)),
+]
+
+SUITES = {"quick": QUICK, "full": FULL}
+
+
+# -----------------------------
+# Timing
+# -----------------------------
+_calibration_data = None
+
+
+def calibrate(samples: int = 5) -> float:
+    """Best time of a fixed NumPy/pandas/Python workload: the machine's speed right now."""
+    global _calibration_data
+    if _calibration_data is None:
+        rng = np.random.default_rng(0)
+        _calibration_data = (rng.standard_normal(200_000), pd.DataFrame(rng.standard_normal((2_000, 50))))
+    values, frame = _calibration_data
+
+    best = float("inf")
+    for _ in range(samples):
+        t0 = time.perf_counter()
+        np.sort(values)
+        np.cumsum(values)
+        frame.rolling(20).mean()
+        sum(i * i for i in range(20_000))
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def time_call(fn, repeat: int) -> dict:
+    """Median and best seconds per call over ``repeat`` samples (after one warm-up call)."""
+    t0 = time.perf_counter()
+    fn()
+    first = time.perf_counter() - t0
+    calls = max(1, int(MIN_SAMPLE_SECONDS / first)) if first < MIN_SAMPLE_SECONDS else 1
+
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        samples.append((time.perf_counter() - t0) / calls)
+    return {"median": statistics.median(samples), "min": min(samples), "samples": repeat, "calls": calls}
+
+
+def run(suite: str, repeat: int, name_filter: str | None = None, names=None) -> dict:
+    results = {}
+    for name, group, setup in SUITES[suite]:
+        if name_filter and name_filter not in name or names is not None and name not in names:
+            continue
+        fn = setup()
+        before = calibrate()
+        timing = time_call(fn, repeat)
+        results[name] = {"group": group, "calibration": min(before, calibrate()), **timing}
+        del fn
+        print(f"  {name:<48}{results[name]['median'] * 1e3:>10.2f} ms", file=sys.stderr)
+    return {
+        "meta": {
+            "suite": suite,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+# -----------------------------
+# Baseline
+# -----------------------------
+def load_baseline(path: Path) -> dict:
+    if not path.exists():
+        return {"meta": {}, "results": {}}
+    return json.loads(path.read_text())
+
+
+def save_baseline(path: Path, report: dict):
+    """Merge ``report`` into the baseline, so quick and full runs can share one file."""
+    baseline = load_baseline(path)
+    baseline["meta"] = report["meta"]
+    baseline["results"].update(report["results"])
+    baseline["results"] = dict(sorted(baseline["results"].items()))
+    path.write_text(json.dumps(baseline, indent=2) + "\n")
+
+
+def compare(report: dict, baseline: dict, tolerance: float, floor: float) -> list:
+    """One row per case: ``(name, expected s, current s, ratio, status)``, best-of-samples times.
+
+    ``expected`` is the baseline time scaled by the calibration ratio.
+    """
+    rows = []
+    for name, result in report["results"].items():
+        base = baseline["results"].get(name)
+        now = result["min"]
+        if base is None:
+            rows.append((name, None, now, None, "new"))
+            continue
+        speed = result["calibration"] / base["calibration"] if base.get("calibration") else 1.0
+        expected = base["min"] * speed
+        ratio = now / expected if expected else float("inf")
+        if ratio > 1 + tolerance and now - expected > floor:
+            status = "REGRESSION"
+        elif ratio < 1 / (1 + tolerance):
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append((name, expected, now, ratio, status))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suite", choices=list(SUITES), default="quick")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per case (median is reported)")
+    parser.add_argument("--filter", help="only run cases whose name contains this")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown before a case fails (0.3 = 30%%)")
+    parser.add_argument("--floor", type=float, default=DEFAULT_FLOOR,
+                        help="slowdowns smaller than this many seconds never fail")
+    parser.add_argument("--save-baseline", action="store_true", help="write these timings into the baseline")
+    parser.add_argument("--output", type=Path, help="also write the results as JSON here")
+    args = parser.parse_args()
+
+    print(f"Running {args.suite} suite:", file=sys.stderr)
+    report = run(args.suite, args.repeat, args.filter)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    if args.save_baseline:
+        save_baseline(args.baseline, report)
+        print(f"Saved {len(report['results'])} timings to {args.baseline}")
+        return
+
+    baseline = load_baseline(args.baseline)
+    rows = compare(report, baseline, args.tolerance, args.floor)
+    suspects = [r[0] for r in rows if r[4] == "REGRESSION"]
+    if suspects:
+        # One noisy sample shouldn't fail a deploy: re-time suspects and keep their better run.
+        print("Re-timing suspected regressions:", file=sys.stderr)
+        retry = run(args.suite, args.repeat, names=suspects)
+        for name, result in retry["results"].items():
+            if result["min"] / result["calibration"] < report["results"][name]["min"] / report["results"][name]["calibration"]:
+                report["results"][name] = result
+        rows = compare(report, baseline, args.tolerance, args.floor)
+
+    print(f"{'case (best of samples)':<48}{'expected ms':>13}{'now ms':>10}{'ratio':>8}  status")
+    for name, base, now, ratio, status in rows:
+        base_ms = f"{base * 1e3:.2f}" if base is not None else "-"
+        ratio_s = f"{ratio:.2f}" if ratio is not None else "-"
+        print(f"{name:<48}{base_ms:>13}{now * 1e3:>10.2f}{ratio_s:>8}  {status}")
+
+    regressions = [r for r in rows if r[4] == "REGRESSION"]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Startup benchmark: per-module import time and time-to-first-paint.
+
+Every measurement runs in a fresh interpreter so nothing is already imported:
+
+    python -m bench.startup [--repeat 5] [--json]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+MODULES = [
+    "streamlit",
+    "utils.data_loader",
+    "utils.indicators",
+    "tabs.intraday",
+    "tabs.comparison",
+    "tabs.macro",
+    "tabs.heatmaps",
+    "tabs.flows",
+    "tabs.signals",
+    "tabs.precomputed",
+    "tabs.playbook",
+]
+
+_IMPORT_SNIPPET = """
+import time
+t0 = time.perf_counter()
+import {module}
+print(time.perf_counter() - t0)
+"""
+
+# First paint = interpreter start until app.py has emitted its title. The run is
+# stopped right there, so no data is loaded and no network is touched.
+_FIRST_PAINT_SNIPPET = """
+import time
+t0 = time.perf_counter()
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+painted = []
+_title = st.title
+
+def _title_then_stop(*args, **kwargs):
+    painted.append(time.perf_counter() - t0)
+    _title(*args, **kwargs)
+    st.stop()
+
+st.title = _title_then_stop
+AppTest.from_file({app!r}, default_timeout=60).run()
+print(painted[0])
+"""
+
+
+def _run(snippet: str) -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", snippet],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def measure(repeat: int) -> dict:
+    results = {"import_seconds": {}, "first_paint_seconds": None}
+    for module in MODULES:
+        samples = [_run(_IMPORT_SNIPPET.format(module=module)) for _ in range(repeat)]
+        results["import_seconds"][module] = statistics.median(samples)
+
+    app = str(ROOT / "app.py")
+    samples = [_run(_FIRST_PAINT_SNIPPET.format(app=app)) for _ in range(repeat)]
+    results["first_paint_seconds"] = statistics.median(samples)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement (median is reported)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = measure(args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'module':<24}{'import (s)':>12}")
+    for module, seconds in results["import_seconds"].items():
+        print(f"{module:<24}{seconds:>12.3f}")
+    print(f"\ntime to first paint: {results['first_paint_seconds']:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Seeded synthetic OHLCV shaped like a yfinance download, for benchmarks.
+
+``make_download`` returns what ``yf.download(tickers, ...)`` returns for a list:
+a frame with (Price, Ticker) MultiIndex columns, a ``Date`` index for daily bars
+or a UTC ``Datetime`` index for intraday ones. Crypto tickers (``...-USD``) trade
+every bar; equities only on weekdays and, intraday, during US cash hours
+(13:30-20:00 UTC), so mixed universes get the same NaN-padded union calendar the
+macro tabs see. A sprinkling of extra NaNs stands in for missed prints.
+
+The same ``seed`` and sizes always give the same frame.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ("Close", "High", "Low", "Open", "Volume")
+END = pd.Timestamp("2025-06-30")
+SESSION_OPEN = pd.Timedelta(hours=13, minutes=30)
+SESSION_CLOSE = pd.Timedelta(hours=20)
+
+
+def is_intraday(interval: str) -> bool:
+    return interval.endswith("m") or interval.endswith("h")
+
+
+def make_tickers(n_tickers: int, crypto_share: float = 0.1) -> list:
+    n_crypto = min(n_tickers, round(n_tickers * crypto_share))
+    equities = [f"EQ{i:05d}" for i in range(n_tickers - n_crypto)]
+    crypto = [f"C{i:04d}-USD" for i in range(n_crypto)]
+    return equities + crypto
+
+
+def make_index(days: int, interval: str = "1d") -> pd.DatetimeIndex:
+    """``days`` calendar days ending at ``END``, every bar of ``interval`` (weekends included)."""
+    if not is_intraday(interval):
+        return pd.date_range(end=END, periods=days, freq="D", name="Date")
+    step = pd.Timedelta(hours=int(interval[:-1])) if interval.endswith("h") else pd.Timedelta(minutes=int(interval[:-1]))
+    start = (END - pd.Timedelta(days=days - 1)).tz_localize("UTC")
+    return pd.date_range(start, END.tz_localize("UTC") + pd.Timedelta(days=1), freq=step,
+                         inclusive="left", name="Datetime")
+
+
+def equity_session(index: pd.DatetimeIndex, interval: str = "1d"):
+    """Rows on which equities trade."""
+    weekday = index.dayofweek < 5
+    if not is_intraday(interval):
+        return np.asarray(weekday)
+    time_of_day = index - index.normalize()
+    return np.asarray(weekday & (time_of_day >= SESSION_OPEN) & (time_of_day < SESSION_CLOSE))
+
+
+def make_download(n_tickers: int, days: int, interval: str = "1d", crypto_share: float = 0.1,
+                  gap_rate: float = 0.002, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    tickers = make_tickers(n_tickers, crypto_share)
+    index = make_index(days, interval)
+    n_rows, n = len(index), len(tickers)
+    is_crypto = np.array([t.endswith("-USD") for t in tickers])
+
+    # Daily volatility 1-4%, scaled to the bar length.
+    bars_per_day = 1 if not is_intraday(interval) else max(n_rows // days, 1)
+    sigma = rng.uniform(0.01, 0.04, n) / np.sqrt(bars_per_day)
+    returns = rng.standard_normal((n_rows, n)) * sigma
+    close = rng.uniform(5, 500, n) * np.exp(np.cumsum(returns, axis=0))
+
+    prev = np.vstack([close[:1], close[:-1]])
+    open_ = prev * (1 + rng.standard_normal((n_rows, n)) * sigma / 4)
+    wick = np.abs(rng.standard_normal((n_rows, n))) * sigma / 2
+    high = np.maximum(open_, close) * (1 + wick)
+    low = np.minimum(open_, close) * (1 - wick)
+    volume = np.round(rng.lognormal(12, 0.8, (n_rows, n)) / bars_per_day)
+
+    closed = ~equity_session(index, interval)[:, None] & ~is_crypto[None, :]
+    missing = closed | (rng.random((n_rows, n)) < gap_rate)
+    fields = {"Close": close, "High": high, "Low": low, "Open": open_, "Volume": volume}
+    for values in fields.values():
+        values[missing] = np.nan
+
+    columns = pd.MultiIndex.from_product([FIELDS, tickers], names=["Price", "Ticker"])
+    data = np.concatenate([fields[f] for f in FIELDS], axis=1)
+    frame = pd.DataFrame(data, index=index, columns=columns, copy=False)
+    # Like yfinance, rows where nothing traded are dropped.
+    return frame[~missing.all(axis=1)]
+
+
+def make_closes(n_assets: int, days: int, crypto_share: float = 0.1, seed: int = 0) -> pd.DataFrame:
+    """Date × asset closes like the macro frame (labels as columns)."""
+    data = make_download(n_assets, days, "1d", crypto_share=crypto_share, seed=seed)
+    return data["Close"].rename_axis(columns=None)
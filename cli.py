@@ -0,0 +1,87 @@
+"""Run the dashboard's analytics in batch, without Streamlit.
+
+Results go to MONEYFLOW_PRECOMPUTED_DIR (default .cache/precomputed), one file
+per job plus manifest.json; the dashboard's Precomputed tab shows them.
+
+    python cli.py tickers.txt                              # every job, Parquet
+    python cli.py tickers.txt --jobs scanner,rsi --format json --out results/
+    python cli.py --tickers AAPL,MSFT,BTC-USD --jobs returns,momentum --calendar
+    python cli.py --jobs regimes                           # macro universe; no tickers needed
+
+A ticker file holds symbols separated by commas, spaces or newlines; ``#``
+starts a comment. Exits 1 if any job failed.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from utils import settings
+from utils.batch import DEFAULT_OPTIONS, JOBS, read_tickers, run_jobs
+from utils.data_loader import parse_tickers
+from utils.precomputed import FORMATS
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("tickers_file", nargs="?", type=Path, help="file of ticker symbols")
+    parser.add_argument("--tickers", default="", help="comma-separated symbols, added to the file's")
+    parser.add_argument("--jobs", default=",".join(JOBS), help=f"comma-separated subset of: {', '.join(JOBS)}")
+    parser.add_argument("--out", type=Path, default=settings.PRECOMPUTED_DIR, help="output directory")
+    parser.add_argument("--format", choices=FORMATS, default="parquet")
+    parser.add_argument("--period", default=DEFAULT_OPTIONS["period"], help="daily history for returns/momentum/rsi")
+    parser.add_argument("--interval", default=DEFAULT_OPTIONS["interval"], help="intraday bars for the scanner")
+    parser.add_argument("--history-days", type=int, default=DEFAULT_OPTIONS["history_days"],
+                        help="days behind the scanner's average volume")
+    parser.add_argument("--signal-window", type=int, default=DEFAULT_OPTIONS["window"],
+                        help="bars behind the scanner's volume/price signal")
+    parser.add_argument("--price-threshold", type=float, default=DEFAULT_OPTIONS["price_threshold"],
+                        help="minimum price move for a signal, e.g. 0.005 (a backtest's best set)")
+    parser.add_argument("--vol-threshold", type=float, default=DEFAULT_OPTIONS["vol_threshold"],
+                        help="minimum volume surge over its average for a signal, e.g. 0.5")
+    parser.add_argument("--momentum-window", type=int, default=DEFAULT_OPTIONS["momentum_window"])
+    parser.add_argument("--rsi-window", type=int, default=DEFAULT_OPTIONS["rsi_window"])
+    parser.add_argument("--regime-window", type=int, default=DEFAULT_OPTIONS["regime_window"],
+                        help="regime window in days (default: the rules file's)")
+    parser.add_argument("--calendar", action="store_true", help="calendar-aware return horizons")
+    args = parser.parse_args(argv)
+
+    jobs = [j.strip() for j in args.jobs.split(",") if j.strip()]
+    unknown = [j for j in jobs if j not in JOBS]
+    if unknown:
+        parser.error(f"unknown jobs {unknown}; choose from {list(JOBS)}")
+
+    tickers = read_tickers(args.tickers_file) if args.tickers_file else []
+    tickers = list(dict.fromkeys(tickers + parse_tickers(args.tickers)))
+    if not tickers and any(j != "regimes" for j in jobs):
+        parser.error("give a ticker file or --tickers (only the regimes job runs without them)")
+
+    options = {
+        "period": args.period,
+        "interval": args.interval,
+        "history_days": args.history_days,
+        "window": args.signal_window,
+        "price_threshold": args.price_threshold,
+        "vol_threshold": args.vol_threshold,
+        "momentum_window": args.momentum_window,
+        "calendar": args.calendar,
+        "rsi_window": args.rsi_window,
+        "regime_window": args.regime_window,
+    }
+    print(f"Running {', '.join(jobs)} over {len(tickers):,} tickers → {args.out}")
+    t0 = time.perf_counter()
+    results = run_jobs(tickers, jobs, options, args.format, args.out)
+
+    failed = 0
+    for job, entry in results.items():
+        if isinstance(entry, Exception):
+            failed += 1
+            print(f"  {job:<10} FAILED: {entry}")
+        else:
+            print(f"  {job:<10} {entry['rows']:>8,} rows  {entry['seconds']:7.2f}s  {args.out / entry['file']}")
+    print(f"Done in {time.perf_counter() - t0:.1f}s" + (f", {failed} failed" if failed else ""))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
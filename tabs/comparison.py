@@ -1,31 +1,27 @@
+from __future__ import annotations
+
 import streamlit as st
-import plotly.graph_objects as go
-import pandas as pd
 
-from utils.indicators import compute_rsi
+from utils.analytics_cache import cached_metric
+from utils.charting import FIGURE_POINT_BUDGET, downsample_note, line_trace, trace_budget
+from utils.indicators import compute_rsi, money_flow_screen
+from utils.instrumentation import stage
+from utils.lazy import lazy_import
+from utils.relative_strength import pair_strength, ratio_series
+
+go = lazy_import("plotly.graph_objects")
+pd = lazy_import("pandas")
 
-RATIO_PAIRS = {
-    "BTC / S&P 500": ("BTC-USD", "^GSPC"),
-    "Gold / S&P 500": ("GLD", "^GSPC"),
-    "Nasdaq / Dow": ("^IXIC", "^DJI"),
-    "XLE / SPY (Energy vs Market)": ("XLE", "SPY"),
-    "ETH / BTC": ("ETH-USD", "BTC-USD"),
-}
+DATASETS = ("price_history",)
+
+CUSTOM_RATIO = "Custom pair…"
 
 def _get_price_series(price_history, ticker: str) -> pd.Series | None:
     if price_history is None or price_history.empty:
         return None
-    if isinstance(price_history.columns, pd.MultiIndex):
-        try:
-            return price_history["Close", ticker].dropna()
-        except KeyError:
-            return None
-    else:
-        if "Close" in price_history.columns:
-            return price_history["Close"].dropna()
-        return None
+    return price_history.series("Close", ticker)
 
-def render(tickers, price_history, timeframe_label):
+def render(tickers, price_history, timeframe_label, fetch_prices):
     st.subheader("📈 Multi‑Ticker Price Comparison & Technicals")
 
     normalize = st.checkbox("Normalize to % change (start = 0%)", value=False)
@@ -37,33 +33,43 @@ def render(tickers, price_history, timeframe_label):
         key="comparison_multiselect"
     )
 
-    fig = go.Figure()
-
-    for t in compare_tickers:
-        series = _get_price_series(price_history, t)
-        if series is None or series.empty:
-            continue
-
-        y = (series / series.iloc[0] - 1) * 100 if normalize else series
-
-        fig.add_trace(go.Scatter(
-            x=series.index,
-            y=y,
-            mode="lines",
-            name=t,
-            line=dict(width=2),
-        ))
-
-    fig.update_layout(
-        height=450,
-        title=f"Price Comparison ({timeframe_label})",
-        xaxis_title="Time",
-        yaxis_title="% Change" if normalize else "Price",
-        hovermode="x unified",
-        legend=dict(orientation="h", y=-0.2),
-    )
+    with stage("figure.comparison_price", tickers=len(compare_tickers)) as record:
+        fig = go.Figure()
+        budget = trace_budget(len(compare_tickers))
+        total = dropped = 0
+
+        for t in compare_tickers:
+            series = _get_price_series(price_history, t)
+            if series is None or series.empty:
+                continue
+
+            y = (series / series.iloc[0] - 1) * 100 if normalize else series
+
+            trace, n_dropped = line_trace(
+                series.index,
+                y,
+                budget,
+                mode="lines",
+                name=t,
+                line=dict(width=2),
+            )
+            fig.add_trace(trace)
+            total += len(series)
+            dropped += n_dropped
+        record.rows = total
+
+        fig.update_layout(
+            height=450,
+            title=f"Price Comparison ({timeframe_label})",
+            xaxis_title="Time",
+            yaxis_title="% Change" if normalize else "Price",
+            hovermode="x unified",
+            legend=dict(orientation="h", y=-0.2),
+        )
 
-    st.plotly_chart(fig, use_container_width=True, key="comparison_price_chart")
+        st.plotly_chart(fig, use_container_width=True, key="comparison_price_chart")
+    if note := downsample_note(total, dropped):
+        st.caption(note)
 
     st.markdown("### 📉 RSI (Relative Strength Index)")
 
@@ -73,51 +79,135 @@ def render(tickers, price_history, timeframe_label):
     if series is None or series.empty:
         st.info("No price data for RSI.")
     else:
-        rsi = compute_rsi(series, window=14)
-
-        fig_rsi = go.Figure()
-        fig_rsi.add_trace(go.Scatter(
-            x=rsi.index,
-            y=rsi,
-            mode="lines",
-            name=f"RSI(14) – {rsi_ticker}",
-        ))
-        fig_rsi.add_hrect(y0=30, y1=70, fillcolor="gray", opacity=0.1, line_width=0)
-        fig_rsi.update_layout(
-            height=250,
-            xaxis_title="Time",
-            yaxis_title="RSI",
-            hovermode="x unified",
+        rsi = cached_metric("rsi", series, {"window": 14}, lambda: compute_rsi(series, window=14))
+
+        with stage("figure.comparison_rsi", rows=len(rsi), tickers=1):
+            fig_rsi = go.Figure()
+            trace, rsi_dropped = line_trace(
+                rsi.index,
+                rsi,
+                FIGURE_POINT_BUDGET,
+                mode="lines",
+                name=f"RSI(14) – {rsi_ticker}",
+            )
+            fig_rsi.add_trace(trace)
+            fig_rsi.add_hrect(y0=30, y1=70, fillcolor="gray", opacity=0.1, line_width=0)
+            fig_rsi.update_layout(
+                height=250,
+                xaxis_title="Time",
+                yaxis_title="RSI",
+                hovermode="x unified",
+            )
+            st.plotly_chart(fig_rsi, use_container_width=True, key="comparison_rsi_chart")
+        if note := downsample_note(len(rsi), rsi_dropped):
+            st.caption(note)
+
+    st.markdown("### 🧮 RSI / Money-Flow Screener (All Tickers)")
+
+    screen = cached_metric(
+        "money_flow_screen",
+        price_history,
+        {"tickers": tuple(tickers)},
+        lambda: money_flow_screen(price_history, tickers),
+    )
+    if screen.empty:
+        st.info("No OHLCV data for the screener.")
+    else:
+        with stage("table.money_flow_screen", rows=len(screen)):
+            st.dataframe(
+                screen.sort_values(screen.columns[1], ascending=False).style.format("{:,.2f}"),
+                use_container_width=True,
+            )
+        st.caption(
+            "RSI/MFI above 70 = overbought, below 30 = oversold. "
+            "CMF > 0 and rising OBV = accumulation; price above session VWAP = buyers in control."
         )
-        st.plotly_chart(fig_rsi, use_container_width=True, key="comparison_rsi_chart")
 
-    st.markdown("### ⚖ Ratio Charts (Capital Preference)")
+    st.markdown("### ⚖ Relative Strength (All Pairs)")
+
+    has_closes = not price_history.empty and "Close" in price_history.fields
+    closes = price_history.frame("Close") if has_closes else pd.DataFrame()
+    n_bars = len(closes)
+    lookback = n_bars
+    if n_bars > 10:
+        lookback = st.slider(
+            "Ratio lookback (bars):",
+            10,
+            n_bars,
+            n_bars,
+            key="ratio_lookback",
+        )
+    strength = cached_metric(
+        "pair_strength",
+        price_history,
+        {"lookback": lookback},
+        lambda: pair_strength(closes, lookback),
+    )
 
-    ratio_label = st.selectbox("Select ratio:", list(RATIO_PAIRS.keys()))
-    base, quote = RATIO_PAIRS[ratio_label]
+    leaders = strength.leaderboard(top=25)
+    if strength.empty:
+        st.info("Relative strength needs at least two tickers with data in this timeframe.")
+    else:
+        st.caption(
+            f"{strength.n_pairs:,} pairs over the last {strength.bars} bars. "
+            "Score = ratio log return × trend R², so steady outperformance ranks above spikes."
+        )
+        col1, col2 = st.columns([3, 2])
+        with col1:
+            with stage("table.pair_leaderboard", rows=len(leaders)):
+                st.dataframe(
+                    leaders.style.format({"Ratio return %": "{:,.2f}", "Trend R²": "{:.2f}", "Score": "{:.3f}"}),
+                    use_container_width=True,
+                    hide_index=True,
+                )
+        with col2:
+            with stage("table.pair_ranking", rows=len(strength.tickers)):
+                st.dataframe(
+                    strength.ranking().style.format("{:,.2f}"),
+                    use_container_width=True,
+                )
+
+    pair_labels = [f"{b} / {q}" for b, q in zip(leaders["Outperformer"], leaders["Underperformer"])]
+    ratio_label = st.selectbox("Ratio chart:", pair_labels + [CUSTOM_RATIO], key="ratio_pair")
+    if ratio_label == CUSTOM_RATIO:
+        col1, col2 = st.columns(2)
+        base = col1.text_input("Base:", value="BTC-USD", key="ratio_base").strip().upper()
+        quote = col2.text_input("Quote:", value="^GSPC", key="ratio_quote").strip().upper()
+    else:
+        base, quote = ratio_label.split(" / ")
+    if not base or not quote:
+        return
 
-    base_series = _get_price_series(price_history, base)
-    quote_series = _get_price_series(price_history, quote)
+    # Legs that aren't in the loaded tickers are fetched for the same timeframe.
+    missing = [t for t in (base, quote) if t not in price_history]
+    extra = fetch_prices(missing) if missing else None
+    base_series = _get_price_series(price_history if base in price_history else extra, base)
+    quote_series = _get_price_series(price_history if quote in price_history else extra, quote)
 
-    if base_series is None or quote_series is None:
+    if base_series is None or quote_series is None or base_series.empty or quote_series.empty:
         st.info("Not enough data for this ratio in the current timeframe.")
         return
 
-    df = pd.concat([base_series, quote_series], axis=1, join="inner")
-    df.columns = ["base", "quote"]
-    ratio = (df["base"] / df["quote"]).dropna()
-
-    fig_ratio = go.Figure()
-    fig_ratio.add_trace(go.Scatter(
-        x=ratio.index,
-        y=ratio,
-        mode="lines",
-        name=f"{base} / {quote}",
-    ))
-    fig_ratio.update_layout(
-        height=300,
-        xaxis_title="Time",
-        yaxis_title="Ratio",
-        hovermode="x unified",
-    )
-    st.plotly_chart(fig_ratio, use_container_width=True, key="comparison_ratio_chart")
+    ratio = ratio_series(base_series, quote_series)
+    if lookback < n_bars and len(closes):
+        ratio = ratio[ratio.index >= closes.index[-lookback]]
+
+    with stage("figure.comparison_ratio", rows=len(ratio), tickers=2):
+        fig_ratio = go.Figure()
+        trace, ratio_dropped = line_trace(
+            ratio.index,
+            ratio,
+            FIGURE_POINT_BUDGET,
+            mode="lines",
+            name=f"{base} / {quote}",
+        )
+        fig_ratio.add_trace(trace)
+        fig_ratio.update_layout(
+            height=300,
+            xaxis_title="Time",
+            yaxis_title="Ratio",
+            hovermode="x unified",
+        )
+        st.plotly_chart(fig_ratio, use_container_width=True, key="comparison_ratio_chart")
+    if note := downsample_note(len(ratio), ratio_dropped):
+        st.caption(note)
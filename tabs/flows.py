@@ -1,19 +1,111 @@
+from __future__ import annotations
+
 import streamlit as st
 
-def render():
-    st.subheader("💰 ETF Flows (Scaffolding)")
+from utils.charting import downsample_frame, downsample_note
+from utils.flows import FlowDataset
+from utils.instrumentation import stage
+from utils.lazy import lazy_import
+from utils.settings import FLOWS_SOURCE_DIR
+
+pd = lazy_import("pandas")
+px = lazy_import("plotly.express")
+
+DATASETS = ("etf_flows",)
+
+FLOW_WINDOWS = {
+    "1 Day": "flow",
+    "5 Days": "flow_5d",
+    "20 Days": "flow_20d",
+    "60 Days": "flow_60d",
+}
+
+def _ranking_chart(values: pd.Series, title: str, color: str):
+    fig = px.bar(
+        (values / 1e6).round(1).iloc[::-1],
+        orientation="h",
+        labels={"value": "Net flow ($M)", "index": "ETF"},
+        title=title,
+    )
+    fig.update_traces(marker_color=color)
+    fig.update_layout(showlegend=False, height=max(300, 24 * len(values)))
+    return fig
+
+def render(flows: FlowDataset):
+    st.subheader("💰 ETF Flows")
+
+    if flows is None or flows.empty:
+        st.info(f"""
+No ETF flow data yet.
+
+Flows are estimated as **change in shares outstanding × NAV**. Drop CSV or
+Parquet files with the columns `date, ticker, shares_outstanding, nav` into
+`{FLOWS_SOURCE_DIR}` (or set `MONEYFLOW_FLOWS_DIR`); a per-fund file named
+after its ticker may leave out the `ticker` column. New days are folded in
+incrementally on the next refresh.
+""")
+        return
+
+    st.caption(f"{len(flows.tickers)} ETFs, data through {flows.index[-1]:%Y-%m-%d}.")
+
+    window_label = st.radio(
+        "Flow window:",
+        list(FLOW_WINDOWS),
+        index=2,
+        horizontal=True,
+        key="flows_window",
+    )
+    window_flows = flows.latest(FLOW_WINDOWS[window_label]).sort_values(ascending=False)
+    top_n = st.slider("ETFs per ranking:", 5, 50, 15, key="flows_top_n")
 
-    st.info("""
-This section is a scaffold for ETF flow analytics.
+    st.markdown(f"### 📊 Inflow / Outflow Ranking ({window_label})")
+    col1, col2 = st.columns(2)
+    inflows = window_flows[window_flows > 0].head(top_n)
+    outflows = window_flows[window_flows < 0].tail(top_n).iloc[::-1]
+    with col1:
+        if inflows.empty:
+            st.write("No net inflows in this window.")
+        else:
+            with stage("figure.flows_inflows", tickers=len(inflows)):
+                st.plotly_chart(_ranking_chart(inflows, "Largest inflows", "#2ca02c"), use_container_width=True)
+    with col2:
+        if outflows.empty:
+            st.write("No net outflows in this window.")
+        else:
+            with stage("figure.flows_outflows", tickers=len(outflows)):
+                st.plotly_chart(_ranking_chart(outflows, "Largest outflows", "#d62728"), use_container_width=True)
 
-True ETF flow data (creations/redemptions) usually comes from:
-- ETF providers
-- Specialized APIs
-- Institutional data vendors
+    aum = flows.aum()
+    table = pd.DataFrame({
+        "Net flow ($M)": window_flows / 1e6,
+        "AUM ($M)": aum.reindex(window_flows.index) / 1e6,
+    })
+    table["Flow % of AUM"] = table["Net flow ($M)"] / table["AUM ($M)"] * 100
+    with stage("table.flows", rows=len(table)):
+        st.dataframe(
+            table.style.format({"Net flow ($M)": "{:,.1f}", "AUM ($M)": "{:,.0f}", "Flow % of AUM": "{:.2f}"}),
+            use_container_width=True,
+        )
 
-You can approximate flows with:
-- Change in shares outstanding × NAV
-- Combined with volume and price trends.
+    st.markdown("### 📈 Cumulative Flows")
+    leaders = list(inflows.index[:3]) + list(outflows.index[:3])
+    selected = st.multiselect(
+        "ETFs:",
+        flows.tickers,
+        default=leaders,
+        key="flows_selected",
+    )
+    if selected:
+        with stage("figure.flows_cumulative", rows=len(flows.index), tickers=len(selected)):
+            cum = flows.frame("cum_flow")[selected] / 1e6
+            cum_chart, dropped = downsample_frame(cum)
+            st.line_chart(cum_chart)
+        if note := downsample_note(len(cum), dropped):
+            st.caption(note)
 
-When you're ready to plug a data source in, this tab is the place to wire it.
+    st.markdown("""
+**Reading flows:**
+- Persistent creations (inflows) while price rises → conviction buying.
+- Redemptions into strength → investors taking money off the table.
+- Flow estimates lag: shares outstanding is usually reported with a one-day delay.
 """)
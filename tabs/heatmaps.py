@@ -1,20 +1,25 @@
+from __future__ import annotations
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-
-def _build_return_matrix(prices: pd.DataFrame) -> pd.DataFrame:
-    periods_map = {
-        "1D": 1,
-        "1W": 5,
-        "1M": 21,
-        "3M": 63,
-        "6M": 126,
-        "1Y": 252,
-    }
-    out = {}
-    for label, periods in periods_map.items():
-        out[label] = prices.pct_change(periods=periods).iloc[-1] * 100
-    return pd.DataFrame(out)
+
+from utils.analytics_cache import cached_metric
+from utils.correlation import correlation_history, hierarchical_clusters, log_returns
+from utils.instrumentation import stage
+from utils.lazy import lazy_import
+from utils.returns import momentum_matrix, return_matrix
+from utils.universe import get_universe
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+px = lazy_import("plotly.express")
+
+DATASETS = ("macro",)
+
+# Above this many rows, cell labels are unreadable and slow to draw.
+MAX_LABELLED_ROWS = 40
+
+# Bars of correlation history kept for the date slider.
+CORR_LOOKBACK = 252
 
 def render(assets, prices: pd.DataFrame):
     st.subheader("🔥 Heatmaps & Rotation")
@@ -23,38 +28,148 @@ def render(assets, prices: pd.DataFrame):
         st.warning("No macro price data for heatmaps.")
         return
 
-    returns = _build_return_matrix(prices).round(2)
-    st.markdown("### 📌 Multi‑Period Return Heatmap")
+    universe = get_universe()
+    groups = st.multiselect(
+        "Asset groups:",
+        list(universe.groups),
+        default=universe.default_groups,
+        format_func=lambda name: universe.groups[name].title,
+        key="heatmap_groups",
+    )
+    prices = prices[[label for label in universe.labels(groups) if label in prices.columns]].dropna(how="all")
+    if prices.empty:
+        st.info("Select at least one asset group with data.")
+        return
+    height = max(400, 22 * len(prices.columns))
+    text_auto = len(prices.columns) <= MAX_LABELLED_ROWS
 
-    fig_ret = px.imshow(
-        returns,
-        text_auto=True,
-        color_continuous_scale="RdYlGn",
-        aspect="auto",
-        labels=dict(x="Period", y="Asset", color="% Return"),
+    calendar = st.checkbox(
+        "Calendar-aware horizons",
+        value=False,
+        help="Measure each asset from its own last price over calendar time, so crypto "
+             "(7-day) and equity (5-day) rows line up.",
+        key="heatmap_calendar",
     )
-    st.plotly_chart(fig_ret, use_container_width=True, key="heatmap_returns")
+    params = {"calendar": calendar}
+
+    returns = cached_metric(
+        "return_matrix", prices, params, lambda: return_matrix(prices, calendar)
+    ).round(2)
+    st.markdown("### 📌 Multi‑Period Return Heatmap")
+
+    with stage("figure.heatmap_returns", rows=len(returns)):
+        fig_ret = px.imshow(
+            returns,
+            text_auto=text_auto,
+            color_continuous_scale="RdYlGn",
+            aspect="auto",
+            labels=dict(x="Period", y="Asset", color="% Return"),
+            height=height,
+        )
+        st.plotly_chart(fig_ret, use_container_width=True, key="heatmap_returns")
 
     st.markdown("### ⚡ Momentum Heatmap (Short vs Long)")
 
-    momentum_short = prices.pct_change(20).iloc[-1] * 100
-    momentum_long = prices.pct_change(60).iloc[-1] * 100
-    mom_df = pd.concat(
-        [momentum_short.rename("20D"), momentum_long.rename("60D")],
-        axis=1,
+    mom_df = cached_metric(
+        "momentum_matrix", prices, params, lambda: momentum_matrix(prices, calendar)
     ).round(2)
 
-    fig_mom = px.imshow(
-        mom_df,
-        text_auto=True,
-        color_continuous_scale="RdYlGn",
-        aspect="auto",
-        labels=dict(x="Window", y="Asset", color="% Momentum"),
-    )
-    st.plotly_chart(fig_mom, use_container_width=True, key="heatmap_momentum")
+    with stage("figure.heatmap_momentum", rows=len(mom_df)):
+        fig_mom = px.imshow(
+            mom_df,
+            text_auto=text_auto,
+            color_continuous_scale="RdYlGn",
+            aspect="auto",
+            labels=dict(x="Window", y="Asset", color="% Momentum"),
+            height=height,
+        )
+        st.plotly_chart(fig_mom, use_container_width=True, key="heatmap_momentum")
+
+    _render_correlation(prices, height, text_auto)
 
     st.markdown("""
 **Use case:**
 - Look for clusters of green → capital concentrating.
 - Watch for assets flipping from red to green across horizons → early rotation.
 """)
+
+def _cluster_table(corr, labels, names) -> pd.DataFrame:
+    rows = []
+    for k in range(labels.max() + 1):
+        idx = np.flatnonzero(labels == k)
+        block = corr[np.ix_(idx, idx)]
+        off_diag = block[~np.eye(len(idx), dtype=bool)]
+        rows.append({
+            "Cluster": k + 1,
+            "Size": len(idx),
+            "Avg corr": np.nanmean(off_diag) if off_diag.size else np.nan,
+            "Assets": ", ".join(names[i] for i in idx),
+        })
+    return pd.DataFrame(rows).set_index("Cluster")
+
+def _render_correlation(prices: pd.DataFrame, height: int, text_auto: bool):
+    st.markdown("### 🔗 Rolling Correlation & Rotation Clusters")
+
+    col1, col2, col3 = st.columns(3)
+    window = col1.slider("Correlation window (bars):", 20, 120, 60, step=5, key="corr_window")
+    change_lag = col2.select_slider("Change vs. bars ago:", [5, 10, 20, 60], value=20, key="corr_change_lag")
+    n_clusters = col3.slider("Clusters:", 2, 12, 4, key="corr_clusters")
+
+    dates, stack = cached_metric(
+        "correlation_history",
+        prices,
+        {"window": window, "lookback": CORR_LOOKBACK},
+        lambda: correlation_history(log_returns(prices), window, lookback=CORR_LOOKBACK),
+    )
+    if len(dates) == 0 or len(prices.columns) < 2:
+        st.info("Not enough history for rolling correlations.")
+        return
+
+    at = st.select_slider(
+        "As of:",
+        options=list(range(len(dates))),
+        value=len(dates) - 1,
+        format_func=lambda i: f"{dates[i]:%Y-%m-%d}",
+        key="corr_date",
+    )
+    corr = stack[at].astype(np.float64)
+    change = corr - stack[max(at - change_lag, 0)]
+
+    labels, order = hierarchical_clusters(corr, n_clusters)
+    names = list(prices.columns)
+    ordered = [names[i] for i in order]
+    fmt = ".2f" if text_auto else False
+
+    with stage("figure.heatmap_correlation", rows=len(ordered), tickers=len(ordered)):
+        fig_corr = px.imshow(
+            pd.DataFrame(corr[np.ix_(order, order)], index=ordered, columns=ordered),
+            zmin=-1,
+            zmax=1,
+            text_auto=fmt,
+            color_continuous_scale="RdBu_r",
+            aspect="auto",
+            labels=dict(color="Correlation"),
+            height=height,
+        )
+        st.plotly_chart(fig_corr, use_container_width=True, key="heatmap_correlation")
+
+    st.markdown(f"#### Δ Correlation vs. {change_lag} bars earlier")
+    with stage("figure.heatmap_correlation_change", rows=len(ordered), tickers=len(ordered)):
+        fig_change = px.imshow(
+            pd.DataFrame(change[np.ix_(order, order)], index=ordered, columns=ordered),
+            zmin=-1,
+            zmax=1,
+            text_auto=fmt,
+            color_continuous_scale="PuOr_r",
+            aspect="auto",
+            labels=dict(color="Δ Correlation"),
+            height=height,
+        )
+        st.plotly_chart(fig_change, use_container_width=True, key="heatmap_correlation_change")
+
+    st.markdown("#### 🧩 Rotation Clusters")
+    with stage("table.rotation_clusters", rows=len(names)):
+        st.dataframe(
+            _cluster_table(corr, labels, names).style.format({"Avg corr": "{:.2f}"}),
+            use_container_width=True,
+        )
@@ -1,85 +1,155 @@
+from __future__ import annotations
+
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-
-from utils.indicators import volume_price_signal
-
-def _build_volume_scanner_table(tickers, avg_vol, intraday_df):
-    rows = []
-
-    if intraday_df is None or intraday_df.empty:
-        return pd.DataFrame()
-
-    if isinstance(intraday_df.columns, pd.MultiIndex):
-        for t in tickers:
-            try:
-                vol = intraday_df["Volume", t].dropna()
-                price = intraday_df["Close", t].dropna()
-            except KeyError:
-                continue
-
-            if vol.empty or price.empty:
-                continue
-
-            cum_vol = vol.iloc[-1]
-            last_price = price.iloc[-1]
-            avg = avg_vol.get(t, np.nan)
-
-            pct = (cum_vol / avg * 100) if avg and avg > 0 else np.nan
-
-            rows.append({
-                "Ticker": t,
-                "Last Price": last_price,
-                "Cumulative Volume": int(cum_vol),
-                "Avg Daily Volume": int(avg) if not np.isnan(avg) else np.nan,
-                "% of Avg Volume": pct,
-                "Signal": volume_price_signal(price, vol, window=20),
-            })
-    else:
-        # Single-ticker case
-        t = tickers[0]
-        vol = intraday_df["Volume"].dropna()
-        price = intraday_df["Close"].dropna()
-        if not vol.empty and not price.empty:
-            cum_vol = vol.iloc[-1]
-            last_price = price.iloc[-1]
-            avg = avg_vol.iloc[0]
-            pct = (cum_vol / avg * 100) if avg > 0 else np.nan
-
-            rows.append({
-                "Ticker": t,
-                "Last Price": last_price,
-                "Cumulative Volume": int(cum_vol),
-                "Avg Daily Volume": int(avg),
-                "% of Avg Volume": pct,
-                "Signal": volume_price_signal(price, vol, window=20),
-            })
-
-    if not rows:
-        return pd.DataFrame()
-
-    df = pd.DataFrame(rows).sort_values("% of Avg Volume", ascending=False)
-    return df
-
-def render(tickers, avg_vol, intraday_df, price_history, timeframe_label):
-    st.subheader("📊 Intraday Unusual Volume Scanner")
 
-    table = _build_volume_scanner_table(tickers, avg_vol, intraday_df)
+from utils.backtest import DEFAULT_HORIZON, cached_sweep
+from utils.charting import downsample_note, line_trace, trace_budget
+from utils.instrumentation import stage
+from utils.lazy import lazy_import
+from utils.scanner import DEFAULT_SIGNAL_PARAMS, adoptable_params, cached_scan
+
+go = lazy_import("plotly.graph_objects")
+
+DATASETS = ("intraday", "price_history", "live_indicators")
+
+# Session state holding the signal parameters adopted from a backtest (this session only).
+ADOPTED_PARAMS_KEY = "scanner_signal_params"
+
+BACKTEST_COLUMNS = {
+    "window": "Window",
+    "price_threshold": "Min price move",
+    "vol_threshold": "Min volume surge",
+    "t_stat": "Spread t-stat",
+    "spread_pct": "Acc − Dist fwd %",
+    "accumulation_fwd_pct": "Accumulation fwd %",
+    "distribution_fwd_pct": "Distribution fwd %",
+    "base_fwd_pct": "All bars fwd %",
+    "accumulation_hit_rate": "Accumulation hit %",
+    "accumulation_n": "Accumulation bars",
+    "distribution_n": "Distribution bars",
+}
+
+def _build_volume_scanner_table(tickers, avg_vol, intraday_panel, params):
+    return cached_scan(intraday_panel, avg_vol, tickers, **params)
+
+LIVE_INDICATOR_COLUMNS = {
+    "rsi": "RSI (14)",
+    "volume_ma": "Avg Volume (20 bars)",
+    "return_1": "1-bar %",
+    "return_20": "20-bar %",
+}
+
+def _render_live_indicators(indicators):
+    st.markdown("### ⚡ Live Indicators")
+    if indicators is None or indicators.dropna(how="all").empty:
+        st.info("Live indicators appear once the poller holds enough bars.")
+        return
+
+    table = indicators[list(LIVE_INDICATOR_COLUMNS)].copy()
+    table[["return_1", "return_20"]] *= 100
+    st.caption("Updated bar by bar as the live poller receives new bars.")
+    with stage("table.live_indicators", rows=len(table)):
+        st.dataframe(
+            table.rename(columns=LIVE_INDICATOR_COLUMNS).style.format({
+                "RSI (14)": "{:.1f}",
+                "Avg Volume (20 bars)": "{:,.0f}",
+                "1-bar %": "{:.2f}",
+                "20-bar %": "{:.2f}",
+            }, na_rep="—"),
+            use_container_width=True,
+        )
 
-    if table.empty:
-        st.warning("No intraday data. Market might be closed or tickers invalid.")
-    else:
+def _describe_params(params) -> str:
+    return (
+        f"window {params['window']} bars, price move > {params['price_threshold']:.1%}, "
+        f"volume > {params['vol_threshold']:.0%} above its average"
+    )
+
+def _render_backtest(fetch_history, interval, params):
+    st.markdown("### 🔬 Signal Backtest (Parameter Sweep)")
+
+    if not st.toggle(f"Backtest the scanner's signal on {interval} bars", key="backtest_open"):
+        return
+    price_history = fetch_history()
+    if price_history is None or price_history.empty or not {"Close", "Volume"} <= set(price_history.fields):
+        st.info(f"No {interval} OHLCV history to backtest on.")
+        return
+
+    st.caption(
+        f"Replays the volume/price signal on every {interval} bar Yahoo serves "
+        f"({len(price_history.index):,} bars × {len(price_history.tickers)} tickers), the same bars "
+        "the scanner reads, and ranks window/threshold sets by how well Strong Accumulation beats "
+        "Distribution over the next bars."
+    )
+    horizon = st.select_slider("Forward horizon (bars):", [1, 5, 10, 20], value=DEFAULT_HORIZON, key="backtest_horizon")
+
+    results, meta = cached_sweep(price_history, horizon=horizon, compute=False)
+    if results is None:
+        if not st.button("Run backtest sweep", key="backtest_run"):
+            return
+        with st.spinner("Running parameter sweep…"):
+            results, meta = cached_sweep(price_history, horizon=horizon)
+
+    ranked = results.dropna(subset=["t_stat"])
+    if ranked.empty:
+        st.info("Too few Accumulation/Distribution bars in this data to rank parameter sets.")
+        return
+
+    st.caption(f"{len(results)} parameter sets, swept in {float(meta.get('moneyflow.seconds', 0)):.2f}s (cached on disk).")
+    with stage("table.backtest_ranking", rows=len(ranked)):
         st.dataframe(
-            table.style.format({
-                "Last Price": "{:.2f}",
-                "% of Avg Volume": "{:.1f}",
-                "Cumulative Volume": "{:,}",
-                "Avg Daily Volume": "{:,}",
+            ranked[list(BACKTEST_COLUMNS)].head(15).rename(columns=BACKTEST_COLUMNS).style.format({
+                "Min price move": "{:.1%}",
+                "Min volume surge": "{:.0%}",
+                "Spread t-stat": "{:.2f}",
+                "Acc − Dist fwd %": "{:.3f}",
+                "Accumulation fwd %": "{:.3f}",
+                "Distribution fwd %": "{:.3f}",
+                "All bars fwd %": "{:.3f}",
+                "Accumulation hit %": "{:.1f}",
+                "Accumulation bars": "{:,}",
+                "Distribution bars": "{:,}",
             }),
             use_container_width=True,
+            hide_index=True,
         )
 
+    best = ranked.iloc[0]
+    best_params = {k: best[k] for k in DEFAULT_SIGNAL_PARAMS}
+    col1, col2 = st.columns(2)
+    if col1.button(f"Use best for the scanner ({_describe_params({**DEFAULT_SIGNAL_PARAMS, **best_params})})", key="backtest_adopt"):
+        st.session_state[ADOPTED_PARAMS_KEY] = adoptable_params(best_params, interval)
+        st.rerun()
+    if params != DEFAULT_SIGNAL_PARAMS and col2.button("Reset scanner to defaults", key="backtest_reset"):
+        st.session_state.pop(ADOPTED_PARAMS_KEY, None)
+        st.rerun()
+
+def render(tickers, avg_vol, intraday_panel, price_history, live_indicators, timeframe_label, interval,
+           signal_params, fetch_backtest_history):
+    st.subheader("📊 Intraday Unusual Volume Scanner")
+
+    params = signal_params
+    table = _build_volume_scanner_table(tickers, avg_vol, intraday_panel, params)
+    if params != DEFAULT_SIGNAL_PARAMS:
+        st.caption(f"Signals use parameters backtested on {interval} bars this session: {_describe_params(params)}.")
+
+    if table.empty:
+        st.warning("No intraday data. Market might be closed or tickers invalid.")
+    else:
+        with stage("table.volume_scanner", rows=len(table)):
+            st.dataframe(
+                table.style.format({
+                    "Last Price": "{:.2f}",
+                    "% of Avg Volume": "{:.1f}",
+                    "Cumulative Volume": "{:,}",
+                    "Avg Daily Volume": "{:,}",
+                }),
+                use_container_width=True,
+            )
+
+    if live_indicators is not None:
+        _render_live_indicators(live_indicators)
+
     st.markdown("### 📈 Multi‑Ticker Intraday Price Comparison")
 
     compare_tickers = st.multiselect(
@@ -89,47 +159,53 @@ def render(tickers, avg_vol, intraday_df, price_history, timeframe_label):
         key="intraday_multiselect"
     )
 
-    fig = go.Figure()
+    with stage("figure.intraday_price", tickers=len(compare_tickers)) as record:
+        fig = go.Figure()
+        budget = trace_budget(len(compare_tickers))
+        total = dropped = 0
 
-    if price_history is not None and not price_history.empty:
-        for t in compare_tickers:
-            if isinstance(price_history.columns, pd.MultiIndex):
-                try:
-                    tdf = price_history.xs(t, axis=1, level=1)[["Close"]].dropna()
-                except KeyError:
+        if price_history is not None and not price_history.empty:
+            for t in compare_tickers:
+                close = price_history.series("Close", t)
+                if close is None or close.empty:
                     continue
-            else:
-                tdf = price_history[["Close"]].dropna()
-
-            if tdf.empty:
-                continue
-
-            fig.add_trace(go.Scatter(
-                x=tdf.index,
-                y=tdf["Close"],
-                mode="lines",
-                name=t,
-                line=dict(width=2),
-            ))
-
-    fig.update_layout(
-        height=450,
-        title=f"Price Comparison ({timeframe_label})",
-        xaxis_title="Time",
-        yaxis_title="Price",
-        hovermode="x unified",
-        legend=dict(orientation="h", y=-0.2),
-    )
 
-    st.plotly_chart(fig, use_container_width=True, key="intraday_price_chart")
+                trace, n_dropped = line_trace(
+                    close.index,
+                    close,
+                    budget,
+                    mode="lines",
+                    name=t,
+                    line=dict(width=2),
+                )
+                fig.add_trace(trace)
+                total += len(close)
+                dropped += n_dropped
+        record.rows = total
+
+        fig.update_layout(
+            height=450,
+            title=f"Price Comparison ({timeframe_label})",
+            xaxis_title="Time",
+            yaxis_title="Price",
+            hovermode="x unified",
+            legend=dict(orientation="h", y=-0.2),
+        )
+
+        st.plotly_chart(fig, use_container_width=True, key="intraday_price_chart")
+    if note := downsample_note(total, dropped):
+        st.caption(note)
 
     st.markdown("### 🧪 Volume / Price Confirmation (Signals)")
     if not table.empty:
-        st.dataframe(
-            table[["Ticker", "% of Avg Volume", "Signal"]].style.format({
-                "% of Avg Volume": "{:.1f}",
-            }),
-            use_container_width=True,
-        )
+        with stage("table.volume_signals", rows=len(table)):
+            st.dataframe(
+                table[["Ticker", "% of Avg Volume", "Signal"]].style.format({
+                    "% of Avg Volume": "{:.1f}",
+                }),
+                use_container_width=True,
+            )
     else:
         st.info("No volume/price signals available yet.")
+
+    _render_backtest(fetch_backtest_history, interval, params)
@@ -1,9 +1,33 @@
+from __future__ import annotations
+
 import streamlit as st
-import pandas as pd
+
+from utils.analytics_cache import cached_metric
+from utils.charting import downsample_frame, downsample_note
+from utils.instrumentation import stage
+from utils.lazy import lazy_import
+from utils.returns import momentum_ranking
+from utils.universe import get_universe
+
+pd = lazy_import("pandas")
+
+DATASETS = ("macro",)
 
 def render(assets, prices: pd.DataFrame, momentum_window: int):
     st.subheader("🌍 Macro Capital Flow Dashboard")
-    
+
+    universe = get_universe()
+    groups = st.multiselect(
+        "Asset groups:",
+        list(universe.groups),
+        default=universe.default_groups,
+        format_func=lambda name: universe.groups[name].title,
+        key="macro_groups",
+    )
+    if prices is not None and not prices.empty:
+        prices = prices[[label for label in universe.labels(groups) if label in prices.columns]]
+        prices = prices.dropna(how="all")
+
     # Always show what was loaded
     #st.write("Loaded macro columns:", prices.columns.tolist())
     #st.write("Missing values per asset:", prices.isna().sum())
@@ -14,8 +38,12 @@ def render(assets, prices: pd.DataFrame, momentum_window: int):
         return
 
     rs = prices / prices.iloc[0] * 100
-    momentum = prices.pct_change(momentum_window) * 100
-    latest_momentum = momentum.iloc[-1].sort_values(ascending=False)
+    latest_momentum = cached_metric(
+        "momentum_ranking",
+        prices,
+        {"window": momentum_window},
+        lambda: momentum_ranking(prices, momentum_window),
+    )
 
     st.markdown("### 📊 Capital Flow Overview")
 
@@ -23,15 +51,20 @@ def render(assets, prices: pd.DataFrame, momentum_window: int):
 
     with col1:
         st.markdown("#### 📈 Relative Strength (Indexed to 100)")
-        rs_interp = rs.interpolate(method="linear")
-        st.line_chart(rs_interp)
+        with stage("figure.macro_relative_strength", rows=len(rs), tickers=len(rs.columns)):
+            rs_interp = rs.interpolate(method="linear")
+            rs_chart, dropped = downsample_frame(rs_interp)
+            st.line_chart(rs_chart)
+        if note := downsample_note(len(rs_interp), dropped):
+            st.caption(note)
 
     with col2:
         st.markdown(f"#### 🔥 {momentum_window}-Day Momentum Ranking")
-        st.dataframe(
-            latest_momentum.to_frame("Momentum %").style.format({"Momentum %": "{:.2f}"}),
-            use_container_width=True,
-        )
+        with stage("table.macro_momentum", rows=len(latest_momentum)):
+            st.dataframe(
+                latest_momentum.to_frame("Momentum %").style.format({"Momentum %": "{:.2f}"}),
+                use_container_width=True,
+            )
 
     st.markdown("""
 **Interpretation:**
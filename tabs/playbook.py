@@ -1,5 +1,7 @@
 import streamlit as st
 
+DATASETS = ()
+
 def render():
     st.subheader("📘 Capital Flow Playbook — How Smart Money Rotates")
 
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import streamlit as st
+
+from utils.instrumentation import stage
+from utils.lazy import lazy_import
+from utils.settings import PRECOMPUTED_DIR
+
+px = lazy_import("plotly.express")
+
+DATASETS = ("precomputed",)
+
+JOB_TITLES = {
+    "scanner": "Unusual volume",
+    "returns": "Multi-period returns",
+    "momentum": "Momentum ranking",
+    "rsi": "RSI / money flow",
+    "regimes": "Macro regimes",
+}
+
+# Rows sent to the browser per table; filter to find anything further down.
+MAX_ROWS = 1000
+
+def _when(ts) -> str:
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M")
+
+def _describe(entry) -> str:
+    written = _when(entry["written_at"])
+    scope = f"{entry['tickers']:,} tickers" if entry.get("tickers") is not None else "the macro universe"
+    params = ", ".join(f"{k}={v}" for k, v in entry.get("params", {}).items())
+    return f"{entry['rows']:,} rows for {scope}, written {written} in {entry['seconds']:.1f}s ({params})."
+
+def render(results: dict):
+    st.subheader("📦 Precomputed Results (Batch CLI)")
+
+    if not results:
+        st.info(f"""
+No batch results yet.
+
+`python cli.py tickers.txt` runs the scanner, return matrix, momentum ranking,
+RSI screen and regime timeline over a ticker file without the dashboard and
+writes them to `{PRECOMPUTED_DIR}` (or `MONEYFLOW_PRECOMPUTED_DIR`); they show
+up here after the run. `python cli.py --help` lists the options.
+""")
+        return
+
+    jobs = [j for j in JOB_TITLES if j in results] + [j for j in results if j not in JOB_TITLES]
+    job = st.radio(
+        "Result:",
+        jobs,
+        format_func=lambda j: ("⚠ " if "error" in results[j][1] else "") + JOB_TITLES.get(j, j),
+        horizontal=True,
+        key="precomputed_job",
+    )
+    frame, entry = results[job]
+    if "error" in entry:
+        st.error(f"The latest run failed at {_when(entry['failed_at'])}: {entry['error']}")
+        if frame is None:
+            return
+        st.warning("Showing the last successful result, which may be out of date.")
+    st.caption(_describe(entry))
+
+    if job == "regimes":
+        if frame.empty:
+            st.info("The regime run had no macro data.")
+            return
+        with stage("figure.precomputed_regimes", rows=len(frame), tickers=len(frame.columns)):
+            fig = px.imshow(
+                frame.T,
+                zmin=0,
+                zmax=1,
+                color_continuous_scale="Greens",
+                aspect="auto",
+                labels=dict(x="Date", y="Regime", color="Conditions met"),
+                height=120 + 40 * len(frame.columns),
+            )
+            st.plotly_chart(fig, use_container_width=True, key="precomputed_regimes")
+        active = frame.columns[frame.iloc[-1] >= 1].tolist()
+        st.write(f"Active on {frame.index[-1]:%Y-%m-%d}: {', '.join(active) if active else 'none'}")
+        return
+
+    query = st.text_input("Filter tickers (contains):", key="precomputed_filter").strip().upper()
+    if query:
+        frame = frame[frame.index.astype(str).str.contains(query, regex=False)]
+    if len(frame) > MAX_ROWS:
+        st.caption(f"Showing the first {MAX_ROWS:,} of {len(frame):,} rows.")
+
+    with stage("table.precomputed", rows=min(len(frame), MAX_ROWS)):
+        st.dataframe(
+            frame.head(MAX_ROWS).style.format(precision=2, thousands=","),
+            use_container_width=True,
+        )
@@ -1,70 +1,72 @@
+from __future__ import annotations
+
 import streamlit as st
-import pandas as pd
 
-from utils.indicators import volume_price_signal
+from utils.instrumentation import stage
+from utils.lazy import lazy_import
+from utils.panel import PricePanel
+from utils.regimes import get_rules, regime_timeline
+from utils.scanner import signal_series
+
+pd = lazy_import("pandas")
+px = lazy_import("plotly.express")
 
-def render(tickers, price_history: pd.DataFrame, intraday_df: pd.DataFrame, macro_prices: pd.DataFrame):
+DATASETS = ("intraday", "macro")
+
+def render(tickers, intraday_panel: PricePanel, macro_prices: pd.DataFrame, signal_params: dict):
     st.subheader("🧭 Smart Money Signals")
 
     st.markdown("### 1️⃣ Volume / Price Confirmation by Ticker")
 
-    rows = []
-
-    if intraday_df is not None and not intraday_df.empty:
-        if isinstance(intraday_df.columns, pd.MultiIndex):
-            for t in tickers:
-                try:
-                    vol = intraday_df["Volume", t].dropna()
-                    price = intraday_df["Close", t].dropna()
-                except KeyError:
-                    continue
-                if vol.empty or price.empty:
-                    continue
-                sig = volume_price_signal(price, vol, window=20)
-                rows.append({"Ticker": t, "Signal": sig})
-        else:
-            t = tickers[0]
-            vol = intraday_df["Volume"].dropna()
-            price = intraday_df["Close"].dropna()
-            if not vol.empty and not price.empty:
-                sig = volume_price_signal(price, vol, window=20)
-                rows.append({"Ticker": t, "Signal": sig})
+    signals = signal_series(intraday_panel, tickers, **signal_params)
 
-    if rows:
-        df = pd.DataFrame(rows)
-        st.dataframe(df, use_container_width=True)
+    if not signals.empty:
+        df = signals.rename_axis("Ticker").reset_index()
+        with stage("table.signals", rows=len(df)):
+            st.dataframe(df, use_container_width=True)
     else:
         st.info("No intraday data to compute signals.")
 
-    st.markdown("### 2️⃣ Macro Regime (Very Rough Heuristic)")
+    st.markdown("### 2️⃣ Macro Regime (Rule-Based Heuristic)")
 
     if macro_prices is None or macro_prices.empty:
         st.info("No macro data available for regime detection.")
         return
 
-    last = macro_prices.iloc[-1]
-    first = macro_prices.iloc[0]
-    perf = (last / first - 1) * 100
+    window_days = st.slider(
+        "Regime window (days):",
+        5,
+        120,
+        get_rules().window_days,
+        key="regime_window",
+        help="Each rule compares every asset with its own price this many calendar days earlier.",
+    )
+    with stage("metric.regime_timeline", rows=len(macro_prices), tickers=len(macro_prices.columns)):
+        timeline = regime_timeline(macro_prices, window_days)
 
-    regime_notes = []
-
-    if "S&P 500" in perf and "Bitcoin" in perf:
-        if perf["S&P 500"] > 0 and perf["Bitcoin"] > 0:
-            regime_notes.append("Risk assets (Stocks + Crypto) positive → Risk‑on bias.")
-        if perf["S&P 500"] < 0 and perf["Bitcoin"] < 0:
-            regime_notes.append("Stocks & Crypto both weak → Risk‑off / defensive regime.")
-
-    if "Gold" in perf and perf["Gold"] > 0:
-        regime_notes.append("Gold positive over the period → demand for safety / inflation hedge.")
+    current = timeline.current()
+    if not current:
+        st.write("No strong macro regime signal from these rules.")
+    else:
+        for rule, since in current:
+            st.write(f"- {rule.note} _(since {since:%Y-%m-%d})_")
 
-    if "Bonds (20Y)" in perf and perf["Bonds (20Y)"] > 0:
-        regime_notes.append("Long‑duration bonds positive → falling yields / duration bid.")
+    if not timeline.empty:
+        scores = timeline.frame("scores")
+        with stage("figure.regime_timeline", rows=len(scores), tickers=len(scores.columns)):
+            fig = px.imshow(
+                scores.T,
+                zmin=0,
+                zmax=1,
+                color_continuous_scale="Greens",
+                aspect="auto",
+                labels=dict(x="Date", y="Regime", color="Conditions met"),
+                height=120 + 40 * len(scores.columns),
+            )
+            st.plotly_chart(fig, use_container_width=True, key="regime_timeline")
 
-    if not regime_notes:
-        st.write("No strong macro regime signal from this simple heuristic.")
-    else:
-        for note in regime_notes:
-            st.write(f"- {note}")
+        share = timeline.frame("active").mean() * 100
+        st.caption("Share of days each regime was active: " + ", ".join(f"{k} {v:.0f}%" for k, v in share.items()))
 
     st.markdown("""
 These are **first‑pass, rough signals**.  
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The app runs from the repository root (``streamlit run app.py``); tests import the same way.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
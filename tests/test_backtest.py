@@ -0,0 +1,80 @@
+"""The bucketed backtest must match replaying the signal bar by bar."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from bench.synthetic import make_download
+from utils import backtest
+from utils.backtest import (
+    SIGNAL_CLASSES,
+    _summarize,
+    evaluate,
+    forward_returns,
+    run_window,
+    signal_codes,
+    signal_inputs,
+    sweep,
+)
+from utils.indicators import volume_price_signal
+from utils.panel import PricePanel
+from utils.scanner import classify
+
+PRICE_THRESHOLDS = (0.0, 0.004, 0.01)
+VOL_THRESHOLDS = (0.0, 0.3, 1.0)
+
+
+@pytest.fixture(scope="module")
+def panel():
+    return PricePanel.from_frame(make_download(8, 5, "15m", crypto_share=0.25, gap_rate=0.01, seed=9))
+
+
+def test_codes_replay_the_scanner_signal(panel):
+    close, volume = panel.fields["Close"], panel.fields["Volume"]
+    window = 10
+    price_change, vol_change = signal_inputs(close, volume, window)
+    codes = signal_codes(price_change, vol_change)
+
+    assert (codes[:window] == -1).all()
+    for j in range(len(panel.tickers)):
+        for t in range(window, len(close), 7):
+            c, v = close[t - window:t + 1, j], volume[t - window:t + 1, j]
+            if np.isnan(c).any() or np.isnan(v).any():
+                assert codes[t, j] == -1
+            else:
+                assert SIGNAL_CLASSES[codes[t, j]] == volume_price_signal(pd.Series(c), pd.Series(v), window)
+
+
+@pytest.mark.parametrize("pt,vt", [(0.004, 0.3), (0.01, 0.0)])
+def test_codes_match_scanner_thresholds(panel, pt, vt):
+    price_change, vol_change = signal_inputs(panel.fields["Close"], panel.fields["Volume"], 10)
+    codes = signal_codes(price_change, vol_change, pt, vt)
+    known = codes >= 0
+    labels = np.array(SIGNAL_CLASSES, dtype=object)[codes[known]]
+    assert (labels == classify(price_change[known], vol_change[known], pt, vt)).all()
+
+
+@pytest.mark.parametrize("window,horizon", [(5, 1), (20, 5)])
+def test_run_window_matches_brute_force(panel, window, horizon):
+    close, volume = panel.fields["Close"], panel.fields["Volume"]
+    rows = run_window(close, volume, window, PRICE_THRESHOLDS, VOL_THRESHOLDS, horizon)
+
+    price_change, vol_change = signal_inputs(close, volume, window)
+    fwd = forward_returns(close, horizon)
+    expected = [
+        _summarize(evaluate(signal_codes(price_change, vol_change, pt, vt), fwd), window, pt, vt, horizon)
+        for pt in PRICE_THRESHOLDS for vt in VOL_THRESHOLDS
+    ]
+    assert len(rows) == len(expected)
+    for got, want in zip(rows, expected):
+        assert got.keys() == want.keys()
+        for key, value in want.items():
+            assert got[key] == pytest.approx(value, rel=1e-9, abs=1e-12, nan_ok=True), key
+
+
+def test_pool_matches_serial_sweep(panel, monkeypatch):
+    args = (panel.fields["Close"], panel.fields["Volume"], (5, 10, 20), PRICE_THRESHOLDS, VOL_THRESHOLDS, 5)
+    serial = sweep(*args, workers=1)
+    monkeypatch.setattr(backtest, "POOL_MIN_CELLS", 0)
+    pooled = sweep(*args, workers=2)
+    pd.testing.assert_frame_equal(pooled, serial)
+    assert serial["t_stat"].dropna().is_monotonic_decreasing
@@ -0,0 +1,69 @@
+"""A chunked, retried bulk download must reassemble into the frame one request would return."""
+import threading
+
+import numpy as np
+import pytest
+
+from bench.synthetic import make_download
+from utils.bulk import BulkDownloader
+from utils.panel import PricePanel
+
+
+class FakeProvider:
+    """Serves columns of one synthetic download; listed symbols fail, others fail once on first request."""
+
+    def __init__(self, data, bad=(), flaky=()):
+        self.data = data
+        self.bad = set(bad)
+        self.flaky = set(flaky)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def download(self, tickers, period=None, start=None, interval="1d"):
+        with self._lock:
+            self.calls += 1
+            if self.bad & set(tickers):
+                raise ValueError(f"bad symbol in {tickers}")
+            if self.flaky & set(tickers):
+                self.flaky -= set(tickers)
+                raise TimeoutError("provider hiccup")
+        columns = [c for c in self.data.columns if c[1] in tickers]
+        return self.data[columns]
+
+
+@pytest.fixture(scope="module")
+def data():
+    return make_download(53, 60, "1d", crypto_share=0.2, gap_rate=0.01, seed=11)
+
+
+def tickers_of(data):
+    return list(dict.fromkeys(data.columns.get_level_values(1)))
+
+
+def downloader():
+    return BulkDownloader(chunk_size=7, max_workers=4, base_backoff=0.001)
+
+
+def assert_same_panel(got, expected):
+    got, expected = PricePanel.from_frame(got), PricePanel.from_frame(expected)
+    assert got.tickers == expected.tickers
+    assert np.array_equal(got.index.asi8, expected.index.as_unit(got.index.unit).asi8)
+    for field in expected.fields:
+        np.testing.assert_array_equal(got.fields[field], expected.fields[field], err_msg=field)
+
+
+def test_chunks_reassemble_to_one_download(data):
+    provider = FakeProvider(data, flaky=tickers_of(data)[::10])
+    bulk = downloader()
+    assert_same_panel(bulk.download(provider, tickers_of(data)), data)
+    assert bulk.retries > 0 and bulk.last_failed == []
+
+
+def test_bad_symbol_costs_only_itself(data):
+    tickers = tickers_of(data)
+    bad = tickers[17]
+    bulk = downloader()
+    got = bulk.download(FakeProvider(data, bad=[bad]), tickers)
+    assert bulk.last_failed == [bad]
+    kept = [c for c in data.columns if c[1] != bad]
+    assert_same_panel(got, data[kept])
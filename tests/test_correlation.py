@@ -0,0 +1,50 @@
+"""The incremental rolling correlation must match pandas' pairwise rolling correlation."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from bench.synthetic import make_closes
+from utils.correlation import correlation_history, hierarchical_clusters, log_returns
+
+WINDOW, MIN_PERIODS = 30, 15
+
+
+@pytest.fixture(scope="module")
+def prices():
+    # Mixed calendars: crypto trades on weekends, equities do not.
+    return make_closes(12, 200, crypto_share=0.25, seed=2)
+
+
+def test_log_returns_skip_each_assets_off_days(prices):
+    got = log_returns(prices)
+    for asset in prices.columns:
+        valid = prices[asset].dropna()
+        expected = np.log(valid).diff()
+        pd.testing.assert_series_equal(got[asset].dropna(), expected.dropna(), check_freq=False)
+        assert got[asset].notna().sum() == len(valid) - 1
+
+
+@pytest.mark.parametrize("lookback", [None, 50])
+def test_history_matches_pandas(prices, lookback):
+    returns = log_returns(prices)
+    dates, stack = correlation_history(returns, WINDOW, lookback=lookback, min_periods=MIN_PERIODS)
+    expected = returns.rolling(WINDOW, min_periods=MIN_PERIODS).corr()
+
+    assert len(dates) == len(stack) == (lookback or len(returns))
+    assert dates.equals(returns.index[-len(dates):])
+    for k in (0, len(dates) // 2, len(dates) - 1):
+        want = expected.loc[dates[k]].to_numpy()
+        np.testing.assert_allclose(stack[k], want, atol=1e-5, equal_nan=True, err_msg=str(dates[k]))
+
+
+def test_clusters_recover_blocks():
+    rng = np.random.default_rng(0)
+    factors = rng.standard_normal((500, 3))
+    returns = np.repeat(factors, [4, 3, 2], axis=1) + 0.3 * rng.standard_normal((500, 9))
+    labels, order = hierarchical_clusters(np.corrcoef(returns.T), 3)
+
+    assert list(labels) == [0, 0, 0, 0, 1, 1, 1, 2, 2]
+    assert sorted(order) == list(range(9))
+    # Each cluster sits in one contiguous block of the order.
+    blocks = [labels[i] for i in order]
+    assert sum(a != b for a, b in zip(blocks, blocks[1:])) == 2
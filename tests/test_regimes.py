@@ -0,0 +1,89 @@
+"""Incrementally updated regime timelines must match a fresh engine and a per-date brute force."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from bench.synthetic import make_closes
+from utils.regimes import RegimeEngine, RegimeRule, RegimeRules
+
+WINDOW_DAYS = 20
+
+
+@pytest.fixture(scope="module")
+def prices():
+    closes = make_closes(6, 400, crypto_share=0.34, seed=4)  # 2 crypto, 4 equity calendars
+    return closes.set_axis(["A", "B", "C", "D", "X-USD", "Y-USD"], axis=1)
+
+
+@pytest.fixture(scope="module")
+def rules():
+    return RegimeRules([
+        RegimeRule("risk_on", "Risk on", {"A": "up", "X-USD": "up"}),
+        RegimeRule("flight", "Flight to safety", {"B": "up", "C": "down", "D": "down"}, min_move_pct=1.0),
+        RegimeRule("crypto_only", "Crypto", {"Y-USD": "down"}),
+        RegimeRule("missing", "Needs an unloaded asset", {"A": "up", "NOPE": "up"}),
+    ], WINDOW_DAYS)
+
+
+def brute_force(rules, prices, date):
+    """Scores on ``date`` from each asset's last price on or before it and ``WINDOW_DAYS`` earlier."""
+    logp = np.log(prices).ffill()
+    start = date - pd.Timedelta(days=WINDOW_DAYS)
+    if start < prices.index[0]:
+        return [np.nan] * len(rules.rules)
+    moves = logp.loc[date] - logp.asof(start)
+    out = []
+    for rule in rules.rules:
+        if any(a not in prices for a in rule.assets):
+            out.append(np.nan)
+            continue
+        signed = moves[rule.assets].to_numpy() * rule.signs
+        out.append(np.nan if np.isnan(signed).any() else np.mean(signed > rule.min_move))
+    return out
+
+
+def assert_same(got, expected):
+    assert got.index.equals(expected.index)
+    np.testing.assert_array_equal(got.scores, expected.scores)
+    np.testing.assert_array_equal(got.active, expected.active)
+
+
+def test_scores_match_brute_force(rules, prices):
+    timeline = RegimeEngine(rules).update(prices)
+    for date in prices.index[[0, 10, 25, 200, -1]]:
+        expected = brute_force(rules, prices, date)
+        np.testing.assert_allclose(timeline.frame().loc[date].to_numpy(), expected, rtol=1e-6, equal_nan=True)
+    assert not timeline.active[:, 3].any()
+
+
+def test_rolling_updates_match_fresh_engine(rules, prices):
+    engine = RegimeEngine(rules)
+    engine.update(prices.iloc[:300])
+
+    # New days appended, the oldest dropped off the front.
+    scored = engine.rows_scored
+    rolled = prices.iloc[5:310]
+    assert_same(engine.update(rolled), RegimeEngine(rules).update(rolled))
+    # The new days, the last old one, and the first days whose window start fell off.
+    assert engine.rows_scored - scored < 40
+
+    # A revised last bar.
+    revised = rolled.copy()
+    revised.iloc[-1] *= 1.03
+    assert_same(engine.update(revised), RegimeEngine(rules).update(revised))
+
+    # A correction deep in the window only rescored where it feeds a window.
+    corrected = revised.copy()
+    corrected.iloc[150, 0] *= 0.9
+    scored = engine.rows_scored
+    assert_same(engine.update(corrected), RegimeEngine(rules).update(corrected))
+    assert engine.rows_scored - scored < 30
+
+
+def test_gap_in_overlap_rescores_everything(rules, prices):
+    engine = RegimeEngine(rules)
+    engine.update(prices.iloc[:300])
+    gapped = prices.drop(prices.index[100])
+    scored = engine.rows_scored
+    assert_same(engine.update(gapped), RegimeEngine(rules).update(gapped))
+    assert engine.rows_scored - scored == len(gapped)
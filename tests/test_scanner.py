@@ -0,0 +1,66 @@
+"""The vectorized scanner and panel parse must agree with the per-ticker code they replaced."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from bench.synthetic import make_download
+from utils.indicators import volume_price_signal
+from utils.panel import PricePanel
+from utils.scanner import scan_volume, signal_series
+
+
+@pytest.fixture(scope="module")
+def data():
+    # Mixed equities and crypto: equity columns are NaN outside the cash session.
+    return make_download(40, 3, "5m", crypto_share=0.2, gap_rate=0.02, seed=7)
+
+
+@pytest.fixture(scope="module")
+def panel(data):
+    return PricePanel.from_frame(data)
+
+
+def test_panel_matches_frame(data, panel):
+    tickers = list(dict.fromkeys(data.columns.get_level_values(1)))
+    assert panel.tickers == tickers
+    for field in ("Close", "Volume"):
+        pd.testing.assert_frame_equal(panel.frame(field), data[field], check_names=False)
+    t = tickers[0]
+    pd.testing.assert_series_equal(panel.series("Close", t), data["Close"][t].dropna(), check_names=False)
+
+
+def test_panel_ticker_order_and_missing(data):
+    panel = PricePanel.from_frame(data, ["C0001-USD", "NOPE", "EQ00000"])
+    assert panel.tickers == ["C0001-USD", "EQ00000"]
+    assert "NOPE" not in panel
+
+
+@pytest.mark.parametrize("window", [5, 20, 400])
+def test_signals_match_per_ticker(data, panel, window):
+    expected = {
+        t: volume_price_signal(data["Close"][t].dropna(), data["Volume"][t].dropna(), window)
+        for t in panel.tickers
+    }
+    got = signal_series(panel, window=window)
+    assert got.to_dict() == expected
+
+
+def test_scan_matches_per_ticker(data, panel):
+    avg_vol = data["Volume"].sum() / 3
+    table = scan_volume(panel, avg_vol).set_index("Ticker")
+    assert len(table) == len(panel.tickers)
+    for t in panel.tickers:
+        close, volume = data["Close"][t].dropna(), data["Volume"][t].dropna()
+        row = table.loc[t]
+        assert row["Last Price"] == close.iloc[-1]
+        assert row["Cumulative Volume"] == int(volume.iloc[-1])
+        assert row["% of Avg Volume"] == pytest.approx(volume.iloc[-1] / avg_vol[t] * 100)
+        assert row["Signal"] == volume_price_signal(close, volume)
+    assert table["% of Avg Volume"].is_monotonic_decreasing
+
+
+def test_scan_subset_keeps_request_order(panel):
+    tickers = panel.tickers[::-3]
+    got = signal_series(panel, tickers)
+    assert list(got.index) == tickers
+    assert np.array_equal(got.to_numpy(), signal_series(panel).reindex(tickers).to_numpy())
@@ -0,0 +1,73 @@
+"""Streaming indicators, fed bar by bar or through the live poller, must match the batch formulas."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from bench.synthetic import make_download
+from utils.indicators import compute_rsi
+from utils.refresh import IntradayPoller
+from utils.streaming import StreamingIndicators
+
+
+@pytest.fixture(scope="module")
+def data():
+    # Crypto trades every bar, equities only in the cash session: plenty of NaN bars.
+    return make_download(12, 2, "5m", crypto_share=0.5, gap_rate=0.02, seed=3)
+
+
+def expected(close: pd.DataFrame, volume: pd.DataFrame) -> dict:
+    return {
+        "rsi": close.apply(compute_rsi).iloc[-1].to_numpy(),
+        "volume_ma": volume.rolling(20).mean().iloc[-1].to_numpy(),
+        "return_1": close.pct_change(1).iloc[-1].to_numpy(),
+        "return_20": close.pct_change(20).iloc[-1].to_numpy(),
+    }
+
+
+def assert_matches(got: dict, close: pd.DataFrame, volume: pd.DataFrame):
+    for name, values in expected(close, volume).items():
+        np.testing.assert_allclose(np.asarray(got[name], dtype=float), values, rtol=1e-9, equal_nan=True,
+                                   err_msg=name)
+
+
+def test_streaming_matches_batch(data):
+    close, volume = data["Close"], data["Volume"]
+    streaming = StreamingIndicators(list(close.columns))
+    for end in range(len(close)):
+        streaming.update(close.iloc[end].to_numpy(), volume.iloc[end].to_numpy())
+        if end in (5, 25, 150, len(close) - 1):
+            assert_matches(streaming.snapshot(), close.iloc[:end + 1], volume.iloc[:end + 1])
+
+
+def feed(poller, data, chunks, revise=lambda chunk: chunk):
+    """Poll-sized chunks, each starting at the previous chunk's last bar like a real poll."""
+    bounds = np.linspace(0, len(data), chunks + 1).astype(int)
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        poller.ingest(revise(data.iloc[max(lo - 1, 0):hi]))
+
+
+def test_poller_folds_new_bars_incrementally(data):
+    poller = IntradayPoller(list(data["Close"].columns), "5m", 60, capacity=len(data))
+    # A still-forming last bar: the first print is off, the next poll corrects it.
+    forming = lambda chunk: pd.concat([chunk.iloc[:-1], chunk.iloc[-1:] * 0.99])
+    feed(poller, data, 40, forming)
+    poller.ingest(data.iloc[-1:])
+
+    assert poller.rescans == 1
+    panel = poller.snapshot()
+    close, volume = panel.frame("Close"), panel.frame("Volume")
+    np.testing.assert_array_equal(close.to_numpy(), data["Close"].to_numpy())  # the corrections landed
+    assert_matches(poller.indicators(), close, volume)
+
+
+def test_poller_rescans_on_revised_history(data):
+    poller = IntradayPoller(list(data["Close"].columns), "5m", 60, capacity=len(data))
+    feed(poller, data.iloc[:-30], 5)
+    revised = data.iloc[-60:-59] * 1.05
+    poller.ingest(revised)
+    assert poller.rescans == 2
+    feed(poller, data.iloc[-30:], 3)
+
+    panel = poller.snapshot()
+    close, volume = panel.frame("Close"), panel.frame("Volume")
+    assert_matches(poller.indicators(), close, volume)
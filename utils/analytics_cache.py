@@ -0,0 +1,111 @@
+"""Process-wide memo for derived metrics (signals, RSI, momentum, return matrices).
+
+Results are keyed by ``(metric, params, fingerprint of the input data)``, so any tab
+asking for the same metric on the same data gets the cached object back instead
+of recomputing it on every rerun. Cached values are shared: treat them as read-only.
+
+The cache is bounded by entry count and by the bytes its values hold
+(``MONEYFLOW_ANALYTICS_CACHE_MB``); least recently used entries go first. A
+single correlation history over a large universe can outweigh hundreds of RSI
+series, so a count alone does not bound memory.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+from utils import settings
+from utils.instrumentation import mark, stage
+from utils.lazy import lazy_import
+from utils.panel import PricePanel
+from utils.shared_store import nbytes
+
+pd = lazy_import("pandas")
+
+
+def fingerprint(data) -> str:
+    """Content hash of a panel, DataFrame, Series or a tuple of them."""
+    if isinstance(data, PricePanel):
+        return data.fingerprint
+
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(data, tuple):
+        for part in data:
+            h.update(fingerprint(part).encode())
+    elif isinstance(data, (pd.DataFrame, pd.Series)):
+        labels = data.columns if isinstance(data, pd.DataFrame) else data.name
+        h.update(repr(labels).encode())
+        h.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    elif data is None:
+        h.update(b"none")
+    else:
+        h.update(repr(data).encode())
+    return h.hexdigest()
+
+
+class AnalyticsCache:
+    def __init__(self, maxsize: int = 256, max_bytes: int = int(settings.ANALYTICS_CACHE_MB * 2**20)):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items = OrderedDict()  # key -> (value, nbytes)
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, metric: str, data, params: dict, compute):
+        key = (metric, tuple(sorted(params.items())), fingerprint(data))
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                mark(cache="hit")
+                return self._items[key][0]
+            self.misses += 1
+        mark(cache="miss")
+
+        value = compute()
+        size = nbytes(value)
+        if size > self.max_bytes:
+            return value  # would evict everything else and still not fit
+
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._items[key] = (value, size)
+            self.bytes += size
+            while len(self._items) > self.maxsize or self.bytes > self.max_bytes:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._items),
+                "maxsize": self.maxsize,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.bytes = 0
+
+
+analytics_cache = AnalyticsCache()
+
+
+def cached_metric(metric: str, data, params: dict, compute):
+    """``compute()`` once per (metric, params, data fingerprint); later calls hit the cache."""
+    with stage(f"metric.{metric}") as record:
+        record.describe(data)
+        return analytics_cache.get_or_compute(metric, data, params, compute)
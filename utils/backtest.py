@@ -0,0 +1,316 @@
+"""Backtest and parameter sweep for the volume/price signal.
+
+``signal_codes`` replays the scanner's signal on every bar of a time × ticker
+panel at once (what ``volume_price_signal`` would have said had it run at that
+bar), and ``evaluate`` groups the following ``horizon``-bar returns by signal
+class with ``np.bincount``, so one parameter set over thousands of tickers and
+years of bars is a handful of array passes.
+
+``sweep`` runs a window × threshold grid on a process pool: each worker gets the
+panel once and handles one window at a time, reusing the rolling inputs across
+thresholds. ``cached_sweep`` keeps results on disk keyed by the panel's
+fingerprint, the grid and the horizon; only the ``BACKTEST_KEEP`` most recently
+used are kept.
+
+Parameter sets are ranked by the t-statistic of the forward-return spread
+between Strong Accumulation and Distribution bars. Forward windows overlap, so
+read it as a ranking score, not a significance level.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.frames import read_parquet, write_parquet
+from utils.indicators import DISTRIBUTION, NO_SIGNAL, STRONG_ACCUMULATION, WEAK_RALLY, WEAK_SELLING
+from utils.lazy import lazy_import
+from utils.settings import CACHE_DIR
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Code i in ``signal_codes`` is SIGNAL_CLASSES[i]; -1 marks bars without a full window.
+SIGNAL_CLASSES = (STRONG_ACCUMULATION, WEAK_RALLY, DISTRIBUTION, WEAK_SELLING, NO_SIGNAL)
+SHORT_NAMES = ("accumulation", "weak_rally", "distribution", "weak_selling", "no_signal")
+
+DEFAULT_WINDOWS = (5, 10, 20, 40, 60)
+DEFAULT_PRICE_THRESHOLDS = (0.0, 0.005, 0.01, 0.02)
+DEFAULT_VOL_THRESHOLDS = (0.0, 0.25, 0.5, 1.0)
+DEFAULT_HORIZON = 5
+# Parameter sets with fewer Accumulation or Distribution bars than this rank last.
+MIN_SIGNALS = 30
+
+BACKTEST_DIR = CACHE_DIR / "backtests"
+# Stored sweeps kept; older ones (by last use) are deleted after each new sweep.
+BACKTEST_KEEP = 50
+BACKTEST_WORKERS = min(4, os.cpu_count() or 1)
+# Below this many bars × tickers × windows a pool costs more than it saves.
+POOL_MIN_CELLS = 2_000_000
+
+
+def signal_inputs(close, volume, window: int):
+    """``(price_change, vol_change)`` at every bar; NaN where the trailing window has gaps."""
+    close = np.asarray(close, dtype=np.float64)
+    volume = np.asarray(volume, dtype=np.float64)
+    n = len(close)
+    price_change = np.full(close.shape, np.nan)
+    vol_change = np.full(close.shape, np.nan)
+    if n <= window:
+        return price_change, vol_change
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price_change[window:] = close[window:] / close[:-window] - 1
+
+        # Mean of the last ``window`` volumes including the current bar, gaps -> NaN.
+        valid = ~np.isnan(volume)
+        cs = np.cumsum(np.where(valid, volume, 0.0), axis=0)
+        cn = np.cumsum(valid, axis=0)
+        total = cs[window:] - cs[:-window]
+        count = cn[window:] - cn[:-window]
+        vol_ma = np.where(count == window, total / window, np.nan)
+        vol_change[window:] = np.where(vol_ma != 0, volume[window:] / vol_ma - 1, 0.0)
+        vol_change[window:][np.isnan(vol_ma) | np.isnan(volume[window:])] = np.nan
+    return price_change, vol_change
+
+
+def signal_codes(price_change, vol_change, price_threshold: float = 0.0, vol_threshold: float = 0.0):
+    """Signal class index per bar (see ``SIGNAL_CLASSES``), matching ``utils.scanner.classify``."""
+    codes = _direction_codes(price_change, price_threshold)
+    codes += _light_volume(codes, vol_change, vol_threshold)
+    codes[np.isnan(price_change) | np.isnan(vol_change)] = -1
+    return codes
+
+
+def _direction_codes(price_change, price_threshold: float):
+    """0 (up), 2 (down) or 4 (no signal): the class before volume is looked at."""
+    codes = np.full(price_change.shape, 4, dtype=np.int8)
+    codes[price_change > price_threshold] = 0
+    codes[price_change < -price_threshold] = 2
+    return codes
+
+
+def _light_volume(direction, vol_change, vol_threshold: float):
+    """+1 where a directional bar had no volume confirmation (0 -> 1, 2 -> 3)."""
+    return ((direction < 4) & ~(vol_change > vol_threshold)).astype(np.int8)
+
+
+def forward_returns(close, horizon: int):
+    """Return from each bar's close to the close ``horizon`` bars later (NaN at the end)."""
+    close = np.asarray(close, dtype=np.float64)
+    out = np.full(close.shape, np.nan)
+    if len(close) > horizon:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[:-horizon] = close[horizon:] / close[:-horizon] - 1
+    return out
+
+
+def _class_stats(codes, f, f2, positive) -> dict:
+    k = len(SIGNAL_CLASSES)
+    n = np.bincount(codes, minlength=k).astype(np.float64)
+    s = np.bincount(codes, weights=f, minlength=k)
+    ss = np.bincount(codes, weights=f2, minlength=k)
+    hits = np.bincount(codes, weights=positive, minlength=k)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = s / n
+        var = (ss - n * mean ** 2) / (n - 1)
+        hit_rate = hits / n
+    return {"n": n, "mean": mean, "var": var, "hit_rate": hit_rate, "base": f.mean() if len(f) else np.nan}
+
+
+def evaluate(codes, fwd) -> dict:
+    """Per signal class: bar count, mean forward return, its variance and hit rate."""
+    valid = (codes >= 0) & ~np.isnan(fwd)
+    f = fwd[valid]
+    return _class_stats(codes[valid].astype(np.intp), f, f * f, (f > 0).astype(np.float64))
+
+
+def _summarize(stats: dict, window: int, price_threshold: float, vol_threshold: float, horizon: int) -> dict:
+    acc, dist = 0, 2
+    n, mean, var = stats["n"], stats["mean"], stats["var"]
+    spread = mean[acc] - mean[dist]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_stat = spread / np.sqrt(var[acc] / n[acc] + var[dist] / n[dist])
+    row = {
+        "window": window,
+        "price_threshold": price_threshold,
+        "vol_threshold": vol_threshold,
+        "horizon": horizon,
+        "t_stat": t_stat if min(n[acc], n[dist]) >= MIN_SIGNALS else np.nan,
+        "spread_pct": spread * 100,
+        "base_fwd_pct": stats["base"] * 100,
+        "accumulation_hit_rate": stats["hit_rate"][acc] * 100,
+        "distribution_hit_rate": stats["hit_rate"][dist] * 100,
+    }
+    for k, name in enumerate(SHORT_NAMES):
+        row[f"{name}_n"] = int(n[k])
+        row[f"{name}_fwd_pct"] = mean[k] * 100
+    return row
+
+
+def _split_by_volume(tables):
+    """``(heavy, light)`` sums for every (price i, volume j) threshold pair.
+
+    ``tables[:, a, b]`` holds bars clearing ``a`` price and ``b`` volume thresholds;
+    the move counts for threshold i when ``a > i`` and is heavy for j when ``b > j``.
+    """
+    cleared = np.flip(np.cumsum(np.flip(tables, axis=1), axis=1), axis=1)[:, 1:]  # a > i
+    light = np.cumsum(cleared, axis=2)[:, :, :-1]                                  # b <= j
+    heavy = cleared.sum(axis=2, keepdims=True) - light
+    return heavy, light
+
+
+def run_window(close, volume, window: int, price_thresholds, vol_thresholds, horizon: int) -> list:
+    """Summary rows for one window and every threshold pair.
+
+    Each bar is bucketed once by direction and by how many price and volume
+    thresholds it clears, so the whole threshold grid comes from suffix sums of
+    one small table: the cost per window does not grow with the grid.
+    """
+    price_thresholds = sorted(float(t) for t in price_thresholds)
+    vol_thresholds = sorted(float(t) for t in vol_thresholds)
+    if price_thresholds and price_thresholds[0] < 0:
+        raise ValueError("price thresholds must be non-negative")
+    n_price, n_vol = len(price_thresholds), len(vol_thresholds)
+
+    price_change, vol_change = signal_inputs(close, volume, window)
+    fwd = forward_returns(close, horizon)
+
+    # Direction: 0 up, 1 down, 2 flat, 3 unusable (no full window or no forward return).
+    direction = np.full(price_change.shape, 2, dtype=np.int64)
+    direction[price_change > 0] = 0
+    direction[price_change < 0] = 1
+    direction[np.isnan(price_change) | np.isnan(vol_change) | np.isnan(fwd)] = 3
+
+    pts = np.array(price_thresholds)
+    levels = np.where(
+        direction == 1,
+        np.searchsorted(pts, -price_change, side="left"),  # thresholds with change < -pt
+        np.searchsorted(pts, price_change, side="left"),   # thresholds with change > pt
+    )
+    heavy = np.searchsorted(np.array(vol_thresholds), vol_change, side="left")
+    key = ((direction * (n_price + 1) + levels) * (n_vol + 1) + heavy).ravel()
+
+    f = np.nan_to_num(fwd).ravel()
+    shape = (4, n_price + 1, n_vol + 1)
+    size = 4 * (n_price + 1) * (n_vol + 1)
+    tables = np.stack([
+        np.bincount(key, minlength=size).astype(np.float64).reshape(shape),
+        np.bincount(key, weights=f, minlength=size).reshape(shape),
+        np.bincount(key, weights=f * f, minlength=size).reshape(shape),
+        np.bincount(key, weights=f > 0, minlength=size).reshape(shape),
+    ])  # statistic × direction × price level × volume level
+
+    accumulation, weak_rally = _split_by_volume(tables[:, 0])
+    distribution, weak_selling = _split_by_volume(tables[:, 1])
+    total = tables[:, :3].sum(axis=(1, 2, 3))[:, None, None]
+    no_signal = total - accumulation - weak_rally - distribution - weak_selling
+    by_class = np.stack([accumulation, weak_rally, distribution, weak_selling, no_signal], axis=1)
+
+    base = total[1, 0, 0] / total[0, 0, 0] if total[0, 0, 0] else np.nan
+    rows = []
+    for i, pt in enumerate(price_thresholds):
+        for j, vt in enumerate(vol_thresholds):
+            n, s, ss, hits = by_class[:, :, i, j]
+            n = np.rint(n)  # exact integer counts; the no-signal class is a difference
+            with np.errstate(divide="ignore", invalid="ignore"):
+                mean = np.where(n > 0, s / n, np.nan)
+                var = np.where(n > 1, (ss - n * mean ** 2) / (n - 1), np.nan)
+                stats = {"n": n, "mean": mean, "var": var, "hit_rate": np.where(n > 0, hits / n, np.nan), "base": base}
+            rows.append(_summarize(stats, window, pt, vt, horizon))
+    return rows
+
+
+# Per-worker copy of the panel, set once by the pool initializer.
+_worker_panel = None
+
+
+def _init_worker(close, volume):
+    global _worker_panel
+    _worker_panel = (close, volume)
+
+
+def _worker_run(window, price_thresholds, vol_thresholds, horizon):
+    close, volume = _worker_panel
+    return run_window(close, volume, window, price_thresholds, vol_thresholds, horizon)
+
+
+def rank(results: pd.DataFrame) -> pd.DataFrame:
+    return results.sort_values(["t_stat", "spread_pct"], ascending=False, na_position="last").reset_index(drop=True)
+
+
+def sweep(close, volume, windows=DEFAULT_WINDOWS, price_thresholds=DEFAULT_PRICE_THRESHOLDS,
+          vol_thresholds=DEFAULT_VOL_THRESHOLDS, horizon: int = DEFAULT_HORIZON,
+          workers: int = BACKTEST_WORKERS) -> pd.DataFrame:
+    """Ranked results (best first) for every window × price threshold × volume threshold."""
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    volume = np.ascontiguousarray(volume, dtype=np.float64)
+    windows = list(windows)
+
+    if workers <= 1 or len(windows) == 1 or close.size * len(windows) < POOL_MIN_CELLS:
+        parts = [run_window(close, volume, w, price_thresholds, vol_thresholds, horizon) for w in windows]
+    else:
+        # "spawn": the app process runs threads, which fork does not copy safely.
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(windows)),
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(close, volume),
+        ) as pool:
+            futures = [pool.submit(_worker_run, w, price_thresholds, vol_thresholds, horizon) for w in windows]
+            parts = [f.result() for f in futures]
+    return rank(pd.DataFrame([row for part in parts for row in part]))
+
+
+def _sweep_key(fingerprint: str, windows, price_thresholds, vol_thresholds, horizon: int) -> str:
+    spec = json.dumps([fingerprint, list(windows), list(price_thresholds), list(vol_thresholds), horizon])
+    return hashlib.blake2b(spec.encode(), digest_size=12).hexdigest()
+
+
+def cached_sweep(panel, windows=DEFAULT_WINDOWS, price_thresholds=DEFAULT_PRICE_THRESHOLDS,
+                 vol_thresholds=DEFAULT_VOL_THRESHOLDS, horizon: int = DEFAULT_HORIZON,
+                 workers: int = BACKTEST_WORKERS, compute: bool = True):
+    """``sweep`` over a ``PricePanel``'s Close/Volume, read from or written to ``BACKTEST_DIR``.
+
+    Returns ``(results, meta)``; with ``compute=False`` only a stored result is
+    returned, ``(None, {})`` when there is none.
+    """
+    key = _sweep_key(panel.fingerprint, windows, price_thresholds, vol_thresholds, horizon)
+    path = BACKTEST_DIR / f"{key}.parquet"
+    if path.exists():
+        try:
+            path.touch()  # mark as recently used for pruning
+            return read_parquet(path)
+        except OSError:
+            pass  # pruned by another session meanwhile
+    if not compute:
+        return None, {}
+
+    t0 = time.perf_counter()
+    results = sweep(panel.fields["Close"], panel.fields["Volume"], windows, price_thresholds,
+                    vol_thresholds, horizon, workers)
+    meta = {
+        "moneyflow.bars": len(panel.index),
+        "moneyflow.tickers": len(panel.tickers),
+        "moneyflow.seconds": round(time.perf_counter() - t0, 3),
+        "moneyflow.created_at": time.time(),
+    }
+    write_parquet(path, results, meta)
+    prune()
+    return results, {k: str(v) for k, v in meta.items()}
+
+
+def prune(keep: int = BACKTEST_KEEP):
+    """Delete all but the ``keep`` most recently used stored sweeps."""
+    paths = []
+    for path in BACKTEST_DIR.glob("*.parquet"):
+        try:
+            paths.append((path.stat().st_mtime, path))
+        except OSError:
+            continue
+    for _, path in sorted(paths, reverse=True)[keep:]:
+        path.unlink(missing_ok=True)
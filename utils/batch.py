@@ -0,0 +1,142 @@
+"""The dashboard's analytics as batch jobs, with no Streamlit involved.
+
+Each job takes a ticker list and an options dict (``DEFAULT_OPTIONS``), loads
+its inputs through the same loaders the dashboard uses (so they share the OHLCV
+store and the chunked downloader) and returns one frame:
+
+- ``scanner``: the unusual-volume table on the latest intraday session, with the
+  signal parameters in the options (the scanner's defaults unless set)
+- ``returns``: the heatmap's multi-horizon % returns per ticker
+- ``momentum``: % return over ``momentum_window`` bars, strongest first
+- ``rsi``: RSI / MFI / CMF / OBV / VWAP screen per ticker
+- ``regimes``: the macro regime timeline (share of each rule's conditions met per
+  date; 1.0 = active). It runs on the macro universe and ignores the tickers.
+
+``run_jobs`` runs a selection and writes each result with ``utils.precomputed``.
+Daily jobs share one download: ``load_price_data`` is memoized per process.
+"""
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+from utils import settings
+from utils.data_loader import load_intraday_volume_data, load_macro_universe, load_price_data, parse_tickers
+from utils.indicators import money_flow_screen
+from utils.instrumentation import stage
+from utils.lazy import lazy_import
+from utils.precomputed import write_failure, write_result
+from utils.regimes import get_rules, regime_timeline
+from utils.returns import momentum_ranking, return_matrix
+from utils.scanner import DEFAULT_SIGNAL_PARAMS, scan_volume
+from utils.universe import get_universe
+
+pd = lazy_import("pandas")
+
+DEFAULT_OPTIONS = {
+    "period": "1y",          # daily history for returns, momentum and rsi
+    "interval": "5m",        # intraday bars for the scanner
+    "history_days": 20,      # days behind the scanner's average volume
+    "momentum_window": 20,
+    "calendar": False,       # calendar-aware return horizons
+    "rsi_window": 14,
+    "regime_window": None,   # days; None = the rules file's window
+    **DEFAULT_SIGNAL_PARAMS,  # scanner signal: window, price_threshold, vol_threshold
+}
+
+
+def read_tickers(path: Path) -> list:
+    """Tickers from a file: comma- or whitespace-separated, ``#`` starts a comment."""
+    words = []
+    for line in Path(path).read_text().splitlines():
+        words += line.split("#", 1)[0].replace(",", " ").split()
+    return list(dict.fromkeys(parse_tickers(",".join(words))))
+
+
+def _closes(tickers, options: dict) -> pd.DataFrame:
+    panel = load_price_data(tickers, options["period"], "1d")
+    if panel.empty or "Close" not in panel.fields:
+        return pd.DataFrame()
+    return panel.frame("Close")
+
+
+def scanner_job(tickers, options: dict):
+    avg_vol, panel = load_intraday_volume_data(tickers, options["history_days"], options["interval"])
+    params = {k: type(v)(options[k]) for k, v in DEFAULT_SIGNAL_PARAMS.items()}
+    table = scan_volume(panel, avg_vol, tickers, **params)
+    if not table.empty:
+        table = table.set_index("Ticker")
+    return table, {"interval": options["interval"], "history_days": options["history_days"], **params}
+
+
+def returns_job(tickers, options: dict):
+    matrix = return_matrix(_closes(tickers, options), options["calendar"])
+    return matrix.rename_axis("Ticker"), {"period": options["period"], "calendar": options["calendar"]}
+
+
+def momentum_job(tickers, options: dict):
+    closes = _closes(tickers, options)
+    if closes.empty:
+        ranking = pd.Series(dtype=float, name="Momentum %")
+    else:
+        ranking = momentum_ranking(closes, options["momentum_window"])
+    return ranking.rename_axis("Ticker").to_frame("Momentum %"), {
+        "period": options["period"],
+        "window": options["momentum_window"],
+    }
+
+
+def rsi_job(tickers, options: dict):
+    panel = load_price_data(tickers, options["period"], "1d")
+    screen = money_flow_screen(panel, tickers, rsi_window=options["rsi_window"])
+    return screen, {"period": options["period"], "rsi_window": options["rsi_window"]}
+
+
+def regimes_job(tickers, options: dict):
+    rules = get_rules()
+    window_days = options["regime_window"] or rules.window_days
+    # Only the groups holding the rules' assets; a batch run waits for all of them.
+    groups = get_universe().groups_of(rules.assets)
+    _, prices = load_macro_universe(groups=groups, budget=None) if groups else (None, pd.DataFrame())
+    params = {"window_days": window_days, "assets": len(prices.columns)}
+    if prices.empty:
+        return pd.DataFrame(), params
+    return regime_timeline(prices, window_days).frame("scores").rename_axis("Date"), params
+
+
+JOBS = {
+    "scanner": scanner_job,
+    "returns": returns_job,
+    "momentum": momentum_job,
+    "rsi": rsi_job,
+    "regimes": regimes_job,
+}
+
+
+def run_jobs(tickers, jobs=tuple(JOBS), options: dict | None = None, fmt: str = "parquet",
+             root: Path = settings.PRECOMPUTED_DIR) -> dict:
+    """Run ``jobs`` over ``tickers`` and write their results to ``root``.
+
+    Returns ``job -> manifest entry``, or ``job -> exception`` for a job that
+    failed; one failure does not stop the others. A failed job's manifest entry
+    is marked with the error, so readers don't take its last result as current.
+    """
+    options = {**DEFAULT_OPTIONS, **(options or {})}
+    tickers = list(tickers)
+    out = {}
+    for job in jobs:
+        t0 = time.perf_counter()
+        try:
+            with stage(f"batch.{job}", tickers=len(tickers)) as record:
+                frame, params = JOBS[job](tickers, options)
+                record.describe(frame)
+            n_tickers = None if job == "regimes" else len(tickers)
+            out[job] = write_result(job, frame, params, time.perf_counter() - t0, n_tickers, fmt, root)
+        except Exception as e:
+            print(f"⚠ Batch job {job} failed: {e}")
+            out[job] = e
+            try:
+                write_failure(job, e, root)
+            except OSError as write_error:
+                print(f"⚠ Could not record the {job} failure in the manifest: {write_error}")
+    return out
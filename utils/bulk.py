@@ -0,0 +1,206 @@
+"""Chunked bulk downloads for ticker lists too large for one request.
+
+Tickers are split into chunks of ``CHUNK_SIZE`` and fetched on a bounded worker
+pool. The number of chunks allowed in flight adapts like TCP congestion control:
+it grows by one after each fast success, drops by one after a slow chunk and is
+halved after an error; back-to-back errors also space requests out by a growing
+delay.
+Failed chunks are retried with exponential backoff; a chunk that keeps failing
+while the rest of the download goes through is split in half until the symbol
+spoiling it is isolated, so one bad ticker costs only itself. Results are
+stitched back into per-ticker frames.
+"""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from utils import settings
+from utils.frames import assemble, split_by_ticker
+from utils.instrumentation import stage, with_context
+from utils.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+CHUNK_SIZE = settings.BULK_CHUNK_SIZE
+MAX_WORKERS = settings.BULK_MAX_WORKERS
+MAX_RETRIES = 2
+# A chunk taking longer than this counts as the provider slowing down.
+SLOW_CHUNK_SECONDS = 20.0
+BASE_BACKOFF = 0.5
+MAX_DELAY = 2.0
+# No retries or splits are started after this many seconds into one download.
+TIME_BUDGET = 60.0
+
+
+def chunked(items, size: int) -> list:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class BulkDownloader:
+    def __init__(
+        self,
+        chunk_size: int = CHUNK_SIZE,
+        max_workers: int = MAX_WORKERS,
+        max_retries: int = MAX_RETRIES,
+        slow_seconds: float = SLOW_CHUNK_SECONDS,
+        base_backoff: float = BASE_BACKOFF,
+        time_budget: float = TIME_BUDGET,
+    ):
+        self.chunk_size = max(chunk_size, 1)
+        self.max_workers = max(max_workers, 1)
+        self.max_retries = max_retries
+        self.slow_seconds = slow_seconds
+        self.base_backoff = base_backoff
+        self.time_budget = time_budget
+
+        # Adaptive state, shared by every download so what one learns the next keeps.
+        self.limit = self.max_workers
+        self.delay = 0.0
+        self.error_streak = 0
+        self.active = 0
+        self._gate = threading.Condition()
+
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.slow = 0
+        self.splits = 0
+        self.last_failed = []
+
+    # -----------------------------
+    # Adaptive concurrency
+    # -----------------------------
+    def _acquire(self):
+        with self._gate:
+            while self.active >= self.limit:
+                self._gate.wait()
+            self.active += 1
+            return self.delay
+
+    def _release(self, outcome: str):
+        with self._gate:
+            self.active -= 1
+            if outcome == "probe_error":
+                # Expected while bisecting a chunk that holds a bad symbol.
+                self.errors += 1
+            elif outcome == "error":
+                self.errors += 1
+                self.error_streak += 1
+                self.limit = max(1, self.limit // 2)
+                # A lone error may be one bad chunk; back-to-back errors mean the provider is pushing back.
+                if self.error_streak > 1:
+                    self.delay = min(MAX_DELAY, max(self.delay * 2, self.base_backoff))
+            elif outcome == "slow":
+                self.error_streak = 0
+                self.slow += 1
+                self.limit = max(1, self.limit - 1)
+            else:
+                self.error_streak = 0
+                self.limit = min(self.max_workers, self.limit + 1)
+                self.delay = self.delay / 2 if self.delay > self.base_backoff / 4 else 0.0
+            self._gate.notify_all()
+
+    def _fetch(self, provider, chunk, kwargs, attempt: int, probe: bool = False) -> dict:
+        if attempt and not probe:
+            time.sleep(self.base_backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+        delay = self._acquire()
+        if delay:
+            time.sleep(delay)
+
+        outcome = "probe_error" if probe else "error"
+        t0 = time.perf_counter()
+        try:
+            with stage("fetch.download", tickers=len(chunk)) as record:
+                data = provider.download(chunk, **kwargs)
+                record.rows = len(data) if data is not None else 0
+            outcome = "slow" if time.perf_counter() - t0 > self.slow_seconds else "ok"
+        finally:
+            self._release(outcome)
+        with stage("parse.split", tickers=len(chunk)) as record:
+            frames = split_by_ticker(data, chunk, kwargs["interval"])
+            record.describe(frames)
+        return frames
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def download_frames(self, provider, tickers, period=None, start=None, interval="1d") -> dict:
+        """Per-ticker OHLCV frames for ``tickers``; failed symbols are left out."""
+        tickers = list(dict.fromkeys(tickers))
+        kwargs = {"period": period, "start": start, "interval": interval}
+        deadline = time.monotonic() + self.time_budget
+        frames = {}
+        exhausted = []
+        failed = []
+        succeeded = False
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            def submit(chunk, attempt, probe=False):
+                self.requests += 1
+                future = pool.submit(with_context(self._fetch), provider, chunk, kwargs, attempt, probe)
+                pending[future] = (chunk, attempt)
+
+            pending = {}
+            for chunk in chunked(tickers, self.chunk_size):
+                submit(chunk, 0)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk, attempt = pending.pop(future)
+                    try:
+                        frames.update(future.result())
+                        succeeded = True
+                        continue
+                    except Exception as e:
+                        error = e
+
+                    if attempt < self.max_retries and time.monotonic() < deadline:
+                        self.retries += 1
+                        submit(chunk, attempt + 1)
+                    else:
+                        exhausted.append((chunk, error))
+
+                if pending or not exhausted:
+                    continue
+                # Chunks that keep failing while others go through probably hold a
+                # bad symbol: bisect them to isolate it. If nothing went through,
+                # the provider itself is down and splitting would only add requests.
+                for chunk, error in exhausted:
+                    if succeeded and len(chunk) > 1 and time.monotonic() < deadline:
+                        self.splits += 1
+                        mid = len(chunk) // 2
+                        for half in (chunk[:mid], chunk[mid:]):
+                            submit(half, self.max_retries, probe=True)
+                    else:
+                        failed.extend(chunk)
+                        print(f"⚠ Error fetching {chunk} ({period or start}, {interval}): {error}")
+                exhausted = []
+
+        self.last_failed = failed
+        return frames
+
+    def download(self, provider, tickers, period=None, start=None, interval="1d") -> pd.DataFrame:
+        """Like ``provider.download``, in chunks; returns the usual (Price, Ticker) frame."""
+        tickers = list(tickers)
+        frames = self.download_frames(provider, tickers, period=period, start=start, interval=interval)
+        return assemble(frames, tickers, interval)
+
+    def stats(self) -> dict:
+        with self._gate:
+            return {
+                "limit": self.limit,
+                "delay": round(self.delay, 3),
+                "requests": self.requests,
+                "retries": self.retries,
+                "errors": self.errors,
+                "slow": self.slow,
+                "splits": self.splits,
+                "last_failed": list(self.last_failed),
+            }
+
+
+bulk_downloader = BulkDownloader()
@@ -0,0 +1,138 @@
+"""Keep chart payloads bounded whatever the timeframe or number of tickers.
+
+Long series are downsampled to the chart's pixel budget before they are sent to
+the browser: LTTB (Largest-Triangle-Three-Buckets) keeps the visual shape of a
+line, min/max bucketing keeps every spike. Traces that still carry many points
+are drawn with WebGL (``Scattergl``).
+"""
+from __future__ import annotations
+
+from utils.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+go = lazy_import("plotly.graph_objects")
+
+# Points per figure: about two per horizontal pixel of a wide chart.
+FIGURE_POINT_BUDGET = 4000
+# Above this many points in one trace, SVG rendering gets sluggish.
+WEBGL_THRESHOLD = 1000
+
+
+def trace_budget(n_traces: int, figure_budget: int = FIGURE_POINT_BUDGET) -> int:
+    """Points each of ``n_traces`` may keep so the figure stays within budget.
+
+    Every trace keeps at least its first and last point, so the bound holds for
+    up to ``figure_budget // 2`` traces.
+    """
+    return max(2, figure_budget // max(n_traces, 1))
+
+
+def _as_float(x):
+    x = pd.Index(x)
+    if isinstance(x, pd.DatetimeIndex):
+        return x.asi8.astype(np.float64)
+    return x.to_numpy(dtype=np.float64)
+
+
+def lttb_indices(x, y, n_out: int):
+    """Indices of the ``n_out`` points LTTB keeps (first and last always kept)."""
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1][-n_out:], dtype=np.intp)
+
+    x = _as_float(x)
+    y = np.asarray(y, dtype=np.float64)
+
+    # n_out - 2 buckets between the fixed first and last points.
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    mean_x = np.append(sums_x / counts, x[-1])
+    mean_y = np.append(sums_y / counts, y[-1])
+
+    keep = np.empty(n_out, dtype=np.intp)
+    keep[0] = 0
+    keep[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Point of this bucket forming the largest triangle with the last kept
+        # point and the average of the next bucket.
+        area = np.abs(
+            (x[a] - mean_x[i + 1]) * (y[lo:hi] - y[a])
+            - (x[a] - x[lo:hi]) * (mean_y[i + 1] - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def minmax_indices(y, n_out: int):
+    """Indices of each bucket's min and max (about ``n_out`` points in total)."""
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    buckets = n_out // 2
+    edges = np.linspace(0, n, buckets + 1).astype(np.intp)
+    picks = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi > lo:
+            picks.append(lo + np.argmin(y[lo:hi]))
+            picks.append(lo + np.argmax(y[lo:hi]))
+    return np.unique(picks)
+
+
+def downsample(x, y, max_points: int, method: str = "lttb"):
+    """``(x, y, n_dropped)`` with at most ``max_points`` points kept."""
+    if len(y) <= max_points:
+        return x, y, 0
+    if method == "minmax":
+        idx = minmax_indices(y, max_points)
+    else:
+        idx = lttb_indices(x, y, max_points)
+    dropped = len(y) - len(idx)
+    x = x[idx] if isinstance(x, (pd.Index, np.ndarray)) else np.asarray(x)[idx]
+    y = y.iloc[idx] if isinstance(y, pd.Series) else np.asarray(y)[idx]
+    return x, y, dropped
+
+
+def line_trace(x, y, max_points: int, method: str = "lttb", **kwargs):
+    """Downsampled line trace, switched to ``Scattergl`` when it is still dense.
+
+    Returns ``(trace, n_dropped)``.
+    """
+    x, y, dropped = downsample(x, y, max_points, method)
+    trace_cls = go.Scattergl if len(y) > WEBGL_THRESHOLD else go.Scatter
+    return trace_cls(x=x, y=y, **kwargs), dropped
+
+
+def downsample_frame(df, max_points: int = FIGURE_POINT_BUDGET):
+    """Rows of ``df`` kept by per-column LTTB, for ``st.line_chart`` style charts.
+
+    Returns ``(frame, n_dropped_rows)``.
+    """
+    if df is None or len(df) <= max_points // max(len(df.columns), 1):
+        return df, 0
+
+    per_column = trace_budget(len(df.columns), max_points)
+    keep = set()
+    for col in df.columns:
+        s = df[col].dropna()
+        if s.empty:
+            continue
+        idx = lttb_indices(s.index, s.to_numpy(), per_column)
+        keep.update(df.index.get_indexer(s.index[idx]))
+    rows = np.sort(np.fromiter(keep, dtype=np.intp))
+    return df.iloc[rows], len(df) - len(rows)
+
+
+def downsample_note(total: int, dropped: int) -> str | None:
+    if not dropped:
+        return None
+    return f"Showing {total - dropped:,} of {total:,} points (downsampled to fit the chart)."
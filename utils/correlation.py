@@ -0,0 +1,144 @@
+"""Rolling cross-asset correlation, updated one bar at a time.
+
+``RollingCorrelation`` keeps pairwise-complete window sums (counts, Σx, Σx², Σxy
+for every pair) and moves them by one bar with a few rank-1 updates, so each
+new bar costs O(N²) instead of the O(N²·W) of recomputing the window. Pairs are
+only compared over bars where both have a return, which keeps crypto (7-day)
+and equity (5-day) calendars from polluting each other.
+
+``correlation_history`` walks a return matrix once and keeps every step's
+matrix, so a date slider can scrub through a year without recomputing;
+``hierarchical_clusters`` orders assets into rotation clusters (average-linkage
+agglomerative clustering on correlation distance, NumPy only).
+"""
+from __future__ import annotations
+
+from utils.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+def log_returns(prices: pd.DataFrame) -> pd.DataFrame:
+    """Per-asset log returns from each asset's previous valid price (NaN on its off days)."""
+    logp = np.log(prices.where(prices > 0))
+    return logp.ffill().diff().where(logp.notna())
+
+
+class RollingCorrelation:
+    def __init__(self, n: int, window: int, min_periods: int | None = None):
+        self.window = window
+        self.min_periods = max(min_periods if min_periods is not None else window // 2, 3)
+        self.buf = np.full((window, n), np.nan)
+        self.pos = 0
+        self.count = np.zeros((n, n))  # bars where both i and j are valid
+        self.sx = np.zeros((n, n))     # Σ x_i over bars where j is valid
+        self.sxx = np.zeros((n, n))    # Σ x_i² over bars where j is valid
+        self.sxy = np.zeros((n, n))    # Σ x_i x_j
+
+    def _apply(self, x, sign: float):
+        valid = ~np.isnan(x)
+        if not valid.any():
+            return
+        m = valid.astype(np.float64)
+        x0 = np.where(valid, x, 0.0)
+        self.count += sign * np.outer(m, m)
+        self.sx += sign * np.outer(x0, m)
+        self.sxx += sign * np.outer(x0 * x0, m)
+        self.sxy += sign * np.outer(x0, x0)
+
+    def _resum(self):
+        m = (~np.isnan(self.buf)).astype(np.float64)
+        x0 = np.nan_to_num(self.buf)
+        self.count = m.T @ m
+        self.sx = x0.T @ m
+        self.sxx = (x0 * x0).T @ m
+        self.sxy = x0.T @ x0
+
+    def update(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        self._apply(self.buf[self.pos], -1.0)
+        self._apply(x, 1.0)
+        self.buf[self.pos] = x
+        self.pos = (self.pos + 1) % self.window
+        if self.pos == 0:
+            # Resum once per lap so add/subtract rounding never accumulates.
+            self._resum()
+
+    def correlation(self):
+        n = self.count
+        sy = self.sx.T
+        syy = self.sxx.T
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = n * self.sxy - self.sx * sy
+            var_x = n * self.sxx - self.sx ** 2
+            var_y = n * syy - sy ** 2
+            corr = cov / np.sqrt(var_x * var_y)
+        corr[(n < self.min_periods) | (var_x <= 0) | (var_y <= 0)] = np.nan
+        np.clip(corr, -1.0, 1.0, out=corr)
+        np.fill_diagonal(corr, np.where(np.diag(n) >= self.min_periods, 1.0, np.nan))
+        return corr
+
+
+def correlation_history(returns: pd.DataFrame, window: int, lookback: int | None = None,
+                        min_periods: int | None = None):
+    """``(dates, stack)``: the rolling correlation matrix after each of the last ``lookback`` bars.
+
+    ``stack`` is float32, dates × assets × assets.
+    """
+    values = returns.to_numpy(dtype=np.float64)
+    n_rows, n = values.shape
+    lookback = n_rows if lookback is None else min(lookback, n_rows)
+    first_kept = n_rows - lookback
+
+    engine = RollingCorrelation(n, window, min_periods)
+    stack = np.empty((lookback, n, n), dtype=np.float32)
+    for i in range(max(first_kept - window, 0), n_rows):
+        engine.update(values[i])
+        if i >= first_kept:
+            stack[i - first_kept] = engine.correlation()
+    return returns.index[first_kept:], stack
+
+
+def hierarchical_clusters(corr, n_clusters: int):
+    """``(labels, order)`` from average-linkage clustering on ``sqrt((1 - corr) / 2)``.
+
+    ``labels[i]`` is asset i's cluster (0..n_clusters-1, largest first); ``order``
+    lists assets so that clusters sit in contiguous blocks, dendrogram-style.
+    """
+    corr = np.nan_to_num(np.asarray(corr, dtype=np.float64))
+    n = len(corr)
+    if n == 0:
+        return np.empty(0, dtype=int), []
+
+    dist = np.sqrt(np.clip((1.0 - corr) / 2.0, 0.0, 1.0))
+    np.fill_diagonal(dist, np.inf)
+    members = {i: [i] for i in range(n)}
+    sizes = np.ones(n)
+    labels = np.arange(n)
+
+    while len(members) > 1:
+        if len(members) == n_clusters:
+            labels = np.empty(n, dtype=int)
+            for k, (_, group) in enumerate(sorted(members.items(), key=lambda kv: -len(kv[1]))):
+                labels[group] = k
+        flat = int(np.argmin(dist))
+        i, j = divmod(flat, n)
+        if i > j:
+            i, j = j, i
+        # Lance-Williams update for average linkage: size-weighted mean distance.
+        merged = (sizes[i] * dist[i] + sizes[j] * dist[j]) / (sizes[i] + sizes[j])
+        dist[i] = merged
+        dist[:, i] = merged
+        dist[i, i] = np.inf
+        dist[j] = np.inf
+        dist[:, j] = np.inf
+        sizes[i] += sizes[j]
+        members[i] = members[i] + members.pop(j)
+
+    if n_clusters >= n:
+        labels = np.arange(n)
+    elif n_clusters <= 1:
+        labels = np.zeros(n, dtype=int)
+    order = next(iter(members.values()))
+    return labels, order
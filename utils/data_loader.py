@@ -1,160 +1,274 @@
-import streamlit as st
-import yfinance as yf
-import pandas as pd
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from utils.flows import FlowEngine
+from utils.instrumentation import stage, timed, with_context
+from utils.lazy import lazy_import
+from utils.panel import PricePanel
+from utils.precomputed import manifest_version, read_results
+from utils.refresh import get_poller
+from utils.settings import CACHE_DIR, MACRO_LOAD_BUDGET
+from utils.shared_store import shared_dataset, shared_store
+from utils.store import INTRADAY_LOOKBACK_DAYS, fetch_ohlcv
+from utils.universe import get_universe
+
+pd = lazy_import("pandas")
 
 def parse_tickers(raw: str) -> list:
     parts = [p.strip().upper() for p in raw.split(",") if p.strip()]
     # Filter out label-like entries starting/ending with '='
     return [p for p in parts if not p.startswith("=") and not p.endswith("=")]
 
-@st.cache_data(ttl=120)
+@timed("loader.avg_volume")
+@shared_dataset(ttl=120, stale_ttl=1800)
 def get_avg_volume(tickers, days):
-    data = yf.download(
-        tickers=tickers,
-        period=f"{days}d",
-        interval="1d",
-        progress=False,
-    )
-    if isinstance(data.columns, pd.MultiIndex):
-        vol = data["Volume"]
-    else:
-        vol = data["Volume"].to_frame()
-    return vol.mean()
-
-@st.cache_data(ttl=30)
+    data = fetch_ohlcv(tickers, period=f"{days}d", interval="1d")
+    panel = PricePanel.from_frame(data, tickers)
+    if panel.empty or "Volume" not in panel.fields:
+        return pd.Series(dtype=float)
+    return panel.frame("Volume").mean()
+
+@timed("loader.intraday")
+@shared_dataset(ttl=30, stale_ttl=300)
 def get_intraday(tickers, interval):
-    return yf.download(
-        tickers=tickers,
-        period="1d",
-        interval=interval,
-        progress=False,
-    )
-
-@st.cache_data(ttl=60)
+    data = fetch_ohlcv(tickers, period="1d", interval=interval)
+    return PricePanel.from_frame(data, tickers)
+
+@timed("loader.price_data")
+@shared_dataset(ttl=60, stale_ttl=900)
 def load_price_data(tickers, period, interval):
-    return yf.download(
-        tickers=tickers,
-        period=period,
-        interval=interval,
-        progress=False,
-    )
+    data = fetch_ohlcv(tickers, period=period, interval=interval)
+    return PricePanel.from_frame(data, tickers)
 
+@timed("loader.intraday_volume")
 def load_intraday_volume_data(tickers, history_days, interval):
     avg_vol = get_avg_volume(tickers, history_days)
-    intraday_df = get_intraday(tickers, interval)
-    return avg_vol, intraday_df
+    intraday_panel = get_intraday(tickers, interval)
+    return avg_vol, intraday_panel
+
+@timed("loader.live_intraday")
+def load_live_intraday_data(tickers, history_days, interval, refresh_seconds):
+    """Like ``load_intraday_volume_data``, but intraday bars come from the shared live poller."""
+    avg_vol = get_avg_volume(tickers, history_days)
+    intraday_panel = get_poller(tickers, interval, refresh_seconds).snapshot()
+    return avg_vol, intraday_panel
 
+@timed("loader.live_indicators")
+def load_live_indicators(tickers, interval, refresh_seconds):
+    """Streaming RSI, volume average and returns the live poller keeps up to date bar by bar."""
+    return get_poller(tickers, interval, refresh_seconds).indicators()
+
+@timed("loader.price_history")
 def load_price_history(tickers, period, interval):
     return load_price_data(tickers, period, interval)
 
-print("SPY test:", yf.download("SPY", period="1y", interval="1d").head())
-
-
-@st.cache_data(ttl=3600)
-def load_macro_universe():
-    import pandas as pd
-    import yfinance as yf
-
-    # -----------------------------
-    # Helper: extract Close prices
-    # -----------------------------
-    def extract_close(df):
-        if not isinstance(df, pd.DataFrame) or df.empty:
-            return None
-
-        # MultiIndex columns (your current case)
-        if isinstance(df.columns, pd.MultiIndex):
-            if "Close" in df.columns.get_level_values(0):
-                return df["Close"].iloc[:, 0]
-
-        # Old single-index format
-        if "Close" in df.columns:
-            return df["Close"]
-
-        return None
-
-    # -----------------------------
-    # Asset universe
-    # -----------------------------
-    assets = {
-        "S&P 500": "^GSPC",
-        "Nasdaq": "^IXIC",
-        "Gold": "GLD",
-        "Oil": "USO",
-        "Bonds (20Y)": "TLT",
-        "US Dollar Index": "DX-Y.NYB",
-        "Bitcoin": "BTC-USD",
-        "Ethereum": "ETH-USD",
-    }
+@timed("loader.backtest_history")
+def load_backtest_history(tickers, interval):
+    """All the ``interval`` bars Yahoo serves: the scanner's own bars, for the signal backtest."""
+    return load_price_data(tickers, f"{INTRADAY_LOOKBACK_DAYS.get(interval, 60)}d", interval)
 
-    fallback = {
-        "S&P 500": "SPY",
-        "Nasdaq": "QQQ",
-        "Gold": "IAU",
-        "Oil": "CL=F",
-        "Bonds (20Y)": "IEF",
-        "US Dollar Index": "UUP",
-    }
+@timed("loader.etf_flows")
+@shared_dataset(ttl=3600, stale_ttl=6 * 3600)
+def load_etf_flows():
+    """Precomputed ETF flows, brought up to date with any new source days."""
+    return FlowEngine().update()
+
+@shared_dataset(ttl=3600)
+def _read_precomputed(version):
+    return read_results()
+
+@timed("loader.precomputed")
+def load_precomputed():
+    """Batch results written by cli.py: ``job -> (frame, manifest entry)``, re-read after each run."""
+    return _read_precomputed(manifest_version())
+
+# -----------------------------
+# Macro universe
+# -----------------------------
+# The universe (groups, ticker chains, asset classes) lives in
+# config/macro_universe.json; see utils/universe.py.
 
-    clean = {}
+# Which ticker last worked for each label, so known-bad primaries are skipped.
+RESOLVED_TICKERS_PATH = CACHE_DIR / "macro_resolved.json"
+_resolved_lock = threading.Lock()
 
-    # -----------------------------
-    # Download + clean loop
-    # -----------------------------
-    for label, ticker in assets.items():
-        series = None
+MACRO_GROUP_WORKERS = 4
 
-        # Primary ticker
+
+def _load_resolved_tickers() -> dict:
+    try:
+        return json.loads(RESOLVED_TICKERS_PATH.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_resolved_tickers(updates: dict):
+    # Groups load concurrently; each merges its own labels into the file.
+    with _resolved_lock:
+        resolved = {**_load_resolved_tickers(), **updates}
         try:
-            df = yf.download(ticker, period="1y", interval="1d", progress=False)
-            close = extract_close(df)
-
-            if isinstance(close, pd.Series):
-                s = close.dropna()
-                if not s.empty:
-                    series = s
-                else:
-                    print(f"⚠ Empty Close data for {label} ({ticker})")
-            else:
-                print(f"⚠ No Close price found for {label} ({ticker})")
+            RESOLVED_TICKERS_PATH.parent.mkdir(parents=True, exist_ok=True)
+            RESOLVED_TICKERS_PATH.write_text(json.dumps(resolved, indent=2, sort_keys=True))
+        except OSError as e:
+            print(f"⚠ Could not save resolved macro tickers: {e}")
+
+
+def _extract_closes(df, tickers) -> dict:
+    closes = {}
+    if not isinstance(df, pd.DataFrame) or df.empty or "Close" not in df.columns.get_level_values(0):
+        return closes
+    close = df["Close"]
+    for t in tickers:
+        if t in close.columns:
+            s = close[t].dropna()
+            if not s.empty:
+                closes[t] = s
+    return closes
 
+
+def _timed_fetch(tickers, name):
+    with stage(name, tickers=len(tickers)) as record:
+        try:
+            data = fetch_ohlcv(tickers, period="1y", interval="1d") if tickers else None
         except Exception as e:
-            print(f"⚠ Error fetching {label} ({ticker}): {e}")
-
-        # Fallback ticker
-        if series is None and label in fallback:
-            alt = fallback[label]
-            try:
-                df_alt = yf.download(alt, period="1y", interval="1d", progress=False)
-                close_alt = extract_close(df_alt)
-
-                if isinstance(close_alt, pd.Series):
-                    s_alt = close_alt.dropna()
-                    if not s_alt.empty:
-                        series = s_alt
-                        print(f"✅ Using fallback for {label}: {alt}")
-                    else:
-                        print(f"⚠ Fallback Close empty for {label} ({alt})")
-                else:
-                    print(f"⚠ Fallback missing Close for {label} ({alt})")
-
-            except Exception as e:
-                print(f"⚠ Error fetching fallback {label} ({alt}): {e}")
-
-        # Store valid series
-        if isinstance(series, pd.Series) and not series.empty:
-            clean[label] = series
-        else:
-            print(f"❌ No valid data for {label}")
-
-    # -----------------------------
-    # Final assembly
-    # -----------------------------
-    print("DEBUG clean keys:", list(clean.keys()))
-
-    if not clean:
-        return assets, pd.DataFrame()
-
-    prices = pd.DataFrame(clean).dropna(how="all")
+            print(f"⚠ Error fetching macro batch {tickers}: {e}")
+            data = None
+        closes = _extract_closes(data, tickers)
+        record.describe(data)
+    return closes, record
+
+
+def _load_group(group):
+    with stage(f"macro.{group.name}") as total:
+        resolved, prices, stages = _resolve_group(group)
+        total.describe(prices)
+    print(f"⏱ Macro load ({group.name}, {len(resolved)}/{len(group.assets)} assets):",
+          ", ".join(f"{r.name.rsplit('.', 1)[1]}={r.seconds:.2f}s" for r in (*stages, total)))
+    return resolved, prices
+
+
+def _resolve_group(group):
+    remembered = _load_resolved_tickers()
+    chains = {a.label: a.tickers for a in group.assets}
 
+    # Labels with a remembered choice go straight to it; the others race their
+    # primary against the first fallback so a bad primary costs no extra round trip.
+    first_choice = {
+        label: remembered[label] if remembered.get(label) in chain else chain[0]
+        for label, chain in chains.items()
+    }
+    speculative = {
+        label: chain[1]
+        for label, chain in chains.items()
+        if len(chain) > 1 and label not in remembered
+    }
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        primary_job = pool.submit(with_context(_timed_fetch), sorted(set(first_choice.values())),
+                                  f"macro.{group.name}.primary_batch")
+        fallback_job = pool.submit(with_context(_timed_fetch), sorted(set(speculative.values())),
+                                   f"macro.{group.name}.fallback_batch")
+        closes, primary = primary_job.result()
+        fallback_closes, fallback = fallback_job.result()
+        closes.update(fallback_closes)
+    stages = [primary, fallback]
+
+    # Labels still without data try the rest of their chain in one batch.
+    retry = {}
+    for label, chain in chains.items():
+        tried = {first_choice[label], speculative.get(label)}
+        if tried & closes.keys():
+            continue
+        rest = [t for t in chain if t not in tried]
+        if rest:
+            retry[label] = rest
+    if retry:
+        retry_closes, record = _timed_fetch(sorted({t for rest in retry.values() for t in rest}),
+                                            f"macro.{group.name}.retry_batch")
+        closes.update(retry_closes)
+        stages.append(record)
+
+    with stage(f"macro.{group.name}.assemble") as record:
+        clean = {}
+        resolved = {}
+        for label, chain in chains.items():
+            candidates = [first_choice[label], speculative.get(label), *retry.get(label, [])]
+            for ticker in candidates:
+                if ticker and ticker in closes:
+                    clean[label] = closes[ticker]
+                    resolved[label] = ticker
+                    if ticker != chain[0]:
+                        print(f"✅ Using fallback for {label}: {ticker}")
+                    break
+            else:
+                print(f"❌ No valid data for {label}")
+
+        if any(remembered.get(label) != ticker for label, ticker in resolved.items()):
+            _save_resolved_tickers(resolved)
+
+        prices = pd.DataFrame(clean).dropna(how="all") if clean else pd.DataFrame()
+        record.describe(prices)
+    stages.append(record)
+    return resolved, prices, stages
+
+
+@timed("loader.macro_group")
+def load_macro_group(name: str):
+    """``(label -> ticker used, close prices)`` for one group, cached on its own refresh interval."""
+    group = get_universe().groups[name]
+    ttl = group.refresh_seconds
+    return shared_store.get(("macro_group", name), lambda: _load_group(group), ttl, stale_ttl=6 * ttl)
+
+
+_combined = {}
+
+
+def _combine(names, results: dict):
+    # Reruns get the same combined object back until one of the groups reloads.
+    key = tuple(n for n in names if n in results)
+    parts = tuple(results[n] for n in key)
+    cached = _combined.get(key)
+    if cached is not None and len(cached[0]) == len(parts) and all(a is b for a, b in zip(cached[0], parts)):
+        return cached[1]
+
+    universe = get_universe()
+    resolved = {}
+    frames = []
+    for group_resolved, prices in parts:
+        resolved.update(group_resolved)
+        if not prices.empty:
+            frames.append(prices)
+    prices = pd.concat(frames, axis=1).sort_index() if frames else pd.DataFrame()
+    assets = {label: resolved.get(label, universe.assets[label].primary) for label in universe.labels(key)}
+
+    _combined[key] = (parts, (assets, prices))
     return assets, prices
+
+
+@timed("loader.macro_universe")
+def load_macro_universe(groups=None, budget: float = MACRO_LOAD_BUDGET):
+    """``(label -> ticker, close prices)`` for every group (or ``groups``) of the universe.
+
+    Groups load in parallel, each from its own cache. A group that is not ready
+    within ``budget`` seconds is left out of this call and keeps loading in the
+    background; it shows up on a later rerun.
+    """
+    universe = get_universe()
+    names = list(groups or universe.groups)
+
+    pool = ThreadPoolExecutor(max_workers=min(len(names), MACRO_GROUP_WORKERS) or 1)
+    jobs = {pool.submit(with_context(load_macro_group), name): name for name in names}
+    done, late = wait(jobs, timeout=budget)
+    pool.shutdown(wait=False)
+
+    results = {}
+    for job in done:
+        try:
+            results[jobs[job]] = job.result()
+        except Exception as e:
+            print(f"⚠ Error loading macro group {jobs[job]}: {e}")
+    if late:
+        print(f"⏱ Macro groups still loading after {budget:.0f}s: {sorted(jobs[j] for j in late)}")
+
+    return _combine(names, results)
@@ -0,0 +1,267 @@
+"""ETF flow estimates from daily shares outstanding and NAV.
+
+A fund's net creation (+) or redemption (-) on day t is approximated as
+
+    flow_t = (shares_t - shares_{t-1}) * nav_t
+
+Inputs come from a ``FlowSource``: by default ``FileFlowSource`` reads CSV or
+Parquet files with ``date, ticker, shares_outstanding, nav`` columns (``ticker``
+may be left out of a per-fund file named after the fund). ``set_flow_source``
+plugs in any other backend.
+
+``FlowEngine`` keeps the computed dataset on disk in one Parquet file (a row
+per date and fund, a column per field). An update reads only source files changed since the last one,
+computes flows for the new days across all funds at once and extends the
+cumulative and rolling sums from their last row, so a new day costs O(funds).
+Rows for days already stored that add or change something (a fund reporting
+late, a new fund with its history) are merged into the stored inputs and the
+dataset is recomputed from them.
+"""
+from __future__ import annotations
+
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from utils import settings
+from utils.frames import read_parquet, write_parquet
+from utils.lazy import lazy_import
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+FLOW_WINDOWS = (5, 20, 60)
+FIELDS = ("shares", "nav", "flow", "cum_flow", *(f"flow_{w}d" for w in FLOW_WINDOWS))
+FLOWS_DIR = settings.CACHE_DIR / "etf_flows"
+
+_UPDATED_KEY = "moneyflow.updated_at"
+
+
+class FlowSource(ABC):
+    name = "base"
+
+    @abstractmethod
+    def load(self, since=None, modified_after: float | None = None) -> pd.DataFrame:
+        """Rows ``date, ticker, shares_outstanding, nav`` dated after ``since``."""
+
+
+class FileFlowSource(FlowSource):
+    name = "files"
+
+    def __init__(self, root: Path = settings.FLOWS_SOURCE_DIR):
+        self.root = Path(root)
+
+    def _read(self, path: Path) -> pd.DataFrame:
+        df = pd.read_parquet(path) if path.suffix == ".parquet" else pd.read_csv(path)
+        df.columns = [str(c).strip().lower() for c in df.columns]
+        if "ticker" not in df.columns:
+            df["ticker"] = path.stem.upper()
+        missing = {"date", "shares_outstanding", "nav"} - set(df.columns)
+        if missing:
+            raise ValueError(f"{path.name} is missing columns {sorted(missing)}")
+        return df[["date", "ticker", "shares_outstanding", "nav"]]
+
+    def load(self, since=None, modified_after=None):
+        frames = []
+        for path in sorted(self.root.glob("*.csv")) + sorted(self.root.glob("*.parquet")):
+            if modified_after is not None and path.stat().st_mtime <= modified_after:
+                continue
+            try:
+                frames.append(self._read(path))
+            except Exception as e:
+                print(f"⚠ Skipping flow file {path.name}: {e}")
+        if not frames:
+            return pd.DataFrame(columns=["date", "ticker", "shares_outstanding", "nav"])
+
+        rows = pd.concat(frames, ignore_index=True)
+        rows["date"] = pd.to_datetime(rows["date"]).dt.tz_localize(None).dt.normalize()
+        rows["ticker"] = rows["ticker"].astype(str).str.upper()
+        if since is not None:
+            rows = rows[rows["date"] > pd.Timestamp(since)]
+        return rows
+
+
+_flow_source = None
+
+
+def get_flow_source() -> FlowSource:
+    global _flow_source
+    if _flow_source is None:
+        _flow_source = FileFlowSource()
+    return _flow_source
+
+
+def set_flow_source(source: FlowSource):
+    """Swap the process-wide flow source (vendor feeds, tests)."""
+    global _flow_source
+    _flow_source = source
+
+
+class FlowDataset:
+    """Computed flows: a date × fund float array per field (dollars, shares, NAV)."""
+
+    def __init__(self, index, tickers, fields: dict):
+        self.index = pd.DatetimeIndex(index)
+        self.tickers = list(tickers)
+        self.fields = fields
+
+    @classmethod
+    def empty_dataset(cls) -> FlowDataset:
+        return cls(pd.DatetimeIndex([]), [], {f: np.empty((0, 0)) for f in FIELDS})
+
+    @property
+    def empty(self) -> bool:
+        return not self.tickers or len(self.index) == 0
+
+    def frame(self, field: str) -> pd.DataFrame:
+        return pd.DataFrame(self.fields[field], index=self.index, columns=self.tickers, copy=False)
+
+    def latest(self, field: str) -> pd.Series:
+        """Last row of ``field`` per fund, NaNs dropped."""
+        if self.empty:
+            return pd.Series(dtype=float)
+        return pd.Series(self.fields[field][-1], index=self.tickers).dropna()
+
+    def aum(self) -> pd.Series:
+        shares = self.frame("shares").ffill().iloc[-1]
+        nav = self.frame("nav").ffill().iloc[-1]
+        return (shares * nav).dropna()
+
+
+def _last_valid_row(values):
+    """Per column, the last non-NaN value (NaN where a column has none)."""
+    valid = ~np.isnan(values)
+    rows = np.where(valid, np.arange(len(values))[:, None], -1).max(axis=0)
+    out = np.full(values.shape[1], np.nan)
+    has = rows >= 0
+    out[has] = values[rows[has], np.nonzero(has)[0]]
+    return out
+
+
+def _widen(values, n_cols: int):
+    if values.shape[1] == n_cols:
+        return values
+    pad = np.full((values.shape[0], n_cols - values.shape[1]), np.nan)
+    return np.hstack([values, pad])
+
+
+def extend(current: FlowDataset, shares: pd.DataFrame, nav: pd.DataFrame) -> FlowDataset:
+    """``current`` with the new days in ``shares``/``nav`` (date × ticker) appended."""
+    tickers = current.tickers + [t for t in shares.columns if t not in current.tickers]
+    n_old, n = len(current.index), len(tickers)
+    s_new = shares.reindex(columns=tickers).to_numpy(dtype=np.float64)
+    v_new = nav.reindex(columns=tickers).to_numpy(dtype=np.float64)
+    old = {f: _widen(current.fields[f], n) if n_old else np.empty((0, n)) for f in FIELDS}
+
+    # Flow: change against each fund's last known share count, valued at today's NAV.
+    prev = _last_valid_row(old["shares"]) if n_old else np.full(n, np.nan)
+    filled = pd.DataFrame(np.vstack([prev, s_new])).ffill().to_numpy()
+    with np.errstate(invalid="ignore"):
+        flow = (s_new - filled[:-1]) * v_new
+    flow[np.isnan(s_new)] = np.nan
+
+    # Cumulative flow carries through gaps; NaN until a fund has any history.
+    base = _last_valid_row(old["cum_flow"]) if n_old else np.full(n, np.nan)
+    started = ~np.isnan(filled[1:])
+    cum = np.where(np.isnan(base), 0.0, base) + np.cumsum(np.nan_to_num(flow), axis=0)
+    cum[~started] = np.nan
+
+    fields = {
+        "shares": np.vstack([old["shares"], s_new]),
+        "nav": np.vstack([old["nav"], v_new]),
+        "flow": np.vstack([old["flow"], flow]),
+        "cum_flow": np.vstack([old["cum_flow"], cum]),
+    }
+
+    # Rolling sums for the new rows only, from the tail of the flow history.
+    k = len(s_new)
+    for w in FLOW_WINDOWS:
+        tail = np.nan_to_num(fields["flow"][max(n_old - w, 0):])
+        csum = np.vstack([np.zeros((1, n)), np.cumsum(tail, axis=0)])
+        end = np.arange(len(tail) - k, len(tail)) + 1
+        rolled = csum[end] - csum[np.maximum(end - w, 0)]
+        rolled[~started] = np.nan
+        fields[f"flow_{w}d"] = np.vstack([old[f"flow_{w}d"], rolled])
+
+    return FlowDataset(current.index.append(shares.index), tickers, fields)
+
+
+def _changes(current: FlowDataset, shares: pd.DataFrame, nav: pd.DataFrame) -> bool:
+    """Whether rows dated within ``current`` add or change any value it holds."""
+    if shares.empty:
+        return False
+    for field, new in (("shares", shares), ("nav", nav)):
+        old = current.frame(field).reindex(index=new.index, columns=new.columns).to_numpy()
+        new = new.to_numpy(dtype=np.float64)
+        if (~np.isnan(new) & (np.isnan(old) | (old != new))).any():
+            return True
+    return False
+
+
+def _merge(current: FlowDataset, shares: pd.DataFrame, nav: pd.DataFrame) -> tuple:
+    """Stored inputs overlaid with the new rows (new values win), over all dates and funds."""
+    tickers = current.tickers + [t for t in shares.columns if t not in current.tickers]
+    return tuple(
+        new.combine_first(current.frame(field)).reindex(columns=tickers).sort_index()
+        for field, new in (("shares", shares), ("nav", nav))
+    )
+
+
+class FlowEngine:
+    def __init__(self, source: FlowSource | None = None, root: Path = FLOWS_DIR):
+        self.source = source
+        self.root = Path(root)
+
+    @property
+    def path(self) -> Path:
+        return self.root / "flows.parquet"
+
+    def read(self):
+        """``(dataset, updated_at)`` from disk, or ``(empty dataset, None)``."""
+        if not self.path.exists():
+            return FlowDataset.empty_dataset(), None
+        frame, meta = read_parquet(self.path)
+        # Rows are stored date-major over a full date × ticker grid.
+        index = pd.DatetimeIndex(frame["date"].unique())
+        n = len(frame) // max(len(index), 1)
+        tickers = frame["ticker"].iloc[:n].tolist()
+        fields = {f: frame[f].to_numpy(dtype=np.float64).reshape(len(index), n) for f in FIELDS}
+        updated_at = meta.get(_UPDATED_KEY)
+        return FlowDataset(index, tickers, fields), float(updated_at) if updated_at else None
+
+    def write(self, dataset: FlowDataset, updated_at: float):
+        n = len(dataset.tickers)
+        frame = pd.DataFrame({
+            "date": np.repeat(dataset.index.to_numpy(), n),
+            "ticker": np.tile(np.array(dataset.tickers, dtype=object), len(dataset.index)),
+            **{f: dataset.fields[f].ravel() for f in FIELDS},
+        })
+        write_parquet(self.path, frame, {_UPDATED_KEY: updated_at})
+
+    def update(self) -> FlowDataset:
+        """Fold rows from changed source files into the stored dataset and return the result."""
+        source = self.source or get_flow_source()
+        current, updated_at = self.read()
+        started = time.time()
+        # Every row of the changed files, not just days after the last stored one:
+        # a late row for a stored day or a new fund's history must not be dropped.
+        rows = source.load(modified_after=updated_at)
+        if rows.empty:
+            return current
+
+        rows = rows.drop_duplicates(["date", "ticker"], keep="last")
+        shares = rows.pivot(index="date", columns="ticker", values="shares_outstanding").sort_index()
+        nav = rows.pivot(index="date", columns="ticker", values="nav").reindex_like(shares)
+
+        stored = shares.index <= current.index[-1] if not current.empty else np.zeros(len(shares), dtype=bool)
+        if _changes(current, shares[stored], nav[stored]):
+            dataset = extend(FlowDataset.empty_dataset(), *_merge(current, shares, nav))
+        else:
+            dataset = extend(current, shares[~stored], nav[~stored]) if not stored.all() else current
+        self.write(dataset, started)
+        return dataset
+
+    def rebuild(self) -> FlowDataset:
+        """Recompute everything from the source (after back-dated corrections)."""
+        self.path.unlink(missing_ok=True)
+        return self.update()
@@ -0,0 +1,169 @@
+"""Helpers for yfinance-shaped OHLCV frames and the Parquet files that hold them."""
+
+from __future__ import annotations
+
+import os
+import re
+import tempfile
+from pathlib import Path
+
+from utils.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+MAX_PERIOD = "max"
+
+
+def is_intraday(interval: str) -> bool:
+    return interval.endswith("m") or interval.endswith("h")
+
+
+def period_start(period: str, now: pd.Timestamp | None = None) -> pd.Timestamp | None:
+    """Earliest timestamp a yfinance ``period`` string asks for (None for "max")."""
+    now = now or pd.Timestamp.now(tz="UTC")
+    if period == MAX_PERIOD:
+        return None
+    if period == "ytd":
+        return now.normalize().replace(month=1, day=1)
+    if period.endswith("mo"):
+        return now - pd.DateOffset(months=int(period[:-2]))
+    if period.endswith("y"):
+        return now - pd.DateOffset(years=int(period[:-1]))
+    if period.endswith("d"):
+        return now - pd.Timedelta(days=int(period[:-1]))
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def normalize_index(index: pd.Index, interval: str) -> pd.DatetimeIndex:
+    # Intraday bars are kept in UTC so tickers from different exchanges line up;
+    # daily bars stay tz-naive dates, as yfinance returns them.
+    index = pd.DatetimeIndex(index)
+    if is_intraday(interval):
+        return index.tz_localize("UTC") if index.tz is None else index.tz_convert("UTC")
+    return index if index.tz is None else index.tz_localize(None)
+
+
+def comparable(ts, interval: str):
+    if ts is None or is_intraday(interval):
+        return ts
+    return ts.tz_localize(None) if ts.tzinfo is not None else ts
+
+
+def split_by_ticker(data: pd.DataFrame, tickers, interval: str) -> dict:
+    """Split a yfinance download into one OHLCV frame per ticker."""
+    out = {}
+    if data is None or data.empty:
+        return out
+
+    for t in tickers:
+        if isinstance(data.columns, pd.MultiIndex):
+            if t not in data.columns.get_level_values(-1):
+                continue
+            frame = data.xs(t, axis=1, level=-1)
+        elif len(tickers) == 1:
+            frame = data
+        else:
+            continue
+
+        frame = frame.dropna(how="all")
+        if frame.empty:
+            continue
+        frame = frame.copy()
+        frame.index = normalize_index(frame.index, interval)
+        frame.columns.name = None
+        out[t] = frame
+    return out
+
+
+def assemble(frames: dict, tickers, interval: str) -> pd.DataFrame:
+    """Stitch per-ticker frames back into yfinance's (Price, Ticker) layout."""
+    present = [t for t in tickers if t in frames]
+    if not present:
+        return pd.DataFrame()
+
+    data = pd.concat([frames[t] for t in present], axis=1, keys=present, names=["Ticker", "Price"], sort=True)
+    data = data.swaplevel(axis=1).sort_index(axis=1, level="Price", sort_remaining=False)
+    data.index.name = "Datetime" if is_intraday(interval) else "Date"
+    return data
+
+
+def merge_bars(old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    # The last stored bar may have been partial; the refetched copy wins.
+    merged = pd.concat([old, new])
+    merged = merged[~merged.index.duplicated(keep="last")]
+    return merged.sort_index()
+
+
+def slice_period(frame: pd.DataFrame, period: str, start, interval: str) -> pd.DataFrame:
+    sessions = re.fullmatch(r"(\d+)d", period)  # not "ytd"
+    if sessions:
+        # Yahoo's "Nd" is the latest N sessions (trading days), not N calendar
+        # days: "1d" intraday is today's session, "20d" daily is the last 20 bars.
+        days = frame.index.normalize()
+        kept = days.unique()[-int(sessions.group(1)):]
+        return frame[days >= kept.min()] if len(kept) else frame
+    if start is not None:
+        return frame[frame.index >= start]
+    return frame
+
+
+def safe_filename(ticker: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in ticker)
+
+
+def read_parquet(path: Path):
+    """Return ``(frame, metadata)`` for a Parquet file written by ``write_parquet``."""
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(path)
+    meta = {
+        k.decode(): v.decode()
+        for k, v in (table.schema.metadata or {}).items()
+        if k.startswith(b"moneyflow.")
+    }
+    return table.to_pandas(), meta
+
+
+def read_parquet_meta(path: Path) -> dict:
+    import pyarrow.parquet as pq
+
+    return {
+        k.decode(): v.decode()
+        for k, v in (pq.read_schema(path).metadata or {}).items()
+        if k.startswith(b"moneyflow.")
+    }
+
+
+def write_parquet(path: Path, frame: pd.DataFrame, meta: dict):
+    """Atomically write ``frame`` with ``moneyflow.*`` schema metadata."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pandas(frame)
+    schema_meta = dict(table.schema.metadata or {})
+    schema_meta.update({k.encode(): str(v).encode() for k, v in meta.items()})
+    table = table.replace_schema_metadata(schema_meta)
+    _replace(path, lambda f: pq.write_table(table, f))
+
+
+def write_text(path: Path, text: str):
+    """Atomically replace ``path`` with ``text`` (UTF-8)."""
+    _replace(Path(path), lambda f: f.write(text.encode()))
+
+
+def _replace(path: Path, write):
+    """Call ``write`` on a temp file next to ``path``, then move it into place.
+
+    A unique temp file per writer: two threads or processes writing the same
+    path must not interleave into one half-written file.
+    """
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=path.name + ".", suffix=".tmp", delete=False) as f:
+        tmp = f.name
+        try:
+            write(f)
+        except BaseException:
+            f.close()
+            os.unlink(tmp)
+            raise
+    os.replace(tmp, path)
@@ -1,5 +1,17 @@
-import pandas as pd
-import numpy as np
+from __future__ import annotations
+
+from utils.lazy import lazy_import
+from utils.returns import tail_returns
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+INSUFFICIENT_DATA = "Insufficient data"
+STRONG_ACCUMULATION = "Strong Accumulation (Price ↑, Volume ↑)"
+WEAK_RALLY = "Weak Rally (Price ↑, Volume ↓/flat)"
+DISTRIBUTION = "Distribution (Price ↓, Volume ↑)"
+WEAK_SELLING = "Weak Selling (Price ↓, Volume ↓/flat)"
+NO_SIGNAL = "Sideways / No clear signal"
 
 def compute_rsi(series: pd.Series, window: int = 14) -> pd.Series:
     delta = series.diff()
@@ -19,26 +31,165 @@ def pct_return(series: pd.Series, periods: int) -> float:
     return (series.iloc[-1] / series.iloc[-periods - 1] - 1) * 100
 
 def multi_period_returns(df: pd.DataFrame, periods_map: dict) -> pd.DataFrame:
-    out = {}
-    for label, periods in periods_map.items():
-        out[label] = df.pct_change(periods=periods).iloc[-1] * 100
-    return pd.DataFrame(out)
+    return tail_returns(df, periods_map)
 
 def volume_price_signal(price: pd.Series, volume: pd.Series, window: int = 20) -> str:
     if len(price) < window + 1 or len(volume) < window + 1:
-        return "Insufficient data"
+        return INSUFFICIENT_DATA
 
     price_change = price.iloc[-1] / price.iloc[-window - 1] - 1
     vol_ma = volume.rolling(window).mean()
     vol_change = volume.iloc[-1] / vol_ma.iloc[-1] - 1 if vol_ma.iloc[-1] != 0 else 0
 
     if price_change > 0 and vol_change > 0:
-        return "Strong Accumulation (Price ↑, Volume ↑)"
+        return STRONG_ACCUMULATION
     elif price_change > 0 and vol_change <= 0:
-        return "Weak Rally (Price ↑, Volume ↓/flat)"
+        return WEAK_RALLY
     elif price_change < 0 and vol_change > 0:
-        return "Distribution (Price ↓, Volume ↑)"
+        return DISTRIBUTION
     elif price_change < 0 and vol_change <= 0:
-        return "Weak Selling (Price ↓, Volume ↓/flat)"
+        return WEAK_SELLING
     else:
-        return "Sideways / No clear signal"
+        return NO_SIGNAL
+
+# ---------------------------------------------------------
+# PANEL KERNELS (time × ticker arrays, all columns at once)
+# ---------------------------------------------------------
+
+def _rolling_sum(values, window: int):
+    """Rolling sum down each column; NaN until ``window`` rows, NaNs count as 0."""
+    cs = np.cumsum(np.nan_to_num(values), axis=0)
+    out = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        out[window - 1:] = cs[window - 1:]
+        out[window:] -= cs[:-window]
+    return out
+
+
+def rsi_panel(close, window: int = 14):
+    """``compute_rsi`` for every column of a time × ticker close array."""
+    close = np.asarray(close, dtype=np.float64)
+    delta = np.diff(close, axis=0, prepend=np.nan)
+    with np.errstate(invalid="ignore"):
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+
+    gain_ema = pd.DataFrame(gain).ewm(alpha=1/window, min_periods=window).mean().to_numpy()
+    loss_ema = pd.DataFrame(loss).ewm(alpha=1/window, min_periods=window).mean().to_numpy()
+    loss_ema = np.where(loss_ema == 0, np.nan, loss_ema)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = gain_ema / loss_ema
+        return 100 - (100 / (1 + rs))
+
+
+def obv_panel(close, volume):
+    """On-Balance Volume: running sum of volume signed by the close-to-close move."""
+    close = np.asarray(close, dtype=np.float64)
+    direction = np.sign(np.diff(close, axis=0, prepend=np.nan))
+    return np.cumsum(np.nan_to_num(direction * volume), axis=0)
+
+
+def mfi_panel(high, low, close, volume, window: int = 14):
+    """Money Flow Index: volume-weighted RSI of the typical price."""
+    typical = (np.asarray(high) + np.asarray(low) + np.asarray(close)) / 3
+    raw_flow = typical * volume
+    move = np.diff(typical, axis=0, prepend=np.nan)
+
+    positive = _rolling_sum(np.where(move > 0, raw_flow, 0.0), window)
+    negative = _rolling_sum(np.where(move < 0, raw_flow, 0.0), window)
+    # The first bar has no previous typical price, so it needs one extra row.
+    positive[:window] = np.nan
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mfi = 100 - 100 / (1 + positive / negative)
+    mfi[(negative == 0) & (positive > 0)] = 100.0
+    mfi[(negative == 0) & (positive == 0)] = 50.0
+    mfi[np.isnan(positive)] = np.nan
+    return mfi
+
+
+def cmf_panel(high, low, close, volume, window: int = 20):
+    """Chaikin Money Flow: windowed sum of money-flow volume over windowed volume."""
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    span = high - low
+    with np.errstate(divide="ignore", invalid="ignore"):
+        multiplier = np.where(span > 0, ((close - low) - (high - close)) / span, 0.0)
+        return _rolling_sum(multiplier * volume, window) / _rolling_sum(volume, window)
+
+
+def session_vwap_panel(high, low, close, volume, index):
+    """VWAP of the typical price, restarting at every calendar day of ``index``."""
+    typical = (np.asarray(high) + np.asarray(low) + np.asarray(close)) / 3
+    pv = np.cumsum(np.nan_to_num(typical * volume), axis=0)
+    vv = np.cumsum(np.nan_to_num(volume), axis=0)
+
+    days = pd.DatetimeIndex(index).normalize().asi8
+    starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+    session_start = np.repeat(starts, np.diff(np.r_[starts, len(days)]))
+    prior = session_start - 1
+
+    base_pv = np.where(prior[:, None] >= 0, pv[prior], 0.0)
+    base_vv = np.where(prior[:, None] >= 0, vv[prior], 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (pv - base_pv) / (vv - base_vv)
+
+
+def _compact(mask, *fields):
+    """Push each column's rows where ``mask`` holds to the bottom, NaN-padding the top.
+
+    Per-ticker bars from a mixed calendar (crypto + equities) line up by "n-th
+    latest bar" instead of by timestamp, as if each column had been dropna'd.
+    """
+    order = np.argsort(mask, axis=0, kind="stable")
+    padding = np.arange(len(mask))[:, None] < (len(mask) - mask.sum(axis=0))[None, :]
+    out = []
+    for values in fields:
+        values = np.take_along_axis(np.asarray(values, dtype=np.float64), order, axis=0)
+        values[padding] = np.nan
+        out.append(values)
+    return out
+
+
+def _last_valid(values):
+    valid = ~np.isnan(values)
+    rows = len(values) - 1 - np.argmax(valid[::-1], axis=0)
+    return values[rows, np.arange(values.shape[1])]
+
+
+def money_flow_screen(panel, tickers=None, rsi_window: int = 14, flow_window: int = 20):
+    """Latest RSI, MFI, CMF, OBV change and price vs session VWAP per ticker."""
+    needed = ("High", "Low", "Close", "Volume")
+    if panel is None or panel.empty or any(f not in panel.fields for f in needed):
+        return pd.DataFrame()
+
+    tickers = [t for t in (tickers or panel.tickers) if t in panel]
+    if not tickers:
+        return pd.DataFrame()
+    cols = [panel.col[t] for t in tickers]
+    high, low, close, volume = (panel.fields[f][:, cols] for f in needed)
+
+    # VWAP needs real timestamps for its sessions; everything else runs on
+    # gap-free per-ticker columns.
+    vwap = _last_valid(session_vwap_panel(high, low, close, volume, panel.index))
+
+    mask = ~(np.isnan(high) | np.isnan(low) | np.isnan(close) | np.isnan(volume))
+    high, low, close, volume = _compact(mask, high, low, close, volume)
+
+    obv = obv_panel(close, volume)
+    obv_change = obv[-1] - obv[-flow_window - 1] if len(obv) > flow_window else np.full(len(cols), np.nan)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vs_vwap = (close[-1] / vwap - 1) * 100
+
+    return pd.DataFrame({
+        "Ticker": tickers,
+        "Last Price": close[-1],
+        f"RSI({rsi_window})": rsi_panel(close, rsi_window)[-1],
+        f"MFI({rsi_window})": mfi_panel(high, low, close, volume, rsi_window)[-1],
+        f"CMF({flow_window})": cmf_panel(high, low, close, volume, flow_window)[-1],
+        f"OBV Δ{flow_window}": obv_change,
+        "vs VWAP %": vs_vwap,
+    }).set_index("Ticker")
@@ -0,0 +1,346 @@
+"""Per-stage wall time, rows/tickers and cache outcomes for every rerun.
+
+A stage is a ``with stage("loader.price_data"):`` block (or a ``@timed`` function).
+It records how long it took, how many rows and tickers it handled and, for cached
+steps, what the cache did (``mark(cache="hit")`` from inside the block). Stages
+nest: each record names its parent, and everything timed during one script run
+is collected on that run's ``RunTrace`` for the sidebar debug panel.
+
+The part of a stage name before the first dot is its kind: ``rerun``, ``tab``,
+``loader``, ``macro``, ``fetch``, ``parse``, ``metric``, ``figure``, ``table``.
+
+Records go to a bounded in-memory history and are aggregated per stage into
+Prometheus histograms and counters (``Recorder.prometheus_text``). With
+``MONEYFLOW_METRICS_LOG`` set every record is also appended to that file as a
+JSON line; with ``MONEYFLOW_METRICS_PROM`` the Prometheus text is rewritten
+after each rerun, for a node_exporter textfile collector. p95 rerun latency per
+tab is then ``histogram_quantile(0.95, moneyflow_stage_seconds_bucket{stage=~"rerun.*"})``.
+
+Worker threads start with an empty context; submit work through ``with_context``
+so its stages nest under the caller's and count towards its rerun.
+"""
+from __future__ import annotations
+
+import bisect
+import contextvars
+import functools
+import itertools
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+from utils import settings
+from utils.frames import write_text
+
+# Upper bounds (seconds) of the Prometheus histogram buckets.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+HISTORY = 5000   # stage records kept for export
+SAMPLES = 500    # recent durations per stage behind the panel's p50/p95
+RUNS = 100       # finished reruns kept
+# Cache outcomes that served a value without loading it.
+HIT_OUTCOMES = ("hit", "stale")
+
+_stage = contextvars.ContextVar("moneyflow_stage", default=None)
+_run = contextvars.ContextVar("moneyflow_run", default=None)
+_run_ids = itertools.count(1)
+
+
+def describe(value) -> tuple:
+    """``(rows, tickers)`` of a panel, frame, series or a tuple/list/dict of them."""
+    if value is None:
+        return None, None
+    if isinstance(value, (tuple, list, dict)):
+        parts = [describe(v) for v in (value.values() if isinstance(value, dict) else value)]
+        rows = [r for r, _ in parts if r is not None]
+        tickers = [t for _, t in parts if t is not None]
+        if isinstance(value, dict):
+            # Per-ticker frames (bulk downloads): rows add up, one ticker per entry.
+            return (sum(rows) if rows else None), (max([len(value), *tickers]) if value else None)
+        return max(rows, default=None), max(tickers, default=None)
+    shape = getattr(value, "shape", None)
+    if shape is not None:
+        return shape[0], (shape[1] if len(shape) > 1 else None)
+    if hasattr(value, "tickers") and hasattr(value, "index"):
+        # PricePanel, FlowDataset
+        return len(value.index), len(value.tickers)
+    return None, None
+
+
+class StageRecord:
+    __slots__ = ("name", "parent", "depth", "started_at", "seconds", "rows", "tickers", "cache", "run")
+
+    def __init__(self, name: str, parent: StageRecord | None = None, rows=None, tickers=None):
+        self.name = name
+        self.parent = parent.name if parent else None
+        self.depth = parent.depth + 1 if parent else 0
+        self.started_at = time.time()
+        self.seconds = 0.0
+        self.rows = rows
+        self.tickers = tickers
+        self.cache = None
+        self.run = None
+
+    @property
+    def kind(self) -> str:
+        return self.name.split(".", 1)[0]
+
+    def describe(self, value):
+        """Fill rows/tickers from ``value`` where they aren't set yet."""
+        rows, tickers = describe(value)
+        if self.rows is None:
+            self.rows = rows
+        if self.tickers is None:
+            self.tickers = tickers
+
+    def to_dict(self) -> dict:
+        return {
+            "ts": round(self.started_at, 3),
+            "stage": self.name,
+            "parent": self.parent,
+            "seconds": round(self.seconds, 6),
+            "rows": self.rows,
+            "tickers": self.tickers,
+            "cache": self.cache,
+            "run": self.run,
+        }
+
+
+class RunTrace:
+    """Every stage timed during one script run, in completion order."""
+
+    def __init__(self):
+        self.id = next(_run_ids)
+        self.started_at = time.time()
+        self.seconds = None
+        self.records = []
+        self._start = time.perf_counter()
+
+    def table(self) -> list:
+        """Rows for the debug panel: stages in start order, indented by depth."""
+        return [
+            {
+                "stage": "  " * r.depth + r.name,
+                "ms": round(r.seconds * 1000, 1),
+                "rows": r.rows,
+                "tickers": r.tickers,
+                "cache": r.cache,
+            }
+            for r in sorted(self.records, key=lambda r: r.started_at)
+        ]
+
+
+def _quantile(ordered: list, q: float) -> float:
+    """Nearest-rank quantile of an already sorted list."""
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _StageStats:
+    __slots__ = ("count", "total", "buckets", "cache", "rows", "tickers", "recent")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.cache = {}
+        self.rows = 0
+        self.tickers = 0
+        self.recent = deque(maxlen=SAMPLES)
+
+
+class Recorder:
+    def __init__(self, log_path: Path | None = None, prom_path: Path | None = None, history: int = HISTORY):
+        self.log_path = log_path
+        self.prom_path = prom_path
+        self.records = deque(maxlen=history)
+        self.runs = deque(maxlen=RUNS)
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def add(self, record: StageRecord):
+        with self._lock:
+            self.records.append(record)
+            stats = self._stats.get(record.name)
+            if stats is None:
+                stats = self._stats[record.name] = _StageStats()
+            stats.count += 1
+            stats.total += record.seconds
+            stats.recent.append(record.seconds)
+            bucket = bisect.bisect_left(BUCKETS, record.seconds)
+            if bucket < len(BUCKETS):
+                stats.buckets[bucket] += 1
+            if record.cache:
+                stats.cache[record.cache] = stats.cache.get(record.cache, 0) + 1
+            stats.rows += record.rows or 0
+            stats.tickers += record.tickers or 0
+            if self.log_path is not None:
+                self._append(record)
+
+    def _append(self, record: StageRecord):
+        try:
+            with open(self.log_path, "a") as f:
+                f.write(json.dumps(record.to_dict()) + "\n")
+        except OSError as e:
+            print(f"⚠ Could not write stage timings to {self.log_path}: {e}")
+            self.log_path = None
+
+    def summary(self) -> list:
+        """Per stage, slowest total first: count, p50/p95/max over recent calls, cache hit rate."""
+        with self._lock:
+            items = [(name, s.count, s.total, sorted(s.recent), dict(s.cache)) for name, s in self._stats.items()]
+        out = []
+        for name, count, total, recent, cache in sorted(items, key=lambda item: -item[2]):
+            lookups = sum(cache.values())
+            out.append({
+                "stage": name,
+                "calls": count,
+                "p50 ms": round(_quantile(recent, 0.50) * 1000, 1),
+                "p95 ms": round(_quantile(recent, 0.95) * 1000, 1),
+                "max ms": round(recent[-1] * 1000, 1),
+                "total s": round(total, 3),
+                "hit rate": round(sum(cache.get(o, 0) for o in HIT_OUTCOMES) / lookups, 3) if lookups else None,
+            })
+        return out
+
+    def jsonl(self) -> str:
+        """Recent stage records as JSON lines, oldest first."""
+        with self._lock:
+            records = list(self.records)
+        return "".join(json.dumps(r.to_dict()) + "\n" for r in records)
+
+    def prometheus_text(self) -> str:
+        """All stages since start in the Prometheus text exposition format."""
+        with self._lock:
+            stats = sorted(
+                (name, s.count, s.total, list(s.buckets), dict(s.cache), s.rows, s.tickers)
+                for name, s in self._stats.items()
+            )
+        lines = [
+            "# HELP moneyflow_stage_seconds Wall time of each dashboard stage.",
+            "# TYPE moneyflow_stage_seconds histogram",
+        ]
+        for name, count, total, buckets, _, _, _ in stats:
+            label = f'stage="{_label(name)}"'
+            cumulative = 0
+            for bound, n in zip(BUCKETS, buckets):
+                cumulative += n
+                lines.append(f'moneyflow_stage_seconds_bucket{{{label},le="{bound:g}"}} {cumulative}')
+            lines.append(f'moneyflow_stage_seconds_bucket{{{label},le="+Inf"}} {count}')
+            lines.append(f"moneyflow_stage_seconds_sum{{{label}}} {total:.6f}")
+            lines.append(f"moneyflow_stage_seconds_count{{{label}}} {count}")
+
+        lines += [
+            "# HELP moneyflow_stage_cache_total Cache lookups per stage by outcome.",
+            "# TYPE moneyflow_stage_cache_total counter",
+        ]
+        for name, _, _, _, cache, _, _ in stats:
+            for outcome, n in sorted(cache.items()):
+                lines.append(f'moneyflow_stage_cache_total{{stage="{_label(name)}",outcome="{_label(outcome)}"}} {n}')
+
+        for metric, field, what in (("rows", 5, "Rows"), ("tickers", 6, "Tickers")):
+            lines += [
+                f"# HELP moneyflow_stage_{metric}_total {what} processed per stage.",
+                f"# TYPE moneyflow_stage_{metric}_total counter",
+            ]
+            lines += [f'moneyflow_stage_{metric}_total{{stage="{_label(s[0])}"}} {s[field]}' for s in stats if s[field]]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self):
+        try:
+            write_text(self.prom_path, self.prometheus_text())  # the collector never reads a half-written file
+        except OSError as e:
+            print(f"⚠ Could not write Prometheus metrics to {self.prom_path}: {e}")
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+            self.runs.clear()
+            self._stats.clear()
+
+
+recorder = Recorder(settings.METRICS_LOG_PATH, settings.METRICS_PROM_PATH)
+
+
+@contextmanager
+def stage(name: str, rows=None, tickers=None):
+    """Time the block as stage ``name``; yields its ``StageRecord`` to fill in rows/tickers/cache."""
+    record = StageRecord(name, _stage.get(), rows, tickers)
+    run = _run.get()
+    token = _stage.set(record)
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record.seconds = time.perf_counter() - start
+        _stage.reset(token)
+        if run is not None:
+            record.run = run.id
+            run.records.append(record)
+        recorder.add(record)
+
+
+def timed(name: str):
+    """Decorator: each call is stage ``name``, rows/tickers taken from the return value."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name) as record:
+                value = func(*args, **kwargs)
+                record.describe(value)
+                return value
+
+        return wrapper
+
+    return decorate
+
+
+def mark(cache: str | None = None, rows=None, tickers=None):
+    """Annotate the innermost open stage (no-op outside one)."""
+    record = _stage.get()
+    if record is None:
+        return
+    if cache is not None:
+        record.cache = cache
+    if rows is not None:
+        record.rows = rows
+    if tickers is not None:
+        record.tickers = tickers
+
+
+def with_context(func):
+    """``func`` bound to a copy of the caller's context, for ``pool.submit`` / ``Thread``."""
+    return functools.partial(contextvars.copy_context().run, func)
+
+
+def current_run() -> RunTrace | None:
+    """The run stages are being collected on, if any."""
+    return _run.get()
+
+
+def start_run() -> RunTrace:
+    """Begin collecting this script run's stages."""
+    run = RunTrace()
+    _run.set(run)
+    return run
+
+
+def finish_run(run: RunTrace, tab: str) -> RunTrace:
+    """Close ``run`` and record it as stage ``rerun.<tab>``."""
+    run.seconds = time.perf_counter() - run._start
+    _run.set(None)
+    record = StageRecord(f"rerun.{tab}")
+    record.started_at = run.started_at
+    record.seconds = run.seconds
+    record.run = run.id
+    recorder.add(record)
+    recorder.runs.append(run)
+    if recorder.prom_path is not None:
+        recorder.write_prometheus()
+    return run
@@ -0,0 +1,36 @@
+import importlib
+import importlib.machinery
+import importlib.util
+import sys
+
+
+def _find_spec(name: str):
+    """Spec for ``name`` without importing its parent packages, as ``find_spec`` would."""
+    parent = name.rpartition(".")[0]
+    if not parent or parent in sys.modules:
+        return importlib.util.find_spec(name)
+    parent_spec = _find_spec(parent)
+    if parent_spec is None or parent_spec.submodule_search_locations is None:
+        return None
+    return importlib.machinery.PathFinder.find_spec(name, parent_spec.submodule_search_locations)
+
+
+def lazy_import(name: str):
+    """Return ``name`` as a module that is only executed on first attribute access.
+
+    Keeps pandas, plotly, yfinance and pyarrow off the startup path: the app can
+    paint its title and sidebar before any of them is imported.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = _find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
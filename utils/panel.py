@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import hashlib
+
+from utils.instrumentation import timed
+from utils.lazy import lazy_import
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+
+class PricePanel:
+    """One parsed OHLCV dataset: a time × ticker float array per field.
+
+    Arrays are column-major, so every ticker's column is contiguous and
+    ``column()`` hands it out without copying. ``valid`` holds the matching
+    non-NaN masks. Arrays are read-only because panels are shared across tabs.
+    """
+
+    def __init__(self, index, tickers, fields: dict):
+        self.index = pd.DatetimeIndex(index)
+        self.tickers = list(tickers)
+        self.col = {t: j for j, t in enumerate(self.tickers)}
+        self.fields = {}
+        self.valid = {}
+        self._dense = {}
+        self._fingerprint = None
+
+        for name, values in fields.items():
+            values = np.asfortranarray(values, dtype=np.float64)
+            mask = np.asfortranarray(~np.isnan(values))
+            values.flags.writeable = False
+            mask.flags.writeable = False
+            self.fields[name] = values
+            self.valid[name] = mask
+            self._dense[name] = mask.all(axis=0)
+
+    @classmethod
+    @timed("parse.panel")
+    def from_frame(cls, data, tickers=None) -> PricePanel:
+        """Parse a yfinance download (MultiIndex or single-ticker columns)."""
+        if data is None or data.empty:
+            return cls(pd.DatetimeIndex([]), [], {})
+
+        if isinstance(data.columns, pd.MultiIndex):
+            present = list(dict.fromkeys(data.columns.get_level_values(-1)))
+            order = [t for t in (tickers or present) if t in present]
+            fields = {
+                name: data[name].reindex(columns=order).to_numpy(dtype=np.float64)
+                for name in dict.fromkeys(data.columns.get_level_values(0))
+            }
+            return cls(data.index, order, fields)
+
+        if not tickers:
+            raise ValueError("Single-ticker frames need the ticker name")
+        fields = {name: data[[name]].to_numpy(dtype=np.float64) for name in data.columns}
+        return cls(data.index, [tickers[0]], fields)
+
+    @property
+    def fingerprint(self) -> str:
+        """Content hash, computed once; panels are immutable."""
+        if self._fingerprint is None:
+            h = hashlib.blake2b(digest_size=16)
+            h.update(repr(self.tickers).encode())
+            h.update(self.index.asi8.tobytes())
+            for name in sorted(self.fields):
+                h.update(name.encode())
+                h.update(self.fields[name].tobytes(order="F"))
+            self._fingerprint = h.hexdigest()
+        return self._fingerprint
+
+    @property
+    def empty(self) -> bool:
+        return not self.tickers or len(self.index) == 0
+
+    def __contains__(self, ticker) -> bool:
+        return ticker in self.col
+
+    def column(self, field: str, ticker: str):
+        """Zero-copy 1D view of one ticker's ``field``, or None if absent."""
+        j = self.col.get(ticker)
+        if j is None or field not in self.fields:
+            return None
+        return self.fields[field][:, j]
+
+    def series(self, field: str, ticker: str, dropna: bool = True):
+        """``field`` for ``ticker`` as a Series; None if the ticker or field is absent.
+
+        Columns without gaps are wrapped without copying; ``dropna`` only
+        filters (and copies) columns that actually have NaNs.
+        """
+        values = self.column(field, ticker)
+        if values is None:
+            return None
+        j = self.col[ticker]
+        if dropna and not self._dense[field][j]:
+            mask = self.valid[field][:, j]
+            return pd.Series(values[mask], index=self.index[mask], name=ticker)
+        return pd.Series(values, index=self.index, name=ticker, copy=False)
+
+    def frame(self, field: str):
+        """``field`` as a time × ticker DataFrame."""
+        return pd.DataFrame(self.fields[field], index=self.index, columns=self.tickers, copy=False)
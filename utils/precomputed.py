@@ -0,0 +1,124 @@
+"""Batch results on disk: written by ``cli.py``, read by the dashboard.
+
+Each job's result is one file in ``PRECOMPUTED_DIR`` (``<job>.parquet`` or
+``<job>.json``, records with the index as a column). ``manifest.json`` lists the
+latest file per job with when it was written, for how many tickers, with which
+parameters and how long it took, so readers never have to open a file to know
+whether it is current. When a job's latest run failed its entry also carries
+``error`` and ``failed_at``; the file (if any) is then the last good result.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from io import StringIO
+from pathlib import Path
+
+from utils import settings
+from utils.frames import read_parquet, write_parquet, write_text
+from utils.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+FORMATS = ("parquet", "json")
+MANIFEST = "manifest.json"
+
+_manifest_lock = threading.RLock()
+
+
+def read_manifest(root: Path = settings.PRECOMPUTED_DIR) -> dict:
+    try:
+        return json.loads((Path(root) / MANIFEST).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def manifest_version(root: Path = settings.PRECOMPUTED_DIR):
+    """Changes whenever a job writes a result (the manifest's mtime); None before the first."""
+    try:
+        return (Path(root) / MANIFEST).stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _update_manifest(root: Path, job: str, entry: dict):
+    with _manifest_lock:
+        manifest = {**read_manifest(root), job: entry}
+        write_text(root / MANIFEST, json.dumps(manifest, indent=2, sort_keys=True))
+
+
+def write_result(job: str, frame: pd.DataFrame, params: dict, seconds: float, tickers: int | None,
+                 fmt: str = "parquet", root: Path = settings.PRECOMPUTED_DIR) -> dict:
+    """Write ``frame`` as the latest result of ``job`` and record it in the manifest."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {FORMATS}")
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    entry = {
+        "file": f"{job}.{fmt}",
+        "format": fmt,
+        "index": frame.index.name,
+        "rows": len(frame),
+        "tickers": tickers,
+        "params": params,
+        "seconds": round(seconds, 3),
+        "written_at": time.time(),
+    }
+    path = root / entry["file"]
+    if fmt == "parquet":
+        write_parquet(path, frame, {"moneyflow.job": job, "moneyflow.params": json.dumps(params)})
+    else:
+        write_text(path, frame.reset_index().to_json(orient="records", date_format="iso"))
+    _update_manifest(root, job, entry)
+    return entry
+
+
+def write_failure(job: str, error: Exception, root: Path = settings.PRECOMPUTED_DIR) -> dict:
+    """Mark ``job``'s manifest entry as failed, keeping the last good result it points to."""
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    with _manifest_lock:
+        entry = {
+            **read_manifest(root).get(job, {}),
+            "error": f"{type(error).__name__}: {error}",
+            "failed_at": time.time(),
+        }
+        _update_manifest(root, job, entry)
+    return entry
+
+
+def read_result(job: str, root: Path = settings.PRECOMPUTED_DIR, manifest: dict | None = None):
+    """``(frame, manifest entry)`` for ``job``: ``(None, entry)`` for a job that failed
+    before it ever wrote a result, ``(None, None)`` when it never ran."""
+    entry = (manifest if manifest is not None else read_manifest(root)).get(job)
+    if entry is None:
+        return None, None
+    if "file" not in entry:
+        return None, entry
+    path = Path(root) / entry["file"]
+    try:
+        if entry["format"] == "parquet":
+            frame, _ = read_parquet(path)
+            return frame, entry
+        frame = pd.read_json(StringIO(path.read_text()), orient="records")
+    except (OSError, ValueError) as e:
+        print(f"⚠ Could not read precomputed {job} from {path}: {e}")
+        return None, None
+    index = entry.get("index")
+    if index and index in frame.columns:
+        frame = frame.set_index(index)
+        if index == "Date":
+            frame.index = pd.to_datetime(frame.index)
+    return frame, entry
+
+
+def read_results(root: Path = settings.PRECOMPUTED_DIR) -> dict:
+    """Every readable or failed job in the manifest: ``job -> (frame or None, entry)``."""
+    manifest = read_manifest(root)
+    results = {}
+    for job in manifest:
+        frame, entry = read_result(job, root, manifest)
+        if entry is not None:
+            results[job] = (frame, entry)
+    return results
@@ -0,0 +1,213 @@
+"""Market-data providers.
+
+Every download in the app goes through ``get_provider()``. All providers return
+frames in yfinance's (Price, Ticker) column layout:
+
+- ``YahooProvider`` calls ``yf.download``.
+- ``RecordingProvider`` wraps another provider and saves every response to disk,
+  one Parquet file per (ticker, interval).
+- ``ReplayProvider`` serves those recordings with configurable latency, so the
+  full app can run offline and deterministically.
+- ``FaultInjectingProvider`` wraps another provider and adds latency, random
+  failures and symbols that break any request they are part of, to exercise
+  the bulk downloader's backoff and retries.
+"""
+from __future__ import annotations
+
+import random
+import threading
+from abc import ABC, abstractmethod
+import time
+from pathlib import Path
+
+from utils import settings
+from utils.frames import (
+    assemble,
+    comparable,
+    is_intraday,
+    merge_bars,
+    period_start,
+    read_parquet,
+    read_parquet_meta,
+    safe_filename,
+    slice_period,
+    split_by_ticker,
+    write_parquet,
+)
+from utils.lazy import lazy_import
+
+pd = lazy_import("pandas")
+yf = lazy_import("yfinance")
+
+
+class MarketDataProvider(ABC):
+    name = "base"
+
+    def now(self) -> pd.Timestamp:
+        """Clock that ``period`` windows are measured against."""
+        return pd.Timestamp.now(tz="UTC")
+
+    @abstractmethod
+    def download(self, tickers, period: str | None = None, start=None, interval: str = "1d") -> pd.DataFrame:
+        """Batched multi-ticker download of ``period`` or everything since ``start``."""
+
+    def history(self, ticker: str, period: str = "1y", interval: str = "1d") -> pd.DataFrame:
+        return self.download([ticker], period=period, interval=interval)
+
+    def intraday(self, tickers, interval: str = "5m", period: str = "1d") -> pd.DataFrame:
+        return self.download(tickers, period=period, interval=interval)
+
+
+class YahooProvider(MarketDataProvider):
+    name = "yahoo"
+
+    def download(self, tickers, period=None, start=None, interval="1d"):
+        kwargs = {"start": start} if start is not None else {"period": period}
+        return yf.download(tickers=list(tickers), interval=interval, progress=False, **kwargs)
+
+
+class RecordingProvider(MarketDataProvider):
+    name = "record"
+
+    def __init__(self, inner: MarketDataProvider, root: Path = settings.RECORDINGS_DIR):
+        self.inner = inner
+        self.root = Path(root)
+        self._lock = threading.Lock()
+
+    def now(self):
+        return self.inner.now()
+
+    def download(self, tickers, period=None, start=None, interval="1d"):
+        data = self.inner.download(tickers, period=period, start=start, interval=interval)
+        recorded_at = self.now().isoformat()
+
+        with self._lock:
+            for t, frame in split_by_ticker(data, list(tickers), interval).items():
+                path = self.root / interval / f"{safe_filename(t)}.parquet"
+                if path.exists():
+                    old, _ = read_parquet(path)
+                    frame = merge_bars(old, frame)
+                write_parquet(path, frame, {"moneyflow.recorded_at": recorded_at})
+        return data
+
+
+class ReplayProvider(MarketDataProvider):
+    name = "replay"
+
+    def __init__(self, root: Path = settings.RECORDINGS_DIR, latency: float = 0.0, per_ticker_latency: float = 0.0):
+        self.root = Path(root)
+        self.latency = latency
+        self.per_ticker_latency = per_ticker_latency
+        self._frames = {}
+        self._recorded_at = None
+
+    def _load(self, ticker, interval):
+        key = (ticker, interval)
+        if key not in self._frames:
+            path = self.root / interval / f"{safe_filename(ticker)}.parquet"
+            self._frames[key] = read_parquet(path)[0] if path.exists() else None
+        return self._frames[key]
+
+    def now(self):
+        # Periods are measured from when the recording was made, so a replay of
+        # "1y" returns the same bars no matter when it runs.
+        if self._recorded_at is None:
+            stamps = [
+                read_parquet_meta(path).get("moneyflow.recorded_at")
+                for path in self.root.glob("*/*.parquet")
+            ]
+            stamps = [pd.Timestamp(s) for s in stamps if s]
+            self._recorded_at = max(stamps) if stamps else super().now()
+        return self._recorded_at
+
+    def download(self, tickers, period=None, start=None, interval="1d"):
+        tickers = list(tickers)
+        time.sleep(self.latency + self.per_ticker_latency * len(tickers))
+
+        if start is not None:
+            start = comparable(pd.Timestamp(start), interval)
+            if is_intraday(interval) and start.tzinfo is None:
+                start = start.tz_localize("UTC")
+        else:
+            start = comparable(period_start(period, self.now()), interval)
+
+        frames = {}
+        for t in tickers:
+            frame = self._load(t, interval)
+            if frame is None:
+                continue
+            frame = slice_period(frame, period or "", start, interval)
+            if not frame.empty:
+                frames[t] = frame
+        return assemble(frames, tickers, interval)
+
+
+class FaultInjectingProvider(MarketDataProvider):
+    name = "faulty"
+
+    def __init__(
+        self,
+        inner: MarketDataProvider,
+        error_rate: float = 0.0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        bad_tickers=(),
+        seed: int | None = None,
+    ):
+        self.inner = inner
+        self.error_rate = error_rate
+        self.latency = latency
+        self.jitter = jitter
+        self.bad_tickers = set(bad_tickers)
+        self.calls = 0
+        self.failures = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def now(self):
+        return self.inner.now()
+
+    def download(self, tickers, period=None, start=None, interval="1d"):
+        tickers = list(tickers)
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            fail = self._rng.random() < self.error_rate
+        time.sleep(delay)
+
+        bad = self.bad_tickers.intersection(tickers)
+        if fail or bad:
+            with self._lock:
+                self.failures += 1
+            reason = f"bad symbols {sorted(bad)}" if bad else "injected failure"
+            raise ConnectionError(f"{reason} ({len(tickers)} tickers)")
+        return self.inner.download(tickers, period=period, start=start, interval=interval)
+
+
+_provider = None
+
+
+def get_provider() -> MarketDataProvider:
+    global _provider
+    if _provider is None:
+        if settings.PROVIDER == "replay":
+            _provider = ReplayProvider(latency=settings.REPLAY_LATENCY)
+        elif settings.PROVIDER == "record":
+            _provider = RecordingProvider(YahooProvider())
+        elif settings.PROVIDER == "yahoo":
+            _provider = YahooProvider()
+        else:
+            raise ValueError(f"Unknown MONEYFLOW_PROVIDER: {settings.PROVIDER}")
+        if settings.FAULT_ERROR_RATE or settings.FAULT_LATENCY:
+            _provider = FaultInjectingProvider(
+                _provider,
+                error_rate=settings.FAULT_ERROR_RATE,
+                latency=settings.FAULT_LATENCY,
+            )
+    return _provider
+
+
+def set_provider(provider: MarketDataProvider):
+    """Swap the process-wide provider (benchmarks, load tests, other backends)."""
+    global _provider
+    _provider = provider
@@ -0,0 +1,249 @@
+"""Live intraday data: one background poller per (ticker set, interval).
+
+Each poller seeds a fixed-size ring buffer with the current session once, then
+asks the provider only for bars newer than the last one it holds. Every session
+reads the same buffer snapshot, so refresh cost scales with new bars instead of
+sessions × full-day history. Pollers nobody reads for ``IDLE_TIMEOUT`` seconds stop.
+
+Each poller also folds new bars into streaming indicators (``utils.streaming``),
+so live RSI, volume average and returns cost O(1) per new bar and ticker.
+"""
+from __future__ import annotations
+
+import copy
+import threading
+import time
+
+from utils.frames import is_intraday
+from utils.lazy import lazy_import
+from utils.panel import PricePanel
+from utils.providers import get_provider
+from utils.streaming import StreamingIndicators
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+IDLE_TIMEOUT = 600
+
+
+def interval_seconds(interval: str) -> int:
+    if not is_intraday(interval):
+        raise ValueError(f"Not an intraday interval: {interval}")
+    unit = 3600 if interval.endswith("h") else 60
+    return int(interval[:-1]) * unit
+
+
+class BarRing:
+    """Fixed-capacity time × ticker bar buffer; the oldest bars fall off the front."""
+
+    def __init__(self, tickers, capacity: int, fields=FIELDS):
+        self.tickers = list(tickers)
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self.ts = np.zeros(capacity, dtype=np.int64)
+        self.data = {f: np.full((capacity, len(self.tickers)), np.nan) for f in self.fields}
+        self.start = 0
+        self.size = 0
+        self.revised_ts = None  # earliest bar the last append revised (ns), else None
+
+    def _pos(self, i: int) -> int:
+        return (self.start + i) % self.capacity
+
+    def last_ts(self):
+        if not self.size:
+            return None
+        return pd.Timestamp(self.ts[self._pos(self.size - 1)], tz="UTC")
+
+    def newer_than(self, ts) -> int:
+        """How many of the last bars are stamped after ``ts`` (ns); walks back from the end."""
+        k = 0
+        while k < self.size and self.ts[self._pos(self.size - 1 - k)] > ts:
+            k += 1
+        return k
+
+    def rows(self, field: str, k: int):
+        """The last ``k`` rows of ``field``, oldest first."""
+        return self.data[field][self._pos(np.arange(self.size - k, self.size))]
+
+    def append(self, data) -> int:
+        """Add bars from a yfinance-shaped frame; returns bars added or revised."""
+        panel = PricePanel.from_frame(data, self.tickers)
+        if panel.empty:
+            return 0
+
+        cols = np.array([self.tickers.index(t) for t in panel.tickers])
+        index = panel.index.tz_convert("UTC") if panel.index.tz else panel.index
+        stamps = index.as_unit("ns").asi8
+        changed = 0
+        self.revised_ts = None
+
+        for i, ts in enumerate(stamps):
+            row = {f: panel.fields[f][i] for f in self.fields if f in panel.fields}
+            last = self.ts[self._pos(self.size - 1)] if self.size else None
+
+            if last is not None and ts <= last:
+                # A revision of a bar we hold (usually the still-forming last one).
+                back = self.size - 1
+                while back >= 0 and self.ts[self._pos(back)] > ts:
+                    back -= 1
+                if back < 0 or self.ts[self._pos(back)] != ts:
+                    continue
+                pos = self._pos(back)
+                for f, values in row.items():
+                    old = self.data[f][pos, cols]
+                    merged = np.where(np.isnan(values), old, values)
+                    if not np.array_equal(merged, old, equal_nan=True):
+                        self.data[f][pos, cols] = merged
+                        changed = max(changed, 1)
+                        self.revised_ts = ts if self.revised_ts is None else min(self.revised_ts, ts)
+                continue
+
+            if self.size == self.capacity:
+                pos = self.start
+                self.start = self._pos(1)
+            else:
+                pos = self._pos(self.size)
+                self.size += 1
+            self.ts[pos] = ts
+            for f in self.fields:
+                self.data[f][pos] = np.nan
+            for f, values in row.items():
+                self.data[f][pos, cols] = values
+            changed += 1
+        return changed
+
+    def to_panel(self) -> PricePanel:
+        order = self._pos(np.arange(self.size))
+        index = pd.DatetimeIndex(pd.to_datetime(self.ts[order], utc=True), name="Datetime")
+        return PricePanel(index, self.tickers, {f: self.data[f][order] for f in self.fields})
+
+
+class IntradayPoller:
+    def __init__(self, tickers, interval: str, refresh_seconds: float, capacity: int | None = None):
+        self.tickers = list(tickers)
+        self.interval = interval
+        self.refresh_seconds = refresh_seconds
+        # Default: one full 24h day of bars, enough for crypto sessions.
+        self.ring = BarRing(self.tickers, capacity or 86400 // interval_seconds(interval))
+        self.version = 0
+        self.last_access = time.monotonic()
+        self.polls = 0
+        self.bars_received = 0
+        self._snapshot = None
+        # Streaming indicators through every bar but the last, which may still be
+        # forming; ``_live`` adds the last bar to a copy.
+        self._folded = None
+        self._folded_ts = None
+        self._live = None
+        self._indicators = None
+        self.rescans = 0
+        self._lock = threading.Lock()
+        self._seeded = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"poller-{interval}")
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _fetch(self):
+        provider = get_provider()
+        last = self.ring.last_ts()
+        if last is None:
+            return provider.intraday(self.tickers, interval=self.interval, period="1d")
+        # Start at the last bar we hold so a still-forming bar gets its final values.
+        return provider.download(self.tickers, start=last.to_pydatetime(), interval=self.interval)
+
+    def poll(self) -> int:
+        try:
+            data = self._fetch()
+        except Exception as e:
+            print(f"⚠ Live poll failed for {self.tickers} ({self.interval}): {e}")
+            return 0
+        return self.ingest(data)
+
+    def ingest(self, data) -> int:
+        """Add a yfinance-shaped frame of bars; returns bars added or revised."""
+        with self._lock:
+            changed = self.ring.append(data)
+            self.polls += 1
+            self.bars_received += changed
+            if changed:
+                self._fold()
+                self.version += 1
+                self._snapshot = None
+                self._indicators = None
+        self._seeded.set()
+        return changed
+
+    def _fold(self):
+        """Fold the new bars into the streaming indicators.
+
+        Only bars after the last folded one are read. A revision of an already
+        folded bar (anything but the still-forming last bar) cannot be undone in
+        O(1) state, so the indicators are rebuilt from the whole ring instead.
+        """
+        ring = self.ring
+        k = ring.size if self._folded_ts is None else ring.newer_than(self._folded_ts)
+        revised = ring.revised_ts is not None and self._folded_ts is not None and ring.revised_ts <= self._folded_ts
+        if self._folded is None or k == ring.size or revised:
+            self._folded = StreamingIndicators(self.tickers)
+            self.rescans += 1
+            k = ring.size
+
+        close, volume = ring.rows("Close", k), ring.rows("Volume", k)
+        self._folded.update_many(close[:-1], volume[:-1])
+        self._folded_ts = ring.ts[ring._pos(ring.size - 2)] if ring.size > 1 else None
+        self._live = copy.deepcopy(self._folded)
+        self._live.update(close[-1], volume[-1])
+
+    def _run(self):
+        self.poll()
+        self._seeded.set()
+        while not self._stop.wait(self.refresh_seconds):
+            if time.monotonic() - self.last_access > IDLE_TIMEOUT:
+                break
+            self.poll()
+
+    def snapshot(self) -> PricePanel:
+        """Panel of the buffered bars, built once per version and shared by all readers."""
+        self.last_access = time.monotonic()
+        self._seeded.wait(timeout=60)
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = self.ring.to_panel()
+            return self._snapshot
+
+    def indicators(self):
+        """Streaming RSI, volume average and returns at the latest bar, one row per ticker."""
+        self.last_access = time.monotonic()
+        self._seeded.wait(timeout=60)
+        with self._lock:
+            if self._indicators is None and self._live is not None:
+                self._indicators = pd.DataFrame(self._live.snapshot(), index=pd.Index(self.tickers, name="Ticker"))
+            return self._indicators
+
+
+_pollers = {}
+_pollers_lock = threading.Lock()
+
+
+def get_poller(tickers, interval: str, refresh_seconds: float) -> IntradayPoller:
+    """The shared poller for this ticker set and interval, started on first use."""
+    key = (tuple(tickers), interval)
+    with _pollers_lock:
+        poller = _pollers.get(key)
+        if poller is None or not poller.alive:
+            poller = IntradayPoller(tickers, interval, refresh_seconds).start()
+            _pollers[key] = poller
+        poller.refresh_seconds = min(poller.refresh_seconds, refresh_seconds)
+        poller.last_access = time.monotonic()
+    return poller
@@ -0,0 +1,212 @@
+"""Macro regime timeline, scored for every date at once.
+
+Rules live in ``config/regime_rules.json``: each names a few macro assets and
+the direction each must have moved over the trailing window (``"up"`` or
+``"down"``, optionally by at least ``min_move_pct``). A rule's score on a date is
+the share of its conditions met; it is active when all are met.
+
+Window returns come from one searchsorted lookup per date on the forward-filled
+log prices, so each asset is compared against its own last price on or before
+``date - window_days`` whatever its trading calendar. ``RegimeEngine`` keeps the
+last timeline and, when the panel only rolled forward (new days, a revised last
+bar, old days dropped off the front), scores just the rows whose inputs changed.
+"""
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+
+from utils import settings
+from utils.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+DIRECTIONS = {"up": 1.0, "down": -1.0}
+
+
+class RegimeRule:
+    __slots__ = ("name", "note", "assets", "signs", "min_move")
+
+    def __init__(self, name: str, note: str, when: dict, min_move_pct: float = 0.0):
+        self.name = name
+        self.note = note
+        self.assets = list(when)
+        self.signs = [DIRECTIONS[d] for d in when.values()]
+        self.min_move = np.log1p(min_move_pct / 100)
+
+
+class RegimeRules:
+    def __init__(self, rules, window_days: int):
+        self.rules = list(rules)
+        self.window_days = window_days
+
+    @property
+    def assets(self) -> list:
+        return list(dict.fromkeys(a for r in self.rules for a in r.assets))
+
+
+def load_rules(path: Path = settings.REGIME_RULES_PATH) -> RegimeRules:
+    raw = json.loads(Path(path).read_text())
+    rules = []
+    for spec in raw["rules"]:
+        when = spec.get("when") or {}
+        if not when:
+            raise ValueError(f"{path}: rule {spec.get('name')!r} has no conditions")
+        bad = [d for d in when.values() if d not in DIRECTIONS]
+        if bad:
+            raise ValueError(f"{path}: rule {spec['name']!r} has unknown directions {bad}")
+        rules.append(RegimeRule(spec["name"], spec.get("note", spec["name"]), when, float(spec.get("min_move_pct", 0))))
+    return RegimeRules(rules, int(raw.get("window_days", 20)))
+
+
+_rules = None
+
+
+def get_rules() -> RegimeRules:
+    global _rules
+    if _rules is None:
+        _rules = load_rules()
+    return _rules
+
+
+class RegimeTimeline:
+    """Per date × rule: ``scores`` (share of conditions met, NaN without data) and ``active``."""
+
+    def __init__(self, index, rules, scores, active):
+        self.index = pd.DatetimeIndex(index)
+        self.rules = list(rules)
+        self.scores = scores
+        self.active = active
+
+    @property
+    def empty(self) -> bool:
+        return len(self.index) == 0
+
+    def frame(self, field: str = "scores") -> pd.DataFrame:
+        return pd.DataFrame(getattr(self, field), index=self.index, columns=[r.name for r in self.rules])
+
+    def current(self) -> list:
+        """``(rule, since)`` for every rule active on the last date, ``since`` the run's first date."""
+        if self.empty:
+            return []
+        out = []
+        for k in np.flatnonzero(self.active[-1]):
+            off = np.flatnonzero(~self.active[:, k])
+            out.append((self.rules[k], self.index[off[-1] + 1 if len(off) else 0]))
+        return out
+
+
+def _window_starts(index: pd.DatetimeIndex, window_days: int, ends):
+    """Row each window ending at ``ends`` starts from (-1 where there is no history that far back)."""
+    return index.searchsorted(index[ends] - pd.Timedelta(days=window_days), side="right") - 1
+
+
+def _window_returns(logp, index: pd.DatetimeIndex, window_days: int, rows):
+    """Log return over ``window_days`` ending at each row in ``rows`` (NaN before any history)."""
+    ends = np.arange(len(index))[rows]
+    starts = _window_starts(index, window_days, ends)
+    out = np.full((len(ends), logp.shape[1]), np.nan)
+    ok = starts >= 0
+    out[ok] = logp[ends[ok]] - logp[starts[ok]]
+    return out
+
+
+def score(rules: RegimeRules, returns, columns: list):
+    """``(scores, active)`` for rows of window returns (rows × ``columns``)."""
+    col = {c: j for j, c in enumerate(columns)}
+    n_rows, n_rules = len(returns), len(rules.rules)
+    scores = np.full((n_rows, n_rules), np.nan, dtype=np.float32)
+    active = np.zeros((n_rows, n_rules), dtype=bool)
+    for k, rule in enumerate(rules.rules):
+        idx = [col[a] for a in rule.assets if a in col]
+        if len(idx) < len(rule.assets):
+            continue  # an asset the rule needs isn't loaded
+        moves = returns[:, idx] * np.array(rule.signs)
+        met = moves > rule.min_move
+        known = ~np.isnan(moves).any(axis=1)
+        scores[known, k] = met[known].mean(axis=1)
+        active[:, k] = known & met.all(axis=1)
+    return scores, active
+
+
+class RegimeEngine:
+    def __init__(self, rules: RegimeRules, window_days: int | None = None):
+        self.rules = rules
+        self.window_days = window_days or rules.window_days
+        self.rows_scored = 0
+        self._logp = None
+        self._columns = None
+        self._timeline = None
+        self._lock = threading.Lock()
+
+    def _reusable(self, logp, index, columns):
+        """``(mask, old rows)``: rows of the new frame whose scores carry over from the last timeline.
+
+        The frames are aligned by date, so a window that rolled forward (its first
+        rows dropped) still reuses the overlap. A row carries over when its price
+        and its window's start price are unchanged; the last scored row is always
+        rescored since its bar may have been revised.
+        """
+        none = np.zeros(len(index), dtype=bool), None
+        old = self._timeline
+        if old is None or old.empty or columns != self._columns:
+            return none
+        n = index.searchsorted(old.index[-1])
+        pos = old.index.get_indexer(index[:n])
+        if n == 0 or (pos < 0).any() or (np.diff(pos) != 1).any():
+            return none  # the overlap is not one contiguous run of old dates
+
+        same = np.zeros(len(index), dtype=bool)
+        same[:n] = (
+            (logp[:n] == self._logp[pos]) | (np.isnan(logp[:n]) & np.isnan(self._logp[pos]))
+        ).all(axis=1)
+        starts = _window_starts(index, self.window_days, np.arange(n))
+        # With no start row in the new frame the row scores NaN now, whatever it scored before.
+        reuse = np.zeros(len(index), dtype=bool)
+        reuse[:n] = same[:n] & (starts >= 0) & same[np.maximum(starts, 0)]
+        return reuse, pos
+
+    def update(self, prices: pd.DataFrame) -> RegimeTimeline:
+        """Timeline for ``prices`` (date × asset label); only rows whose inputs changed are recomputed."""
+        columns = [a for a in self.rules.assets if a in prices.columns]
+        frame = prices[columns].sort_index()
+        index = frame.index
+        logp = np.log(frame.where(frame > 0)).ffill().to_numpy(dtype=np.float64)
+        n_rules = len(self.rules.rules)
+
+        with self._lock:
+            reuse, pos = self._reusable(logp, index, columns)
+            fresh = np.flatnonzero(~reuse)
+
+            returns = _window_returns(logp, index, self.window_days, fresh)
+            fresh_scores, fresh_active = score(self.rules, returns, columns)
+            self.rows_scored += len(fresh)
+
+            scores = np.empty((len(index), n_rules), dtype=np.float32)
+            active = np.empty((len(index), n_rules), dtype=bool)
+            scores[fresh], active[fresh] = fresh_scores, fresh_active
+            if reuse.any():
+                kept = pos[reuse[:len(pos)]]
+                scores[reuse], active[reuse] = self._timeline.scores[kept], self._timeline.active[kept]
+
+            self._logp = logp
+            self._columns = columns
+            self._timeline = RegimeTimeline(index, self.rules.rules, scores, active)
+            return self._timeline
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def regime_timeline(prices: pd.DataFrame, window_days: int | None = None) -> RegimeTimeline:
+    """Timeline from the process-wide engine for ``window_days``, extended in place across reruns."""
+    rules = get_rules()
+    window_days = window_days or rules.window_days
+    with _engines_lock:
+        engine = _engines.get(window_days)
+        if engine is None:
+            engine = _engines[window_days] = RegimeEngine(rules, window_days)
+    return engine.update(prices)
@@ -0,0 +1,127 @@
+"""All-pairs relative strength (ratio trends) for a price matrix.
+
+The log of a ratio chart is a difference of log prices, log(P_i / P_j) =
+log P_i - log P_j, and returns, least-squares slopes and variances are all
+linear or bilinear in it. So every pair statistic comes from one vector per
+asset plus a single covariance matrix: O(N·T + N²·T) for all N² pairs instead of
+building N² ratio series. Rows are aligned by carrying each asset's last price
+forward, so 24/7 crypto and exchange-hours equities share one time axis.
+"""
+from __future__ import annotations
+
+from utils.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Assets with fewer valid prices than this in the window are left out.
+MIN_OBSERVATIONS = 5
+
+
+class PairStrength:
+    """Pair statistics with base ``i`` in rows and quote ``j`` in columns.
+
+    ``ret``: log return of the ratio over the window; ``slope``: its least-squares
+    trend per bar; ``r2``: how cleanly the ratio trended (0 = noise, 1 = straight
+    line). ``score`` = ``ret * r2`` favours steady outperformance over spikes.
+    """
+
+    def __init__(self, tickers, ret, slope, r2, bars: int):
+        self.tickers = list(tickers)
+        self.ret = ret
+        self.slope = slope
+        self.r2 = r2
+        self.score = ret * r2
+        self.bars = bars
+
+    @property
+    def empty(self) -> bool:
+        return len(self.tickers) < 2
+
+    @property
+    def n_pairs(self) -> int:
+        n = len(self.tickers)
+        return n * (n - 1) // 2
+
+    def matrix(self, field: str = "ret") -> pd.DataFrame:
+        return pd.DataFrame(getattr(self, field), index=self.tickers, columns=self.tickers)
+
+    def leaderboard(self, top: int = 25, by: str = "score") -> pd.DataFrame:
+        """Strongest ``top`` pairs, each oriented so the outperformer is the base."""
+        if self.empty:
+            return pd.DataFrame(columns=["Outperformer", "Underperformer", "Ratio return %", "Trend R²", "Score"])
+        values = getattr(self, by)
+        # Each unordered pair appears once, in the orientation where the base leads.
+        i, j = np.nonzero(np.triu(np.ones_like(values, dtype=bool), k=1))
+        flip = self.ret[i, j] < 0
+        i, j = np.where(flip, j, i), np.where(flip, i, j)
+        keys = np.nan_to_num(values[i, j], nan=-np.inf)
+
+        top = min(top, len(keys))
+        best = np.argpartition(-keys, top - 1)[:top] if top < len(keys) else np.arange(len(keys))
+        best = best[np.argsort(-keys[best], kind="stable")]
+        i, j = i[best], j[best]
+        names = np.array(self.tickers, dtype=object)
+        return pd.DataFrame({
+            "Outperformer": names[i],
+            "Underperformer": names[j],
+            "Ratio return %": np.expm1(self.ret[i, j]) * 100,
+            "Trend R²": self.r2[i, j],
+            "Score": self.score[i, j],
+        })
+
+    def ranking(self) -> pd.DataFrame:
+        """Per asset: share of pairs it wins and its mean ratio return against the rest."""
+        valid = ~np.isnan(self.ret)
+        np.fill_diagonal(valid, False)
+        others = valid.sum(axis=1)
+        with np.errstate(invalid="ignore"):
+            wins = np.where(valid, self.ret > 0, False).sum(axis=1) / others
+            mean_ret = np.where(valid, self.ret, 0.0).sum(axis=1) / others
+        table = pd.DataFrame({
+            "Pairs won %": wins * 100,
+            "Avg ratio return %": np.expm1(mean_ret) * 100,
+            "Avg score": np.nanmean(np.where(valid, self.score, np.nan), axis=1) if len(self.tickers) > 1 else np.nan,
+        }, index=self.tickers)
+        return table.sort_values("Avg ratio return %", ascending=False)
+
+
+def pair_strength(closes: pd.DataFrame, lookback: int | None = None,
+                  min_observations: int = MIN_OBSERVATIONS) -> PairStrength:
+    """Ratio trends for every pair of columns of ``closes`` over the last ``lookback`` rows."""
+    window = closes if lookback is None else closes.iloc[-lookback:]
+    window = window.loc[:, window.notna().sum() >= min_observations]
+    tickers = list(window.columns)
+    n = len(tickers)
+    if n < 2:
+        empty = np.empty((n, n))
+        return PairStrength(tickers, empty, empty, empty, len(window))
+
+    # Align rows: carry prices forward, and hold late starters flat until their first print.
+    logp = np.log(window.where(window > 0)).ffill().bfill().to_numpy(dtype=np.float64)
+    t = len(logp)
+
+    ret = logp[-1] - logp[0]
+    centered = logp - logp.mean(axis=0)
+    x = np.arange(t, dtype=np.float64) - (t - 1) / 2
+    sxx = x @ x
+    slope = x @ centered / sxx
+    cov = centered.T @ centered                  # Σ (a - ā)(b - b̄) for every pair
+    var = np.diag(cov)
+
+    pair_ret = ret[:, None] - ret[None, :]
+    pair_slope = slope[:, None] - slope[None, :]
+    pair_var = var[:, None] + var[None, :] - 2 * cov
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r2 = np.clip(pair_slope ** 2 * sxx / pair_var, 0.0, 1.0)
+    r2[~(pair_var > 1e-18)] = 0.0
+    np.fill_diagonal(pair_ret, np.nan)
+    np.fill_diagonal(pair_slope, np.nan)
+    np.fill_diagonal(r2, np.nan)
+    return PairStrength(tickers, pair_ret, pair_slope, r2, t)
+
+
+def ratio_series(base: pd.Series, quote: pd.Series) -> pd.Series:
+    """``base / quote`` on the union of both time axes, each side carried forward."""
+    df = pd.concat([base, quote], axis=1, keys=["base", "quote"]).sort_index().ffill().dropna()
+    return (df["base"] / df["quote"]).rename(f"{base.name} / {quote.name}")
@@ -0,0 +1,133 @@
+"""Multi-horizon return engine that reads only the rows it needs.
+
+``tail_returns`` gives, for every asset, the % return over each horizon ending at
+the latest bar. A horizon is either
+
+- an int: that many rows back, identical to ``df.pct_change(n).iloc[-1] * 100``, or
+- a ``pd.DateOffset``/``pd.Timedelta``: calendar-aware. Each asset's return runs
+  from its own last valid price back to its last valid price on or before that
+  date minus the offset, so crypto (7-day) and equity (5-day) rows in the macro
+  frame are compared over the same stretch of time.
+
+Row horizons touch two rows per horizon; calendar horizons scan only the rows
+inside the longest lookback.
+"""
+from __future__ import annotations
+
+from utils.lazy import lazy_import
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+HEATMAP_HORIZONS = {
+    "1D": 1,
+    "1W": 5,
+    "1M": 21,
+    "3M": 63,
+    "6M": 126,
+    "1Y": 252,
+}
+
+
+def calendar_horizons() -> dict:
+    """Calendar equivalents of ``HEATMAP_HORIZONS``."""
+    return {
+        "1D": pd.DateOffset(days=1),
+        "1W": pd.DateOffset(weeks=1),
+        "1M": pd.DateOffset(months=1),
+        "3M": pd.DateOffset(months=3),
+        "6M": pd.DateOffset(months=6),
+        "1Y": pd.DateOffset(years=1),
+    }
+
+
+MOMENTUM_HORIZONS = {"20D": 20, "60D": 60}
+
+
+def calendar_momentum_horizons() -> dict:
+    """Calendar equivalents of ``MOMENTUM_HORIZONS``."""
+    return {"20D": pd.DateOffset(weeks=4), "60D": pd.DateOffset(weeks=12)}
+
+
+# Rows before a calendar lookback that may still hold an asset's reference price
+# (weekends, holidays, a missed print).
+_CALENDAR_SLACK_ROWS = 10
+
+
+def _row_returns(values, periods: int):
+    if len(values) <= periods:
+        return np.full(values.shape[1], np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return values[-1] / values[-1 - periods] - 1
+
+
+def _calendar_returns(values, index, offsets: dict) -> dict:
+    n_rows, n_cols = values.shape
+    valid = ~np.isnan(values)
+    cols = np.arange(n_cols)
+
+    last_row = n_rows - 1 - np.argmax(valid[::-1], axis=0)
+    has_data = valid.any(axis=0)
+    last_price = values[last_row, cols]
+    last_date = index[last_row]
+
+    # Only rows from the earliest possible reference date onward are scanned.
+    earliest = min(last_date.min() - offset for offset in offsets.values())
+    lo = max(int(index.searchsorted(earliest, side="right")) - 1 - _CALENDAR_SLACK_ROWS, 0)
+
+    window = valid[lo:]
+    rows = np.where(window, np.arange(lo, n_rows)[:, None], -1)
+    last_valid_upto = np.maximum.accumulate(rows, axis=0)
+
+    out = {}
+    for label, offset in offsets.items():
+        targets = pd.DatetimeIndex(last_date - offset)
+        at = index.searchsorted(targets, side="right") - 1
+        ok = has_data & (at >= lo)
+        ref_row = np.full(n_cols, -1)
+        ref_row[ok] = last_valid_upto[at[ok] - lo, cols[ok]]
+        ok &= ref_row >= 0
+
+        ret = np.full(n_cols, np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ret[ok] = last_price[ok] / values[ref_row[ok], cols[ok]] - 1
+        out[label] = ret
+    return out
+
+
+def tail_returns(prices, horizons: dict) -> pd.DataFrame:
+    """% returns ending at the latest bar: assets × horizon labels."""
+    if prices is None or prices.empty:
+        return pd.DataFrame(columns=list(horizons))
+
+    values = prices.to_numpy(dtype=np.float64)
+    out = {}
+    offsets = {}
+    for label, horizon in horizons.items():
+        if isinstance(horizon, (int, np.integer)):
+            out[label] = _row_returns(values, int(horizon))
+        else:
+            offsets[label] = horizon
+
+    if offsets:
+        out.update(_calendar_returns(values, pd.DatetimeIndex(prices.index), offsets))
+
+    return pd.DataFrame(
+        {label: out[label] * 100 for label in horizons},
+        index=prices.columns,
+    )
+
+
+def return_matrix(prices, calendar: bool = False) -> pd.DataFrame:
+    """The heatmap's assets × ``HEATMAP_HORIZONS`` % returns (calendar-aware if asked)."""
+    return tail_returns(prices, calendar_horizons() if calendar else HEATMAP_HORIZONS)
+
+
+def momentum_matrix(prices, calendar: bool = False) -> pd.DataFrame:
+    """Short vs long momentum: assets × ``MOMENTUM_HORIZONS`` % returns."""
+    return tail_returns(prices, calendar_momentum_horizons() if calendar else MOMENTUM_HORIZONS)
+
+
+def momentum_ranking(prices, window: int) -> pd.Series:
+    """% return over the last ``window`` bars per asset, strongest first."""
+    return tail_returns(prices, {"Momentum %": window})["Momentum %"].sort_values(ascending=False)
@@ -0,0 +1,201 @@
+"""Vectorized unusual-volume scanner.
+
+``scan_volume`` produces the intraday scanner table for a whole ``PricePanel`` with
+2D array operations instead of one ``volume_price_signal`` call per ticker, and
+returns the same rows. Throughput target: at least 50,000 tickers/second on a
+full 1m session (390 bars), i.e. a 3,000-symbol watchlist in well under 100 ms.
+"""
+from __future__ import annotations
+
+from utils.analytics_cache import cached_metric
+from utils.indicators import (
+    DISTRIBUTION,
+    INSUFFICIENT_DATA,
+    NO_SIGNAL,
+    STRONG_ACCUMULATION,
+    WEAK_RALLY,
+    WEAK_SELLING,
+)
+from utils.lazy import lazy_import
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+SCANNER_COLUMNS = [
+    "Ticker",
+    "Last Price",
+    "Cumulative Volume",
+    "Avg Daily Volume",
+    "% of Avg Volume",
+    "Signal",
+]
+
+
+def tail_valid(values, mask, k: int):
+    """Last ``k`` non-NaN values of every column, bottom-aligned.
+
+    Returns ``(tail, counts)``: ``tail`` is k × N with NaN padding on top for
+    columns holding fewer than ``k`` valid values; ``counts`` is valid values per column.
+    """
+    counts = mask.sum(axis=0)
+    if len(values) >= k and counts.min(initial=len(values)) == len(values):
+        return values[len(values) - k:], counts
+
+    # Rank every valid value by how many valid values sit at or below it; ranks
+    # 1..k are the tail, and rank r lands in row k - r.
+    rank = np.cumsum(mask[::-1], axis=0, dtype=np.int32)[::-1]
+    rows, cols = np.nonzero(mask & (rank <= k))
+    tail = np.full((k, values.shape[1]), np.nan)
+    tail[k - rank[rows, cols], cols] = values[rows, cols]
+    return tail, counts
+
+
+def classify(price_change, vol_change, price_threshold: float = 0.0, vol_threshold: float = 0.0):
+    """Vectorized equivalent of the branches in ``volume_price_signal``.
+
+    With non-zero thresholds a price move must exceed ``price_threshold`` (either
+    way) to count, and volume must beat its average by more than ``vol_threshold``.
+    """
+    up = price_change > price_threshold
+    down = price_change < -price_threshold
+    heavy = vol_change > vol_threshold
+    return np.select(
+        [up & heavy, up & ~heavy, down & heavy, down & ~heavy],
+        [STRONG_ACCUMULATION, WEAK_RALLY, DISTRIBUTION, WEAK_SELLING],
+        default=NO_SIGNAL,
+    ).astype(object)
+
+
+def volume_price_signals(price, price_mask, volume, volume_mask, window: int = 20,
+                         price_threshold: float = 0.0, vol_threshold: float = 0.0):
+    """``volume_price_signal`` for every column of time × ticker arrays at once."""
+    k = window + 1
+    price_tail, price_count = tail_valid(price, price_mask, k)
+    vol_tail, vol_count = tail_valid(volume, volume_mask, k)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price_change = price_tail[-1] / price_tail[0] - 1
+        vol_ma = vol_tail[1:].mean(axis=0)
+        vol_change = np.where(vol_ma != 0, vol_tail[-1] / vol_ma - 1, 0.0)
+
+    signals = classify(price_change, vol_change, price_threshold, vol_threshold)
+    signals[(price_count < k) | (vol_count < k)] = INSUFFICIENT_DATA
+    return signals
+
+
+def _resolve(panel, tickers) -> list:
+    """The requested tickers the panel has, in request order (all of them for None)."""
+    return [t for t in (tickers or panel.tickers) if t in panel]
+
+
+def _select(panel, tickers):
+    tickers = _resolve(panel, tickers)
+    cols = np.array([panel.col[t] for t in tickers], dtype=np.intp)
+    if len(cols) == len(panel.tickers) and (cols == np.arange(len(cols))).all():
+        cols = slice(None)  # whole panel in order: use the arrays without copying
+
+    return (
+        tickers,
+        panel.fields["Close"][:, cols],
+        panel.valid["Close"][:, cols],
+        panel.fields["Volume"][:, cols],
+        panel.valid["Volume"][:, cols],
+    )
+
+
+def _has_scan_fields(panel) -> bool:
+    return panel is not None and not panel.empty and "Close" in panel.fields and "Volume" in panel.fields
+
+
+def signal_series(panel, tickers=None, window: int = 20, price_threshold: float = 0.0, vol_threshold: float = 0.0):
+    """Volume/price signal per ticker that has both prices and volumes (cached)."""
+    if not _has_scan_fields(panel):
+        return pd.Series(dtype=object)
+
+    def compute():
+        names, price, price_mask, volume, volume_mask = _select(panel, tickers)
+        keep = price_mask.any(axis=0) & volume_mask.any(axis=0)
+        signals = volume_price_signals(
+            price, price_mask, volume, volume_mask, window, price_threshold, vol_threshold
+        )
+        return pd.Series(signals[keep], index=np.array(names, dtype=object)[keep], name="Signal")
+
+    params = {
+        "tickers": tuple(_resolve(panel, tickers)),
+        "window": window,
+        "price_threshold": price_threshold,
+        "vol_threshold": vol_threshold,
+    }
+    return cached_metric("volume_price_signals", panel, params, compute)
+
+
+def scan_volume(panel, avg_vol, tickers=None, window: int = 20, price_threshold: float = 0.0,
+                vol_threshold: float = 0.0):
+    """Scanner table (one row per ticker with data) sorted by % of average volume."""
+    if not _has_scan_fields(panel):
+        return pd.DataFrame()
+
+    tickers, price, price_mask, volume, volume_mask = _select(panel, tickers)
+    if not tickers:
+        return pd.DataFrame()
+
+    last_price, price_count = tail_valid(price, price_mask, 1)
+    cum_vol, vol_count = tail_valid(volume, volume_mask, 1)
+    keep = (price_count > 0) & (vol_count > 0)
+    if not keep.any():
+        return pd.DataFrame()
+
+    signals = signal_series(panel, tickers, window, price_threshold, vol_threshold)
+
+    avg = pd.Series(avg_vol, dtype=np.float64).reindex(tickers).to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(avg > 0, cum_vol[0] / avg * 100, np.nan)
+
+    avg_kept = np.trunc(avg[keep])
+    df = pd.DataFrame({
+        "Ticker": np.array(tickers, dtype=object)[keep],
+        "Last Price": last_price[0][keep],
+        "Cumulative Volume": np.trunc(cum_vol[0][keep]).astype(np.int64),
+        "Avg Daily Volume": avg_kept if np.isnan(avg_kept).any() else avg_kept.astype(np.int64),
+        "% of Avg Volume": pct[keep],
+        "Signal": signals.to_numpy(),
+    })
+    return df.sort_values("% of Avg Volume", ascending=False)
+
+
+def cached_scan(panel, avg_vol, tickers=None, window: int = 20, price_threshold: float = 0.0,
+                vol_threshold: float = 0.0):
+    """``scan_volume`` memoized on the panel, the averages and the parameters."""
+    params = {
+        "tickers": tuple(_resolve(panel, tickers)),
+        "window": window,
+        "price_threshold": price_threshold,
+        "vol_threshold": vol_threshold,
+    }
+    return cached_metric(
+        "volume_scan",
+        (panel, avg_vol),
+        params,
+        lambda: scan_volume(panel, avg_vol, tickers, window, price_threshold, vol_threshold),
+    )
+
+
+# -----------------------------
+# Signal parameters
+# -----------------------------
+# Defaults match ``volume_price_signal``. A backtest sweep (utils/backtest.py) on
+# the scanner's own bars can replace them for one session; the adopted set records
+# the bar interval it was tested on and only applies to bars of that interval.
+DEFAULT_SIGNAL_PARAMS = {"window": 20, "price_threshold": 0.0, "vol_threshold": 0.0}
+
+
+def adoptable_params(params: dict, interval: str) -> dict:
+    """Signal parameters from ``params`` (e.g. a sweep result row), tagged with the bar interval they were tested on."""
+    return {**{k: type(v)(params.get(k, v)) for k, v in DEFAULT_SIGNAL_PARAMS.items()}, "interval": interval}
+
+
+def signal_params(adopted: dict | None = None, interval: str | None = None) -> dict:
+    """Signal parameters for bars of ``interval``: ``adopted`` when it was tested on that interval, else the defaults."""
+    if not adopted or adopted.get("interval") != interval:
+        return dict(DEFAULT_SIGNAL_PARAMS)
+    return {k: type(v)(adopted.get(k, v)) for k, v in DEFAULT_SIGNAL_PARAMS.items()}
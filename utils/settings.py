@@ -0,0 +1,46 @@
+import os
+from pathlib import Path
+
+# Local cache root for the OHLCV store, provider recordings and remembered choices.
+CACHE_DIR = Path(os.environ.get("MONEYFLOW_CACHE_DIR", ".cache"))
+
+# Market-data backend: "yahoo", "record" (yahoo + save responses) or "replay".
+PROVIDER = os.environ.get("MONEYFLOW_PROVIDER", "yahoo")
+RECORDINGS_DIR = Path(os.environ.get("MONEYFLOW_RECORDINGS_DIR", CACHE_DIR / "recordings"))
+REPLAY_LATENCY = float(os.environ.get("MONEYFLOW_REPLAY_LATENCY", "0"))
+
+# Bulk downloads: tickers per request and concurrent requests (see utils/bulk.py).
+BULK_CHUNK_SIZE = int(os.environ.get("MONEYFLOW_CHUNK_SIZE", "100"))
+BULK_MAX_WORKERS = int(os.environ.get("MONEYFLOW_MAX_WORKERS", "4"))
+
+# Fault injection for load tests: wraps the provider above when either is set.
+FAULT_ERROR_RATE = float(os.environ.get("MONEYFLOW_FAULT_ERROR_RATE", "0"))
+FAULT_LATENCY = float(os.environ.get("MONEYFLOW_FAULT_LATENCY", "0"))
+
+# Memory bound (MB) of the process-wide derived-metrics cache (utils/analytics_cache.py).
+ANALYTICS_CACHE_MB = float(os.environ.get("MONEYFLOW_ANALYTICS_CACHE_MB", "256"))
+
+# Macro universe definition and how long the macro tabs wait for it (seconds).
+# Groups still loading after the budget appear on a later rerun.
+MACRO_UNIVERSE_PATH = Path(os.environ.get(
+    "MONEYFLOW_MACRO_UNIVERSE",
+    Path(__file__).resolve().parent.parent / "config" / "macro_universe.json",
+))
+MACRO_LOAD_BUDGET = float(os.environ.get("MONEYFLOW_MACRO_BUDGET", "20"))
+
+# Macro regime rules scored by the Smart Money Signals tab (see utils/regimes.py).
+REGIME_RULES_PATH = Path(os.environ.get(
+    "MONEYFLOW_REGIME_RULES",
+    Path(__file__).resolve().parent.parent / "config" / "regime_rules.json",
+))
+
+# ETF flow inputs: CSV/Parquet files with date, ticker, shares_outstanding, nav.
+FLOWS_SOURCE_DIR = Path(os.environ.get("MONEYFLOW_FLOWS_DIR", "data/etf_flows"))
+
+# Where cli.py writes batch results and the dashboard's Precomputed tab reads them.
+PRECOMPUTED_DIR = Path(os.environ.get("MONEYFLOW_PRECOMPUTED_DIR", CACHE_DIR / "precomputed"))
+
+# Stage timings (see utils/instrumentation.py): every record as a JSON line, and
+# Prometheus text rewritten after each rerun. Both off unless set.
+METRICS_LOG_PATH = Path(os.environ["MONEYFLOW_METRICS_LOG"]) if os.environ.get("MONEYFLOW_METRICS_LOG") else None
+METRICS_PROM_PATH = Path(os.environ["MONEYFLOW_METRICS_PROM"]) if os.environ.get("MONEYFLOW_METRICS_PROM") else None
@@ -0,0 +1,263 @@
+"""Process-wide store of immutable datasets that every session reads in place.
+
+``st.cache_data`` pickles a return value once and unpickles a fresh copy on every
+read, so 40 sessions looking at the same macro frame hold 40 copies of it and pay
+the deserialization on each rerun. Datasets here are built once and handed out
+by reference instead: PricePanel arrays are read-only and pandas copy-on-write
+stops a shared frame from being modified in place. Memory stays flat as sessions
+grow, and a read is a dict lookup.
+
+Only one load per key runs at a time; other callers wait for it. With a
+``stale_ttl``, a value past its TTL is served as-is while a single background
+refresh replaces it, so expiry never stalls a rerun on the network.
+
+Every key has a current version. A reload after the TTL publishes a new version;
+older versions live on only while a session still holds them and are dropped
+when the last holder reads the new one or has been quiet for ``REF_TIMEOUT``.
+"""
+from __future__ import annotations
+
+import functools
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+from utils.instrumentation import mark
+from utils.lazy import lazy_import
+from utils.panel import PricePanel
+
+pd = lazy_import("pandas")
+
+# A session that has not read a dataset for this long no longer pins its version.
+REF_TIMEOUT = 900
+PRUNE_EVERY = 60
+
+
+def _session_id():
+    if "streamlit" not in sys.modules:
+        return None  # headless (cli.py, benchmarks): no sessions to pin versions for
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx else None
+
+
+def nbytes(value) -> int:
+    """Approximate memory held by a dataset (panels, pandas/numpy objects, tuples/dicts of them)."""
+    if isinstance(value, PricePanel):
+        return sum(v.nbytes for v in value.fields.values()) + value.index.nbytes
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True))
+    if isinstance(value, (tuple, list)):
+        return sum(nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sum(nbytes(v) for v in value.values())
+    return int(getattr(value, "nbytes", 0))  # numpy arrays, pandas indexes
+
+
+class _Version:
+    __slots__ = ("key", "number", "value", "loaded_at", "ttl", "refs", "nbytes")
+
+    def __init__(self, key, number: int, value, loaded_at: float, ttl: float):
+        self.key = key
+        self.number = number
+        self.value = value
+        self.loaded_at = loaded_at
+        self.ttl = ttl
+        self.refs = 0
+        self.nbytes = nbytes(value)
+
+
+class SharedStore:
+    def __init__(self):
+        self.loads = 0
+        self.reads = 0
+        self.hits = 0
+        self.coalesced = 0
+        self.stale_serves = 0
+        self.background_refreshes = 0
+        self.load_errors = 0
+        self._inflight = {}  # key -> Future of the one load running for it
+        self._current = {}   # key -> _Version
+        self._retired = {}   # (key, number) -> _Version still held by a session
+        self._held = {}      # session -> {key: [_Version, last_read]}
+        self._last_prune = time.monotonic()
+        self._lock = threading.Lock()
+
+    def get(self, key, loader, ttl: float, stale_ttl: float | None = None, session=None):
+        """The current version of ``key``, loading it with ``loader()`` when needed.
+
+        Past ``ttl`` the stale value is still returned at once while one background
+        refresh replaces it, until it is ``stale_ttl`` old. Concurrent callers that
+        need a load wait on the single in-flight one instead of starting their own.
+        """
+        session = session if session is not None else _session_id()
+        stale_ttl = max(stale_ttl or ttl, ttl)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._current.get(key)
+            age = now - entry.loaded_at if entry is not None else None
+            if entry is not None and age < ttl:
+                self.hits += 1
+                outcome = "hit"
+            elif entry is not None and age < stale_ttl:
+                self.stale_serves += 1
+                outcome = "stale"
+                if key not in self._inflight:
+                    self._inflight[key] = Future()
+                    self.background_refreshes += 1
+                    threading.Thread(
+                        target=self._load, args=(key, loader, ttl, True), daemon=True,
+                        name="shared-store-refresh",
+                    ).start()
+            else:
+                entry = None
+                pending = self._inflight.get(key)
+                if pending is None:
+                    pending = self._inflight[key] = Future()
+                    owner = True
+                    outcome = "miss"
+                else:
+                    self.coalesced += 1
+                    owner = False
+                    outcome = "coalesced"
+        mark(cache=outcome)
+
+        if entry is None:
+            if owner:
+                self._load(key, loader, ttl)
+            entry = pending.result()
+
+        with self._lock:
+            self.reads += 1
+            if session is not None:
+                self._hold(session, entry, now)
+            if now - self._last_prune >= PRUNE_EVERY:
+                self._prune(now)
+        return entry.value
+
+    def _load(self, key, loader, ttl: float, background: bool = False):
+        """Run ``loader`` for the in-flight future of ``key`` and publish the result."""
+        with self._lock:
+            pending = self._inflight[key]
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+                self.load_errors += 1
+            # Waiters re-raise it; after a failed background refresh callers keep
+            # the stale value and the next one retries.
+            pending.set_exception(e)
+            if background:
+                name = key[0] if isinstance(key, tuple) else key
+                print(f"⚠ Background refresh of {name} failed: {e}")
+            return
+        with self._lock:
+            entry = self._publish(key, value, time.monotonic(), ttl)
+            self._inflight.pop(key, None)
+        pending.set_result(entry)
+
+    def version(self, key) -> int | None:
+        with self._lock:
+            entry = self._current.get(key)
+            return entry.number if entry else None
+
+    def _publish(self, key, value, now: float, ttl: float) -> _Version:
+        old = self._current.get(key)
+        entry = _Version(key, old.number + 1 if old else 1, value, now, ttl)
+        self._current[key] = entry
+        self.loads += 1
+        if old is not None and old.refs:
+            self._retired[(key, old.number)] = old
+        return entry
+
+    def _hold(self, session, entry: _Version, now: float):
+        held = self._held.setdefault(session, {})
+        slot = held.get(entry.key)
+        if slot is None:
+            held[entry.key] = [entry, now]
+            entry.refs += 1
+            return
+        if slot[0] is not entry:
+            self._release(slot[0])
+            slot[0] = entry
+            entry.refs += 1
+        slot[1] = now
+
+    def _release(self, entry: _Version):
+        entry.refs -= 1
+        if entry.refs <= 0 and self._current.get(entry.key) is not entry:
+            self._retired.pop((entry.key, entry.number), None)
+
+    def _prune(self, now: float):
+        self._last_prune = now
+        for session in list(self._held):
+            held = self._held[session]
+            for key, (entry, last_read) in list(held.items()):
+                if now - last_read > REF_TIMEOUT:
+                    del held[key]
+                    self._release(entry)
+            if not held:
+                del self._held[session]
+        # Keys nobody holds any more (old ticker sets, periods) go once they expire.
+        for key, entry in list(self._current.items()):
+            if not entry.refs and now - entry.loaded_at > max(entry.ttl, REF_TIMEOUT):
+                del self._current[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            live = list(self._current.values()) + list(self._retired.values())
+            return {
+                "datasets": len(self._current),
+                "retired_versions": len(self._retired),
+                "sessions": len(self._held),
+                "refs": sum(e.refs for e in live),
+                "bytes": sum(e.nbytes for e in live),
+                "loads": self.loads,
+                "reads": self.reads,
+                "hits": self.hits,
+                "coalesced": self.coalesced,
+                "stale_serves": self.stale_serves,
+                "background_refreshes": self.background_refreshes,
+                "load_errors": self.load_errors,
+                "in_flight": len(self._inflight),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._current.clear()
+            self._retired.clear()
+            self._held.clear()
+
+
+shared_store = SharedStore()
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def shared_dataset(ttl: float, stale_ttl: float | None = None):
+    """Drop-in for ``st.cache_data(ttl=...)`` on loaders whose results are never mutated.
+
+    ``stale_ttl`` turns on stale-while-revalidate: between ``ttl`` and ``stale_ttl``
+    callers get the previous value immediately while it refreshes in the background.
+    """
+    def decorate(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (name, _freeze(args), _freeze(kwargs))
+            return shared_store.get(key, lambda: func(*args, **kwargs), ttl, stale_ttl)
+
+        return wrapper
+
+    return decorate
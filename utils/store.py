@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from utils.bulk import bulk_downloader
+from utils.frames import (
+    MAX_PERIOD,
+    assemble,
+    comparable,
+    is_intraday,
+    merge_bars,
+    period_start,
+    read_parquet,
+    safe_filename,
+    slice_period,
+    write_parquet,
+)
+from utils.instrumentation import mark, timed
+from utils.lazy import lazy_import
+from utils.providers import get_provider
+from utils.settings import CACHE_DIR, PROVIDER
+
+pd = lazy_import("pandas")
+
+# The OHLCV store keeps one Parquet file per (ticker, interval), separately per
+# provider: replayed bars must never be served as live ones or vice versa.
+STORE_DIR = CACHE_DIR / "ohlcv" / PROVIDER
+
+# Days of intraday bars Yahoo serves per interval; older tails are refetched in full.
+INTRADAY_LOOKBACK_DAYS = {
+    "1m": 7,
+    "2m": 60,
+    "5m": 60,
+    "15m": 60,
+    "30m": 60,
+    "60m": 730,
+    "90m": 60,
+    "1h": 730,
+    "2h": 730,
+}
+
+_META_KEY = "moneyflow.covered_from"
+
+
+class OHLCVStore:
+    def __init__(self, root: Path = STORE_DIR):
+        self.root = Path(root)
+
+    def _path(self, ticker: str, interval: str) -> Path:
+        return self.root / interval / f"{safe_filename(ticker)}.parquet"
+
+    def read(self, ticker: str, interval: str):
+        """Return ``(frame, covered_from)`` or ``(None, None)`` if nothing is stored."""
+        path = self._path(ticker, interval)
+        if not path.exists():
+            return None, None
+        try:
+            frame, meta = read_parquet(path)
+        except Exception as e:
+            print(f"⚠ Unreadable store file for {ticker} ({interval}): {e}")
+            return None, None
+
+        covered_from = meta.get(_META_KEY)
+        if covered_from and covered_from != MAX_PERIOD:
+            covered_from = pd.Timestamp(covered_from)
+        return frame, covered_from or None
+
+    def write(self, ticker: str, interval: str, frame: pd.DataFrame, covered_from):
+        if covered_from != MAX_PERIOD:
+            covered_from = covered_from.isoformat()
+        write_parquet(self._path(ticker, interval), frame, {_META_KEY: covered_from})
+
+    def covers(self, frame, covered_from, start, interval, now) -> bool:
+        if frame is None or frame.empty or covered_from is None:
+            return False
+        if start is None and covered_from != MAX_PERIOD:
+            return False
+        if start is not None and covered_from != MAX_PERIOD and covered_from > start:
+            return False
+        if is_intraday(interval):
+            limit = pd.Timedelta(days=INTRADAY_LOOKBACK_DAYS.get(interval, 60))
+            return now - frame.index[-1] < limit
+        return True
+
+
+@timed("fetch.ohlcv")
+def fetch_ohlcv(tickers, period: str, interval: str, store: OHLCVStore | None = None) -> pd.DataFrame:
+    """Download ``tickers`` through the on-disk store, fetching only missing tail bars."""
+    store = store or OHLCVStore()
+    provider = get_provider()
+    tickers = list(tickers)
+    now = provider.now()
+    start = comparable(period_start(period, now), interval)
+
+    frames = {}
+    covered = {}
+    full = []
+    tails = {}
+
+    for t in tickers:
+        cached, covered_from = store.read(t, interval)
+        if store.covers(cached, covered_from, start, interval, now):
+            frames[t] = cached
+            covered[t] = covered_from
+            tails[t] = cached.index[-1]
+        else:
+            full.append(t)
+    # "miss" when some ticker needs its full history, "partial" when the store had every one.
+    mark(cache="miss" if full else "partial", tickers=len(tickers))
+
+    # -----------------------------
+    # Full history for unseen tickers
+    # -----------------------------
+    if full:
+        fetched = bulk_downloader.download_frames(provider, full, period=period, interval=interval)
+        for t, frame in fetched.items():
+            store.write(t, interval, frame, MAX_PERIOD if start is None else start)
+            frames[t] = frame
+
+    # -----------------------------
+    # Tail bars for stored tickers
+    # -----------------------------
+    if tails:
+        tail_start = min(tails.values())
+        tail_start = tail_start.to_pydatetime() if is_intraday(interval) else tail_start.date()
+        fetched = bulk_downloader.download_frames(provider, list(tails), start=tail_start, interval=interval)
+        for t, frame in fetched.items():
+            merged = merge_bars(frames[t], frame)
+            store.write(t, interval, merged, covered[t])
+            frames[t] = merged
+
+    sliced = {}
+    for t, frame in frames.items():
+        frame = slice_period(frame, period, start, interval)
+        if not frame.empty:
+            sliced[t] = frame
+
+    return assemble(sliced, tickers, interval)
@@ -0,0 +1,155 @@
+"""Incremental indicators for streaming bar updates.
+
+Each class keeps a small amount of state per ticker (vectorized over N tickers)
+and folds in one new bar per ``update`` call in O(1) per ticker. Results match
+the batch versions within floating-point tolerance:
+
+- ``StreamingEWM``         ``Series.ewm(alpha=..., min_periods=...).mean()``
+- ``StreamingRSI``         ``indicators.compute_rsi``
+- ``StreamingRollingMean`` ``Series.rolling(window).mean()``
+- ``StreamingReturn``      ``Series.pct_change(periods)``
+"""
+from __future__ import annotations
+
+from utils.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+
+class StreamingEWM:
+    """Adjusted EWM (pandas' default ``adjust=True, ignore_na=False``)."""
+
+    def __init__(self, n: int, alpha: float, min_periods: int = 0):
+        self.decay = 1.0 - alpha
+        self.min_periods = max(min_periods, 1)
+        self.num = np.zeros(n)
+        self.den = np.zeros(n)
+        self.count = np.zeros(n, dtype=np.int64)
+
+    def update(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        valid = ~np.isnan(x)
+        # Older weights decay on every bar, NaN bars included, as in pandas.
+        self.num *= self.decay
+        self.den *= self.decay
+        self.num[valid] += x[valid]
+        self.den[valid] += 1.0
+        self.count += valid
+        return self.value
+
+    @property
+    def value(self):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out = self.num / self.den
+        out[self.count < self.min_periods] = np.nan
+        return out
+
+
+class StreamingRSI:
+    """Wilder-style RSI on an adjusted EWM of gains and losses, like ``compute_rsi``."""
+
+    def __init__(self, n: int, window: int = 14):
+        self.prev = np.full(n, np.nan)
+        self.gain = StreamingEWM(n, alpha=1 / window, min_periods=window)
+        self.loss = StreamingEWM(n, alpha=1 / window, min_periods=window)
+
+    def update(self, price):
+        price = np.asarray(price, dtype=np.float64)
+        delta = price - self.prev
+        self.prev = price.copy()
+        # A NaN delta counts as a zero gain and loss, exactly as np.where does in compute_rsi.
+        with np.errstate(invalid="ignore"):
+            self.gain.update(np.where(delta > 0, delta, 0.0))
+            self.loss.update(np.where(delta < 0, -delta, 0.0))
+        return self.value
+
+    @property
+    def value(self):
+        loss = self.loss.value
+        loss[loss == 0] = np.nan
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rs = self.gain.value / loss
+            return 100 - (100 / (1 + rs))
+
+
+class StreamingRollingMean:
+    """Mean of the last ``window`` bars; NaN until the window holds no NaNs."""
+
+    def __init__(self, n: int, window: int):
+        self.window = window
+        self.buf = np.full((window, n), np.nan)
+        self.total = np.zeros(n)
+        self.nans = np.full(n, window, dtype=np.int64)
+        self.pos = 0
+
+    def update(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        old = self.buf[self.pos]
+        old_valid = ~np.isnan(old)
+        new_valid = ~np.isnan(x)
+
+        self.total[old_valid] -= old[old_valid]
+        self.total[new_valid] += x[new_valid]
+        self.nans += (~new_valid).astype(np.int64) - (~old_valid)
+        self.buf[self.pos] = x
+
+        self.pos = (self.pos + 1) % self.window
+        if self.pos == 0:
+            # Resum once per lap so add/subtract rounding never accumulates.
+            self.total = np.nansum(self.buf, axis=0)
+        return self.value
+
+    @property
+    def value(self):
+        out = self.total / self.window
+        out[self.nans > 0] = np.nan
+        return out
+
+
+class StreamingReturn:
+    """Simple return over ``periods`` bars (``pct_change(periods)``, no fill)."""
+
+    def __init__(self, n: int, periods: int):
+        self.periods = periods
+        self.buf = np.full((periods + 1, n), np.nan)
+        self.pos = 0
+
+    def update(self, price):
+        self.buf[self.pos] = price
+        self.pos = (self.pos + 1) % len(self.buf)
+        return self.value
+
+    @property
+    def value(self):
+        # After an update, ``pos`` points at the oldest bar in the buffer.
+        latest = self.buf[self.pos - 1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return latest / self.buf[self.pos] - 1
+
+
+class StreamingIndicators:
+    """RSI, volume moving average and returns for one ticker set, fed bar by bar."""
+
+    def __init__(self, tickers, rsi_window: int = 14, volume_window: int = 20, return_periods=(1, 20)):
+        n = len(tickers)
+        self.tickers = list(tickers)
+        self.rsi = StreamingRSI(n, rsi_window)
+        self.volume_ma = StreamingRollingMean(n, volume_window)
+        self.returns = {p: StreamingReturn(n, p) for p in return_periods}
+
+    def update(self, close, volume):
+        self.rsi.update(close)
+        self.volume_ma.update(volume)
+        for r in self.returns.values():
+            r.update(close)
+
+    def update_many(self, close, volume):
+        """Warm up from time × ticker arrays, one row per bar."""
+        for c, v in zip(close, volume):
+            self.update(c, v)
+
+    def snapshot(self) -> dict:
+        out = {"rsi": self.rsi.value, "volume_ma": self.volume_ma.value}
+        for p, r in self.returns.items():
+            out[f"return_{p}"] = r.value
+        return out
@@ -0,0 +1,91 @@
+"""Macro universe definition, read from ``config/macro_universe.json``.
+
+Assets are organised in groups (core macro, sectors, countries, futures, ...).
+Each asset has a display label, a ticker chain tried in order (primary first,
+then fallbacks) and an asset class; each group has its own refresh interval so
+fast-moving groups can be reloaded without refetching the whole universe.
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from utils import settings
+
+
+class Asset:
+    __slots__ = ("label", "tickers", "asset_class", "group")
+
+    def __init__(self, label: str, tickers, asset_class: str, group: str):
+        self.label = label
+        self.tickers = list(tickers)
+        self.asset_class = asset_class
+        self.group = group
+
+    @property
+    def primary(self) -> str:
+        return self.tickers[0]
+
+
+class AssetGroup:
+    __slots__ = ("name", "title", "refresh_seconds", "assets")
+
+    def __init__(self, name: str, title: str, refresh_seconds: float, assets):
+        self.name = name
+        self.title = title
+        self.refresh_seconds = refresh_seconds
+        self.assets = list(assets)
+
+
+class MacroUniverse:
+    def __init__(self, groups: dict, default_groups=()):
+        self.groups = groups
+        self.default_groups = [g for g in default_groups if g in groups] or list(groups)[:1]
+        self.assets = {a.label: a for g in groups.values() for a in g.assets}
+
+    def labels(self, groups=None) -> list:
+        """Asset labels in config order, optionally limited to ``groups``."""
+        names = self.groups if groups is None else groups
+        return [a.label for name in names for a in self.groups[name].assets]
+
+    def groups_of(self, labels) -> list:
+        """Groups holding any of ``labels``, in config order."""
+        wanted = {self.assets[label].group for label in labels if label in self.assets}
+        return [name for name in self.groups if name in wanted]
+
+    def classes(self, labels=None) -> dict:
+        labels = self.assets if labels is None else labels
+        return {label: self.assets[label].asset_class for label in labels if label in self.assets}
+
+
+def load_universe(path: Path = settings.MACRO_UNIVERSE_PATH) -> MacroUniverse:
+    raw = json.loads(Path(path).read_text())
+    groups = {}
+    seen = set()
+    for name, spec in raw["groups"].items():
+        default_class = spec.get("asset_class")
+        assets = []
+        for item in spec["assets"]:
+            label = item["label"]
+            tickers = item.get("tickers") or []
+            asset_class = item.get("asset_class", default_class)
+            if not tickers:
+                raise ValueError(f"{path}: asset {label!r} has no tickers")
+            if not asset_class:
+                raise ValueError(f"{path}: asset {label!r} has no asset_class")
+            if label in seen:
+                raise ValueError(f"{path}: duplicate asset label {label!r}")
+            seen.add(label)
+            assets.append(Asset(label, tickers, asset_class, name))
+        groups[name] = AssetGroup(name, spec.get("title", name), float(spec.get("refresh_seconds", 3600)), assets)
+    return MacroUniverse(groups, raw.get("default_groups", ()))
+
+
+_universe = None
+
+
+def get_universe() -> MacroUniverse:
+    global _universe
+    if _universe is None:
+        _universe = load_universe()
+    return _universe